@@ -0,0 +1,54 @@
+import json
+import os
+import subprocess
+import sys
+
+from pathlib import Path
+from typing import Any, Dict, List
+
+# The entry points of CLIs and process pool workers
+MODULES: List[str] = [
+    "py_max",
+    "py_max.py_utils",
+    "py_max.finance_data",
+    "py_max.model_data.algo_strat",
+    "py_max.model_data.backtest_runner",
+    "py_max.finance_data.upload_to_sql.data_capture",
+    "py_max.finance_data.upload_to_sql.backfill",
+]
+
+# Only ever imported on first use
+LAZY_MODULES: List[str] = ["keras", "tensorflow", "matplotlib", "holidays"]
+
+# Seconds for a cold import of any one module, pandas and sqlalchemy included
+DEFAULT_BUDGET: float = 2.0
+
+IMPORT_SCRIPT: str = """
+import importlib, json, sys, time
+start = time.perf_counter()
+importlib.import_module(sys.argv[1])
+seconds = time.perf_counter() - start
+print(json.dumps({"Seconds": seconds, "Loaded": [name for name in json.loads(sys.argv[2]) if name in sys.modules]}))
+"""
+
+
+def import_time(module: str) -> Dict[str, Any]:
+    """Imports the module in a fresh interpreter, with no keys file or connection string available."""
+    environment: Dict[str, str] = {
+        **os.environ,
+        "PYTHONPATH": os.pathsep.join(
+            [str(Path(__file__).parents[1]), os.environ.get("PYTHONPATH", "")]
+        ),
+        "PY_MAX_KEYS_PATH": str(Path(__file__).parent / "no_keys.json"),
+    }
+    environment.pop("PY_MAX_DB_CONNECTION", None)
+
+    completed: subprocess.CompletedProcess = subprocess.run(
+        [sys.executable, "-c", IMPORT_SCRIPT, module, json.dumps(LAZY_MODULES)],
+        capture_output=True,
+        text=True,
+        env=environment,
+    )
+    if completed.returncode != 0:
+        return {"Module": module, "Error": completed.stderr.strip().splitlines()[-1]}
+    return {"Module": module, **json.loads(completed.stdout)}
@@ -0,0 +1,173 @@
+import pandas as pd
+import numpy as np
+import argparse
+import datetime as dt
+import json
+import logging
+import platform
+import subprocess
+import time
+
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from benchmarks.suite import BENCHMARKS, Benchmark
+from benchmarks.synthetic_data import record_fixtures
+
+RESULTS_PATH: Path = Path(__file__).parent / "results"
+
+# A benchmark this much slower than the baseline is flagged
+REGRESSION_RATIO: float = 1.2
+
+
+def git_commit() -> str:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True,
+            text=True,
+            check=True,
+            cwd=Path(__file__).parent,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def time_benchmark(
+    benchmark: Benchmark, size: int, repeats: Optional[int] = None
+) -> Dict[str, Any]:
+    """Runs the benchmark at the size, with a fresh setup outside the timing for every repeat."""
+    # An untimed warm up run, so imports and caches aren't counted
+    benchmark.run(benchmark.setup(size))
+
+    seconds: List[float] = []
+    for _ in range(repeats or benchmark.repeats):
+        state: Any = benchmark.setup(size)
+        start: float = time.perf_counter()
+        benchmark.run(state)
+        seconds.append(time.perf_counter() - start)
+
+    return {
+        "Name": benchmark.name,
+        "Size": size,
+        "Unit": benchmark.unit,
+        "Repeats": len(seconds),
+        "MinSeconds": min(seconds),
+        "MedianSeconds": float(np.median(seconds)),
+        "MeanSeconds": float(np.mean(seconds)),
+    }
+
+
+def run_suite(
+    names: Optional[List[str]] = None, repeats: Optional[int] = None
+) -> Dict[str, Any]:
+    results: List[Dict[str, Any]] = []
+    for benchmark in BENCHMARKS:
+        if names and benchmark.name not in names:
+            continue
+        for size in benchmark.sizes:
+            result: Dict[str, Any] = time_benchmark(benchmark, size, repeats)
+            print(
+                f"{benchmark.name:<30} {size:>8} {benchmark.unit:<5} {result['MedianSeconds'] * 1000:>10.3f} ms"
+            )
+            results.append(result)
+
+    return {
+        "Commit": git_commit(),
+        "Timestamp": dt.datetime.now().isoformat(timespec="seconds"),
+        "Machine": platform.node(),
+        "Platform": platform.platform(),
+        "Python": platform.python_version(),
+        "NumPy": np.__version__,
+        "Pandas": pd.__version__,
+        "Results": results,
+    }
+
+
+def save_results(run: Dict[str, Any], output_path: Optional[str] = None) -> Path:
+    """Saved under results/ by commit and time unless a path is given."""
+    if output_path is None:
+        timestamp: str = run["Timestamp"].replace(":", "").replace("-", "")
+        path: Path = RESULTS_PATH / f"{timestamp}_{run['Commit']}.json"
+    else:
+        path: Path = Path(output_path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps(run, indent=2))
+    return path
+
+
+def compare_results(baseline: Dict[str, Any], current: Dict[str, Any]) -> pd.DataFrame:
+    """Median time of every benchmark and size in both runs, with the ratio of current to baseline."""
+    keys: List[str] = ["Name", "Size", "Unit"]
+    comparison: pd.DataFrame = pd.merge(
+        pd.DataFrame(baseline["Results"])[[*keys, "MedianSeconds"]],
+        pd.DataFrame(current["Results"])[[*keys, "MedianSeconds"]],
+        on=keys,
+        suffixes=("Baseline", "Current"),
+    )
+    comparison["Ratio"] = (
+        comparison["MedianSecondsCurrent"] / comparison["MedianSecondsBaseline"]
+    )
+    comparison["Regression"] = comparison["Ratio"] > REGRESSION_RATIO
+    return comparison
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser: argparse.ArgumentParser = argparse.ArgumentParser(
+        description="Times the hot paths on synthetic data and saves the results for comparing across commits."
+    )
+    parser.add_argument(
+        "--only",
+        nargs="+",
+        choices=[benchmark.name for benchmark in BENCHMARKS],
+        help="Benchmarks to run, all of them by default.",
+    )
+    parser.add_argument(
+        "--repeats", type=int, help="Overrides each benchmark's repeat count."
+    )
+    parser.add_argument("--output", help="Results path, under results/ by default.")
+    parser.add_argument(
+        "--compare",
+        nargs="+",
+        metavar="RESULTS",
+        help="Compares this run against a saved baseline, or two saved results without running.",
+    )
+    parser.add_argument(
+        "--record-fixtures",
+        action="store_true",
+        help="Rewrites the recorded chart responses from the synthetic generator.",
+    )
+    return parser
+
+
+def main(arguments: Optional[List[str]] = None) -> None:
+    options: argparse.Namespace = build_parser().parse_args(arguments)
+
+    if options.record_fixtures:
+        for path in record_fixtures():
+            print(f"Recorded {path}")
+        return
+
+    if options.compare is not None and len(options.compare) == 2:
+        baseline, current = [
+            json.loads(Path(path).read_text()) for path in options.compare
+        ]
+    else:
+        # The per trade info logs would otherwise be timed and flood the terminal
+        logging.disable(logging.INFO)
+        current: Dict[str, Any] = run_suite(options.only, options.repeats)
+        print(f"Saved to {save_results(current, options.output)}")
+
+        if options.compare is None:
+            return
+        baseline: Dict[str, Any] = json.loads(Path(options.compare[0]).read_text())
+
+    print(
+        compare_results(baseline, current).to_string(
+            index=False, float_format="{:.6f}".format
+        )
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,59 @@
+import pandas as pd
+import datetime as dt
+import sqlalchemy as db
+
+from pathlib import Path
+from typing import Dict, List
+
+from py_max.finance_data import BarCache
+from py_max.py_utils import (
+    DatabaseConnector,
+    DBChoice,
+    SQLYahooData,
+    yahoo_data_table,
+)
+
+
+class FixtureResponse:
+    """The parts of a requests.Response that StockGrabber reads."""
+
+    def __init__(self, content: bytes) -> None:
+        self.content: bytes = content
+        self.status_code: int = 200
+
+    def close(self) -> None:
+        pass
+
+
+class FixtureSession:
+    """
+    Stands in for a YahooSession, answering every request with a recorded chart response so
+    the parsing is timed without the network.
+    """
+
+    def __init__(self, fixture_path: Path) -> None:
+        self.content: bytes = Path(fixture_path).read_bytes()
+
+    def get(self, url: str, **kwargs) -> FixtureResponse:
+        return FixtureResponse(self.content)
+
+
+def reset_sqlite_table(db_choice: DBChoice = DBChoice.SQLITE) -> None:
+    """Drops and recreates an empty stk.yahooData in the local SQLite stand-in."""
+    table: db.Table = yahoo_data_table()
+    with DatabaseConnector(db_choice) as connection:
+        with connection.begin():
+            table.drop(connection, checkfirst=True)
+            table.create(connection)
+
+
+def fill_cache(cache: BarCache, bars_df: pd.DataFrame) -> List[dt.date]:
+    """Writes the bars into the cache a (security, day) at a time, so no SQL is needed to read them."""
+    days: pd.Series = bars_df[SQLYahooData.as_at_date].dt.date
+    written: Dict[dt.date, None] = {}
+    for (security, day), day_df in bars_df.groupby(
+        [bars_df[SQLYahooData.security], days], sort=False
+    ):
+        cache.write_day(security, day, day_df.reset_index(drop=True))
+        written[day] = None
+    return list(written)
@@ -0,0 +1,182 @@
+import pandas as pd
+import datetime as dt
+import tempfile
+
+from typing import Any, Callable, Dict, List, NamedTuple, Tuple
+
+from py_max.finance_data import BarCache, Stock, Apple, StockBase
+from py_max.finance_data.upload_to_sql.data_capture import DataCapture
+from py_max.finance_data.upload_to_sql.stock_stripper import StockGrabber
+from py_max.model_data.algo_strat import (
+    Portfolio,
+    Trade,
+    create_time_indices,
+    price_frame,
+)
+from py_max.py_utils import DBChoice, SQLYahooData, trading_days
+
+from benchmarks.synthetic_data import minute_bars, minute_bars_range, fixture_path
+from benchmarks.stand_ins import FixtureSession, reset_sqlite_table, fill_cache
+
+# Every benchmark runs over the same synthetic days
+FIRST_DAY: dt.date = dt.date(2024, 6, 3)
+TICKERS: List[str] = [stock.ticker for stock in StockBase.__subclasses__()]
+
+
+class Benchmark(NamedTuple):
+    """
+    A timed call at several data sizes. setup(size) builds the input of a single repeat outside
+    the timing, and run(state) is what gets timed.
+    """
+
+    name: str
+    unit: str
+    sizes: Tuple[int, ...]
+    setup: Callable[[int], Any]
+    run: Callable[[Any], Any]
+    repeats: int = 5
+
+
+def benchmark_days(count: int) -> List[dt.datetime]:
+    return list(trading_days(FIRST_DAY, FIRST_DAY + dt.timedelta(days=2 * count + 7)))[
+        :count
+    ]
+
+
+def memoised(build: Callable[[int], Any]) -> Callable[[int], Any]:
+    """Builds the data of each size once, the repeats only copy it."""
+    built: Dict[int, Any] = {}
+
+    def get(size: int) -> Any:
+        if size not in built:
+            built[size] = build(size)
+        return built[size]
+
+    return get
+
+
+# - create_time_indices, on a frame of size rows - #
+@memoised
+def time_frame(rows: int) -> pd.DataFrame:
+    day_count: int = rows // 700 + 1
+    bars_df: pd.DataFrame = minute_bars_range(
+        [Apple.ticker], [day.date() for day in benchmark_days(day_count)], missing=0
+    )
+    return bars_df.head(rows)
+
+
+def setup_time_indices(rows: int) -> pd.DataFrame:
+    return time_frame(rows).copy()
+
+
+# - Trade.run_day, at the last bar of a day of size bars - #
+def setup_run_day(bars: int) -> Tuple[Trade, dt.datetime]:
+    trade_date: dt.datetime = benchmark_days(1)[0]
+    bars_df: pd.DataFrame = minute_bars(Apple.ticker, trade_date.date(), bars=bars)
+    bars_df = Stock.clean_data(bars_df)
+    trade: Trade = Trade(
+        Stock(Apple, trade_date),
+        trade_date,
+        1_000_000,
+        price_frame(
+            bars_df[SQLYahooData.as_at_date].to_numpy(),
+            bars_df[SQLYahooData.market_high].to_numpy(),
+            bars_df[SQLYahooData.market_low].to_numpy(),
+        ),
+    )
+    return trade, bars_df[SQLYahooData.as_at_date].iloc[-1].to_pydatetime()
+
+
+def run_run_day(state: Tuple[Trade, dt.datetime]) -> Any:
+    trade, time = state
+    return trade.run_day(time)
+
+
+# - Portfolio.test_data, every known ticker over size days read from a bar cache - #
+@memoised
+def portfolio_cache(day_count: int) -> Tuple[BarCache, List[dt.datetime]]:
+    trade_dates: List[dt.datetime] = benchmark_days(day_count)
+    cache: BarCache = BarCache(tempfile.mkdtemp(prefix="py_max_benchmark_"))
+    fill_cache(cache, minute_bars_range(TICKERS, [date.date() for date in trade_dates]))
+    return cache, trade_dates
+
+
+def setup_test_data(day_count: int) -> Portfolio:
+    cache, trade_dates = portfolio_cache(day_count)
+    return Portfolio(StockBase.__subclasses__(), trade_dates, cache=cache)
+
+
+# - StockGrabber.data_processing, on the recorded chart response of size days - #
+def setup_data_processing(day_count: int) -> StockGrabber:
+    trade_dates: List[dt.datetime] = benchmark_days(day_count)
+    return StockGrabber(
+        Apple.ticker,
+        trade_dates[0],
+        trade_dates[-1] + dt.timedelta(days=1),
+        session=FixtureSession(fixture_path(Apple.ticker, day_count)),
+    )
+
+
+# - DataCapture.insert_to_sql, size rows into an empty SQLite table - #
+@memoised
+def insert_frame(rows: int) -> pd.DataFrame:
+    day_count: int = rows // (700 * len(TICKERS)) + 1
+    bars_df: pd.DataFrame = minute_bars_range(
+        TICKERS, [day.date() for day in benchmark_days(day_count)]
+    )
+    return bars_df.head(rows)
+
+
+def setup_insert_to_sql(rows: int) -> Tuple[DataCapture, pd.DataFrame]:
+    reset_sqlite_table(DBChoice.SQLITE)
+    capture: DataCapture = DataCapture(valid_stocks=[], db_choice=DBChoice.SQLITE)
+    return capture, insert_frame(rows).copy()
+
+
+def run_insert_to_sql(state: Tuple[DataCapture, pd.DataFrame]) -> Any:
+    capture, bars_df = state
+    return capture.insert_to_sql(bars_df)
+
+
+BENCHMARKS: List[Benchmark] = [
+    Benchmark(
+        "create_time_indices",
+        "rows",
+        (1_000, 10_000, 100_000),
+        setup_time_indices,
+        create_time_indices,
+        repeats=20,
+    ),
+    Benchmark(
+        "Trade.run_day",
+        "bars",
+        (60, 240, 720),
+        setup_run_day,
+        run_run_day,
+        repeats=20,
+    ),
+    Benchmark(
+        "Portfolio.test_data",
+        "days",
+        (1, 5, 20),
+        setup_test_data,
+        lambda portfolio: portfolio.test_data(),
+        repeats=3,
+    ),
+    Benchmark(
+        "StockGrabber.data_processing",
+        "days",
+        (1, 5),
+        setup_data_processing,
+        lambda grabber: grabber.data_processing(),
+        repeats=10,
+    ),
+    Benchmark(
+        "DataCapture.insert_to_sql",
+        "rows",
+        (1_000, 10_000, 50_000),
+        setup_insert_to_sql,
+        run_insert_to_sql,
+        repeats=3,
+    ),
+]
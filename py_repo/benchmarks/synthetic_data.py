@@ -0,0 +1,162 @@
+import pandas as pd
+import numpy as np
+import datetime as dt
+import json
+import zlib
+
+from pathlib import Path
+from typing import Any, Dict, List, Tuple
+
+from py_max.finance_data.static import WebPageStatics
+from py_max.py_utils import SQLYahooData, YAHOO_DATA_SCHEMA
+
+FIXTURES_PATH: Path = Path(__file__).parent / "fixtures"
+
+# Matching the pre and post market session the strategy runs over
+FIRST_HOUR: int = 9
+LAST_HOUR: int = 21
+GMT_OFFSET: int = -14400
+
+
+def bar_seed(ticker: str, day: dt.date, seed: int = 0) -> int:
+    """Stable across runs and machines, unlike hash()."""
+    return zlib.crc32(f"{ticker}:{day:%Y-%m-%d}:{seed}".encode())
+
+
+def minute_bars(
+    ticker: str,
+    day: dt.date,
+    seed: int = 0,
+    bars: int = (LAST_HOUR - FIRST_HOUR) * 60,
+    missing: float = 0.02,
+    empty: float = 0.01,
+) -> pd.DataFrame:
+    """
+    A day of 1 minute OHLCV bars for the ticker in the exact SQLYahooData layout, the same for
+    the same arguments. A random walk on a 1 cent tick, with a fraction of the minutes missing
+    and a fraction of the bars empty (all NaN prices), as Yahoo gives.
+    """
+    rng: np.random.Generator = np.random.default_rng(bar_seed(ticker, day, seed))
+    session_start: dt.datetime = dt.datetime.combine(day, dt.time(hour=FIRST_HOUR))
+    times: pd.DatetimeIndex = pd.date_range(
+        session_start, periods=min(bars, (LAST_HOUR - FIRST_HOUR) * 60), freq="1min"
+    )
+    times = times[rng.random(len(times)) >= missing]
+
+    bar_count: int = len(times)
+    # Volatile enough for the strategy to trade through the day
+    opens: np.ndarray = 100 + np.cumsum(rng.normal(0, 0.15, bar_count))
+    closes: np.ndarray = opens + rng.normal(0, 0.05, bar_count)
+    highs: np.ndarray = np.maximum(opens, closes) + np.abs(
+        rng.normal(0, 0.03, bar_count)
+    )
+    lows: np.ndarray = np.minimum(opens, closes) - np.abs(
+        rng.normal(0, 0.03, bar_count)
+    )
+    volumes: np.ndarray = rng.integers(0, 50_000, bar_count).astype(float)
+
+    prices: Dict[str, np.ndarray] = {
+        SQLYahooData.market_low: np.round(lows, 2),
+        SQLYahooData.market_high: np.round(highs, 2),
+        SQLYahooData.market_open: np.round(opens, 2),
+        SQLYahooData.market_close: np.round(closes, 2),
+        SQLYahooData.market_volume: volumes,
+    }
+    EMPTY: np.ndarray = rng.random(bar_count) < empty
+    for values in prices.values():
+        values[EMPTY] = np.nan
+
+    bars_df: pd.DataFrame = pd.DataFrame(
+        {
+            SQLYahooData.as_at_date: times.to_numpy(dtype="datetime64[ns]"),
+            SQLYahooData.security: ticker,
+            SQLYahooData.currency: "USD",
+            **prices,
+            SQLYahooData.instrument_type: "EQUITY",
+            SQLYahooData.exchange_name: "NMS",
+            SQLYahooData.time_zone: "EDT",
+            SQLYahooData.gmt_off_set: GMT_OFFSET,
+        }
+    )
+    return bars_df[list(YAHOO_DATA_SCHEMA)]
+
+
+def minute_bars_range(
+    tickers: List[str], days: List[dt.date], seed: int = 0, **bar_options: Any
+) -> pd.DataFrame:
+    """The bars of every ticker over every day, in ticker then time order."""
+    return pd.concat(
+        [
+            minute_bars(ticker, day, seed, **bar_options)
+            for ticker in tickers
+            for day in days
+        ],
+        ignore_index=True,
+    )
+
+
+def chart_response(ticker: str, days: List[dt.date], seed: int = 0) -> Dict[str, Any]:
+    """The bars as the Yahoo v8 chart endpoint gives them, empty bars as nulls."""
+    bars_df: pd.DataFrame = minute_bars_range([ticker], days, seed)
+    timestamps: np.ndarray = (
+        bars_df[SQLYahooData.as_at_date]
+        .to_numpy(dtype="datetime64[s]")
+        .astype(np.int64)
+        - GMT_OFFSET
+    )
+
+    def nullable(column: str) -> List[Any]:
+        values: pd.Series = bars_df[column].astype(object)
+        return values.where(bars_df[column].notna(), None).to_list()
+
+    quote: Dict[str, List[Any]] = {
+        WebPageStatics.low: nullable(SQLYahooData.market_low),
+        WebPageStatics.high: nullable(SQLYahooData.market_high),
+        WebPageStatics.open: nullable(SQLYahooData.market_open),
+        WebPageStatics.close: nullable(SQLYahooData.market_close),
+        WebPageStatics.volume: nullable(SQLYahooData.market_volume),
+    }
+    meta: Dict[str, Any] = {
+        WebPageStatics.currency: "USD",
+        WebPageStatics.ticker: ticker,
+        WebPageStatics.exchange_name: "NMS",
+        WebPageStatics.instrument_type: "EQUITY",
+        WebPageStatics.first_trade_date: 345479400,
+        WebPageStatics.gmt_off_set: GMT_OFFSET,
+        WebPageStatics.time_zone: "EDT",
+    }
+    return {
+        WebPageStatics.chart: {
+            WebPageStatics.result: [
+                {
+                    WebPageStatics.meta: meta,
+                    WebPageStatics.timestamp: timestamps.tolist(),
+                    WebPageStatics.indicators: {WebPageStatics.quote: [quote]},
+                }
+            ],
+            "error": None,
+        }
+    }
+
+
+def fixture_path(ticker: str, day_count: int) -> Path:
+    return FIXTURES_PATH / f"chart_{ticker}_{day_count}d.json"
+
+
+def record_fixtures(
+    ticker: str = "AAPL",
+    first_day: dt.date = dt.date(2024, 6, 3),
+    day_counts: Tuple[int, ...] = (1, 5),
+) -> List[Path]:
+    """Writes the chart responses the parsing benchmarks read, one per number of days."""
+    FIXTURES_PATH.mkdir(parents=True, exist_ok=True)
+    paths: List[Path] = []
+    for day_count in day_counts:
+        days: List[dt.date] = [
+            day.date()
+            for day in pd.bdate_range(first_day, periods=day_count).to_pydatetime()
+        ]
+        path: Path = fixture_path(ticker, day_count)
+        path.write_text(json.dumps(chart_response(ticker, days), separators=(",", ":")))
+        paths.append(path)
+    return paths
@@ -0,0 +1,145 @@
+import pandas as pd
+import datetime as dt
+import contextlib
+import json
+import threading
+import time
+
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, Iterator, List, Optional
+from urllib.parse import parse_qs, urlsplit
+
+from py_max.finance_data.static import WebPageStatics
+from py_max.finance_data.upload_to_sql.stock_stripper import StockGrabber
+
+from benchmarks.synthetic_data import GMT_OFFSET, chart_response
+
+
+def stub_chart(
+    ticker: str, period1: int, period2: int, bar_limit: Optional[int] = None
+) -> Dict[str, Any]:
+    """
+    The synthetic chart response of the ticker, cut to the requested epochs. The bars are the same
+    whichever range they are requested in, so a range and its days give the same rows. With a
+    bar_limit, only the first bars are given, as Yahoo truncates a long range.
+    """
+    # Days in the exchange's time, which the synthetic bars are generated in
+    first_day: dt.date = dt.datetime.fromtimestamp(
+        period1 + GMT_OFFSET, dt.timezone.utc
+    ).date()
+    last_day: dt.date = dt.datetime.fromtimestamp(
+        period2 + GMT_OFFSET, dt.timezone.utc
+    ).date()
+    days: List[dt.date] = [
+        day.date() for day in pd.date_range(first_day, last_day).to_pydatetime()
+    ]
+
+    response: Dict[str, Any] = chart_response(ticker, days)
+    result: Dict[str, Any] = response[WebPageStatics.chart][WebPageStatics.result][0]
+    in_range: List[int] = [
+        position
+        for position, timestamp in enumerate(result[WebPageStatics.timestamp])
+        if period1 <= timestamp < period2
+    ][:bar_limit]
+    if not in_range:
+        return {WebPageStatics.chart: {WebPageStatics.result: None, "error": None}}
+
+    result[WebPageStatics.timestamp] = [
+        result[WebPageStatics.timestamp][position] for position in in_range
+    ]
+    quote: Dict[str, List[Any]] = result[WebPageStatics.indicators][
+        WebPageStatics.quote
+    ][0]
+    for field, values in quote.items():
+        quote[field] = [values[position] for position in in_range]
+    return response
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    """Answers /v8/finance/chart requests, or a 503 while the server has failures queued."""
+
+    def log_message(self, *arguments: Any) -> None:
+        pass
+
+    def do_GET(self) -> None:
+        if not self.server.record_hit():
+            self.send_response(503)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+
+        query: Dict[str, List[str]] = parse_qs(urlsplit(self.path).query)
+        body: bytes = json.dumps(
+            stub_chart(
+                query["symbol"][0],
+                int(query["period1"][0]),
+                int(query["period2"][0]),
+                self.server.bar_limit,
+            )
+        ).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+class StubServer(ThreadingHTTPServer):
+    """
+    Local stand-in for the Yahoo chart endpoint on a free port, serving on a background thread.
+    Records the time of every request, and fails the next few with a 503 when asked to. Responses
+    are cut to the first bar_limit bars when it is set.
+    """
+
+    daemon_threads: bool = True
+
+    def __init__(self) -> None:
+        super().__init__(("127.0.0.1", 0), StubHandler)
+        self.hits: List[float] = []
+        self.failures_left: int = 0
+        self.bar_limit: Optional[int] = None
+        self._lock: threading.Lock = threading.Lock()
+        self.thread: threading.Thread = threading.Thread(
+            target=self.serve_forever, daemon=True
+        )
+
+    def __enter__(self) -> "StubServer":
+        self.thread.start()
+        return self
+
+    def __exit__(self, arg1, arg2, arg3):
+        self.shutdown()
+        self.server_close()
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self.server_address[1]}"
+
+    def fail_next(self, count: int) -> None:
+        with self._lock:
+            self.failures_left = count
+
+    def record_hit(self) -> bool:
+        """Whether the request should be answered, rather than failed."""
+        with self._lock:
+            self.hits.append(time.monotonic())
+            if self.failures_left > 0:
+                self.failures_left -= 1
+                return False
+            return True
+
+    def reset(self) -> None:
+        with self._lock:
+            self.hits = []
+            self.failures_left = 0
+            self.bar_limit = None
+
+
+@contextlib.contextmanager
+def grabbers_pointed_at(url: str) -> Iterator[None]:
+    original_url: str = StockGrabber.base_url
+    StockGrabber.base_url = url
+    try:
+        yield
+    finally:
+        StockGrabber.base_url = original_url
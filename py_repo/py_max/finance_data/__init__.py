@@ -1,4 +1,4 @@
-from py_max.finance_data.read_sql import Stock
+from py_max.finance_data.read_sql import Stock, BarCache, BarStore, SecurityBars
 from py_max.finance_data.config import (
     StockBase,
     Amazon,
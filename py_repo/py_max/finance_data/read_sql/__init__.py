@@ -1 +1,3 @@
 from py_max.finance_data.read_sql.get_stock_data import Stock
+from py_max.finance_data.read_sql.bar_cache import BarCache
+from py_max.finance_data.read_sql.bar_store import BarStore, SecurityBars
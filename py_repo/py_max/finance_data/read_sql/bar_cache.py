@@ -0,0 +1,93 @@
+import pandas as pd
+import datetime as dt
+import os
+
+from pathlib import Path
+from typing import Optional, List, Iterable, Protocol
+
+from py_max.finance_data.config import logger
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # Optional, only needed when a cache is used
+    pa = None
+    pq = None
+
+
+class CompletedDays(Protocol):
+    """What the cache needs of a ledger, the capture's IngestLedger without importing capture."""
+
+    def is_complete(self, ticker: str, day: dt.date) -> bool: ...
+
+
+class BarCache:
+    """
+    Read-through on disk cache of the yahooData minute bars, one Parquet file per security and day.
+    Historical bars never change, so a settled day is only read from SQL once. A day is settled
+    once the ledger has it as complete or, without a ledger, once it is over settle_days old.
+    Days that aren't settled or have no data are always re-read, as the capture may not have run.
+    """
+
+    def __init__(
+        self,
+        root: str,
+        ledger: Optional[CompletedDays] = None,
+        settle_days: int = 7,
+    ) -> None:
+        if pq is None:
+            raise ImportError(
+                "BarCache needs pyarrow installed to read and write Parquet."
+            )
+
+        self.root: Path = Path(root)
+        self.root.mkdir(parents=True, exist_ok=True)
+
+        # Deciding which days are final enough to cache
+        self.ledger: Optional[CompletedDays] = ledger
+        self.settle_days: int = settle_days
+
+    def __repr__(self) -> str:
+        return f"Minute bar cache at {self.root}"
+
+    def path(self, ticker: str, day: dt.date) -> Path:
+        return self.root / ticker / f"{day:%Y-%m-%d}.parquet"
+
+    def read_day(self, ticker: str, day: dt.date) -> Optional[pd.DataFrame]:
+        """The cached rows for the day, or None when the day has not been cached."""
+        path: Path = self.path(ticker, day)
+        if not path.exists():
+            return None
+
+        # Memory mapped so a read doesn't copy the file through a buffer first
+        return pq.read_table(path, memory_map=True).to_pandas()
+
+    def is_settled(self, ticker: str, day: dt.date) -> bool:
+        if self.ledger is not None:
+            return self.ledger.is_complete(ticker, day)
+        return day < dt.date.today() - dt.timedelta(days=self.settle_days)
+
+    def write_day(self, ticker: str, day: dt.date, data: pd.DataFrame) -> None:
+        """Stores the rows for the day, when it has any and is settled."""
+        if data.empty or not self.is_settled(ticker, day):
+            return
+
+        path: Path = self.path(ticker, day)
+        path.parent.mkdir(parents=True, exist_ok=True)
+
+        # Writing to a temporary file first so readers never see a partial day
+        temporary_path: Path = path.with_suffix(f".{os.getpid()}.tmp")
+        pq.write_table(pa.Table.from_pandas(data, preserve_index=False), temporary_path)
+        os.replace(temporary_path, path)
+
+    def invalidate(self, ticker: str, days: Optional[Iterable[dt.date]] = None) -> None:
+        """Removes the cached days (all of them for the ticker when days is None), e.g. after a backfill."""
+        if days is None:
+            paths: List[Path] = list((self.root / ticker).glob("*.parquet"))
+        else:
+            paths: List[Path] = [self.path(ticker, day) for day in days]
+
+        for path in paths:
+            path.unlink(missing_ok=True)
+
+        logger.LogInfo(f"Invalidated {len(paths)} cached days for {ticker}.")
@@ -0,0 +1,189 @@
+import pandas as pd
+import numpy as np
+import datetime as dt
+
+from typing import Any, Dict, List, Iterator, Optional
+
+from py_max.py_utils import SQLYahooData
+
+# Per minute values, everything else on a row is the security's metadata
+PRICE_FIELDS: List[str] = [
+    SQLYahooData.market_low,
+    SQLYahooData.market_high,
+    SQLYahooData.market_open,
+    SQLYahooData.market_close,
+    SQLYahooData.market_volume,
+]
+# A bar is empty, and dropped on reading, when every one of these is missing
+EMPTY_BAR_FIELDS: List[str] = [
+    SQLYahooData.market_close,
+    SQLYahooData.market_high,
+    SQLYahooData.market_low,
+    SQLYahooData.market_open,
+]
+METADATA_FIELDS: List[str] = [
+    SQLYahooData.currency,
+    SQLYahooData.instrument_type,
+    SQLYahooData.exchange_name,
+    SQLYahooData.time_zone,
+]
+
+
+class SecurityBars:
+    """
+    The bars of one security as contiguous arrays: int64 epoch seconds (in the stored, naive time),
+    one array per price field and the gmt offset, which changes with daylight saving. The
+    remaining metadata is held once. Slices are views onto the parent arrays.
+    """
+
+    def __init__(
+        self,
+        security: str,
+        times: np.ndarray,
+        prices: Dict[str, np.ndarray],
+        gmt_offsets: np.ndarray,
+        metadata: Dict[str, Any],
+    ) -> None:
+        self.security: str = security
+        self.times: np.ndarray = times
+        self.prices: Dict[str, np.ndarray] = prices
+        self.gmt_offsets: np.ndarray = gmt_offsets
+        self.metadata: Dict[str, Any] = metadata
+
+    def __repr__(self) -> str:
+        return f"{len(self)} bars for {self.security}"
+
+    def __len__(self) -> int:
+        return len(self.times)
+
+    def __getitem__(self, field: str) -> np.ndarray:
+        return self.prices[field]
+
+    @property
+    def datetimes(self) -> np.ndarray:
+        return self.times.view("datetime64[s]")
+
+    @property
+    def nbytes(self) -> int:
+        return (
+            self.times.nbytes
+            + self.gmt_offsets.nbytes
+            + sum(values.nbytes for values in self.prices.values())
+        )
+
+    def between(self, start: dt.datetime, end: dt.datetime) -> "SecurityBars":
+        """The bars from start up to (not including) end, found by binary search."""
+        first, last = np.searchsorted(
+            self.times, [epoch_seconds(start), epoch_seconds(end)]
+        )
+        return SecurityBars(
+            self.security,
+            self.times[first:last],
+            {field: values[first:last] for field, values in self.prices.items()},
+            self.gmt_offsets[first:last],
+            self.metadata,
+        )
+
+    def day(self, day: dt.date) -> "SecurityBars":
+        start: dt.datetime = dt.datetime.combine(day, dt.time())
+        return self.between(start, start + dt.timedelta(days=1))
+
+    def to_frame(self, fields: Optional[List[str]] = None) -> pd.DataFrame:
+        """The bars as the frame read from SQL, or just the time and the given price fields."""
+        columns: Dict[str, Any] = {SQLYahooData.as_at_date: self.datetimes}
+        if fields is None:
+            columns[SQLYahooData.security] = self.security
+            columns.update(self.prices)
+            columns.update(self.metadata)
+            columns[SQLYahooData.gmt_off_set] = self.gmt_offsets
+        else:
+            columns.update({field: self.prices[field] for field in fields})
+        return pd.DataFrame(columns)
+
+
+class BarStore:
+    """
+    Columnar in memory store of minute bars keyed by security. Built once from the SQL frames,
+    after which any day is an O(log n) view with no copying.
+    """
+
+    def __init__(self, dtype: type = np.float64) -> None:
+        # float32 halves the price memory, float64 keeps the prices exactly as stored
+        self.dtype: type = dtype
+        self.securities: Dict[str, SecurityBars] = {}
+
+    def __repr__(self) -> str:
+        return (
+            f"Bar store of {len(self.securities)} securities, {self.nbytes / 1e6:.1f}MB"
+        )
+
+    def __contains__(self, security: str) -> bool:
+        return security in self.securities
+
+    def __getitem__(self, security: str) -> SecurityBars:
+        return self.securities[security]
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.securities)
+
+    @property
+    def nbytes(self) -> int:
+        return sum(bars.nbytes for bars in self.securities.values())
+
+    @classmethod
+    def from_frame(cls, data: pd.DataFrame, dtype: type = np.float64) -> "BarStore":
+        """Builds the store from rows read from SQL, in any order and for any securities."""
+        store: BarStore = cls(dtype)
+        data = data.dropna(how="all", subset=EMPTY_BAR_FIELDS)
+        for security, security_data in data.groupby(SQLYahooData.security, sort=False):
+            store.add(security, security_data)
+        return store
+
+    def add(self, security: str, data: pd.DataFrame) -> None:
+        """Adds (or replaces) the security from its rows read from SQL."""
+        times: np.ndarray = (
+            pd.to_datetime(data[SQLYahooData.as_at_date])
+            .to_numpy()
+            .astype("datetime64[s]")
+            .astype(np.int64)
+        )
+        order: np.ndarray = np.argsort(times, kind="stable")
+
+        prices: Dict[str, np.ndarray] = {
+            field: np.ascontiguousarray(
+                data[field].to_numpy(dtype=self.dtype, na_value=np.nan)[order]
+            )
+            for field in PRICE_FIELDS
+        }
+        # A missing offset is taken from the bars either side, it only changes with daylight saving
+        gmt_offsets: pd.Series = (
+            pd.Series(
+                data[SQLYahooData.gmt_off_set].to_numpy(
+                    dtype=np.float64, na_value=np.nan
+                )[order]
+            )
+            .ffill()
+            .bfill()
+        )
+        if gmt_offsets.isna().any():
+            raise ValueError(f"No gmt offset in any of the bars of {security}.")
+
+        first_row: pd.Series = data.iloc[0]
+        metadata: Dict[str, Any] = {
+            field: first_row[field] for field in METADATA_FIELDS
+        }
+
+        self.securities[security] = SecurityBars(
+            security,
+            times[order],
+            prices,
+            gmt_offsets.to_numpy().astype(np.int32),
+            metadata,
+        )
+
+    def day(self, security: str, day: dt.date) -> SecurityBars:
+        return self.securities[security].day(day)
+
+
+def epoch_seconds(time: dt.datetime) -> np.int64:
+    return np.datetime64(time, "s").astype(np.int64)
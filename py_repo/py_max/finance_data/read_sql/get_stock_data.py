@@ -1,11 +1,10 @@
 import pandas as pd
 import numpy as np
 import datetime as dt
-import matplotlib.pyplot as plt
 
-from sqlalchemy import text, TextClause
+import sqlalchemy as db
 
-from typing import Optional, List
+from typing import Optional, List, Dict, Tuple, Iterator
 
 from py_max.finance_data.config import (
     StockBase,
@@ -17,16 +16,30 @@ from py_max.finance_data.config import (
     Google,
     Tesla,
 )
-from py_max.py_utils import ExecuteQuery, SQLYahooData
+from py_max.py_utils import (
+    ExecuteQuery,
+    StreamQuery,
+    SQLYahooData,
+    BarQuery,
+    query_columns,
+)
+from py_max.finance_data.read_sql.bar_cache import BarCache
+from py_max.finance_data.read_sql.bar_store import BarStore, EMPTY_BAR_FIELDS
 
 
 class Stock:
     def __init__(
-        self, stock_choice: StockBase, day_filter: Optional[dt.datetime] = None
+        self,
+        stock_choice: StockBase,
+        day_filter: Optional[dt.datetime] = None,
+        cache: Optional[BarCache] = None,
     ) -> None:
         self.stock_choice: StockBase = stock_choice
         self.day_filter: Optional[dt.datetime] = day_filter
 
+        # Days are read through the cache when one is given
+        self.cache: Optional[BarCache] = cache
+
         # self.data: pd.DataFrame = self.__get_stock()
 
     @property
@@ -38,19 +51,17 @@ class Stock:
 
     @property
     def data(self) -> pd.DataFrame:
-        data: pd.DataFrame = self._data()
+        return self.clean_data(self._data())
 
-        # Removing any nan values on all of the entries here.
-        data.dropna(
-            how="all",
-            subset=[
-                SQLYahooData.market_close,
-                SQLYahooData.market_high,
-                SQLYahooData.market_low,
-                SQLYahooData.market_high,
-            ],
-            inplace=True,
-        )
+    @staticmethod
+    def clean_data(data: pd.DataFrame) -> pd.DataFrame:
+        """Drops the empty price rows and adds the date sub-division to data read from SQL."""
+        # Removing the rows with none of the prices, the same rule BarStore applies
+        price_columns: List[str] = [
+            column for column in EMPTY_BAR_FIELDS if column in data.columns
+        ]
+        if price_columns:
+            data.dropna(how="all", subset=price_columns, inplace=True)
 
         # Adding sub-division for the dates
         try:
@@ -60,52 +71,234 @@ class Stock:
 
         return data
 
+    @staticmethod
+    def read_columns(columns: Optional[List[str]]) -> Optional[List[str]]:
+        """The columns to read for the ones asked for, with the prices clean_data looks at."""
+        if columns is None:
+            return None
+        return [*columns, *EMPTY_BAR_FIELDS]
+
+    @staticmethod
+    def asked_columns(data: pd.DataFrame, columns: Optional[List[str]]) -> pd.DataFrame:
+        """Cleaned data cut back to the columns asked for, plus the time and date."""
+        if columns is None:
+            return data
+        return data[[*query_columns(columns), SQLYahooData.date]]
+
     @ExecuteQuery()
-    def _data(self) -> None:
-        """Gets the data for the stock. Uses double underscore so less accessible."""
-        query_base: str = f"""SELECT [AsAtDateTime]
-                    ,[Security]
-                    ,[Currency]
-                    ,[MarketLow]
-                    ,[MarketHigh]
-                    ,[MarketOpen]
-                    ,[MarketClose]
-                    ,[MarketVolume]
-                    ,[InstrumentType]
-                    ,[ExchangeName]
-                    ,[TimeZone]
-                    ,[GmtOffSet]
-                FROM [max_dev].[stk].[yahooData]
-                WHERE Security = '{self.stock_choice.ticker}'"""
-
-        if self.day_filter is not None:
-            day_filter_string: str = dt.datetime.strftime(self.day_filter, r"%Y-%m-%d")
-            day_filter_plus_one_string: str = dt.datetime.strftime(
-                self.day_filter + dt.timedelta(days=1), r"%Y-%m-%d"
+    def _data(
+        self,
+        start_date: Optional[dt.datetime] = None,
+        end_date: Optional[dt.datetime] = None,
+        columns: Optional[List[str]] = None,
+    ) -> db.Select:
+        """
+        Gets the columns of the stock from the start date up to (not including) the end date,
+        filtered in SQL. Without dates, the day_filter day or else the whole history.
+        """
+        if start_date is None and end_date is None and self.day_filter is not None:
+            start_date = self.day_filter
+            end_date = self.day_filter + dt.timedelta(days=1)
+
+        return (
+            BarQuery(columns)
+            .for_securities([self.stock_choice.ticker])
+            .between(start_date, end_date)
+            .select()
+        )
+
+    @ExecuteQuery()
+    def _latest_time(self) -> db.Select:
+        """The time of the stock's latest bar, read without pulling its history."""
+        return BarQuery().for_securities([self.stock_choice.ticker]).latest_times()
+
+    @StreamQuery()
+    def stream_data(
+        self,
+        start_date: Optional[dt.datetime] = None,
+        end_date: Optional[dt.datetime] = None,
+        columns: Optional[List[str]] = None,
+    ) -> db.Select:
+        """
+        The stock's bars from the start date up to (not including) the end date in time order, as
+        chunks of at most chunksize rows, so a history of any length is read in constant memory.
+        """
+        return (
+            BarQuery(columns)
+            .for_securities([self.stock_choice.ticker])
+            .between(start_date, end_date)
+            .ordered()
+            .select()
+        )
+
+    def stream_days(
+        self,
+        start_date: Optional[dt.datetime] = None,
+        end_date: Optional[dt.datetime] = None,
+        columns: Optional[List[str]] = None,
+        chunksize: int = 100_000,
+    ) -> Iterator[Tuple[dt.date, pd.DataFrame]]:
+        """
+        The stock's bars a day at a time, as get_day gives them, read through stream_data. The
+        last day of each chunk is held back until the next chunk completes it.
+        """
+        carried_data: Optional[pd.DataFrame] = None
+        for data in self.stream_data(
+            start_date, end_date, self.read_columns(columns), chunksize=chunksize
+        ):
+            if carried_data is not None:
+                data = pd.concat([carried_data, data], ignore_index=True)
+
+            days: pd.Series = data[SQLYahooData.as_at_date].dt.date
+            COMPLETE: pd.Series = days != days.iloc[-1]
+            for day, day_data in data.loc[COMPLETE].groupby(days[COMPLETE], sort=False):
+                yield day, self.asked_columns(self.clean_data(day_data.copy()), columns)
+            carried_data = data.loc[~COMPLETE]
+
+        if carried_data is not None:
+            last_day: dt.date = carried_data[SQLYahooData.as_at_date].iloc[0].date()
+            yield last_day, self.asked_columns(
+                self.clean_data(carried_data.copy()), columns
+            )
+
+    @classmethod
+    def load_many(
+        cls,
+        stocks: List[StockBase],
+        dates: List[dt.datetime],
+        cache: Optional[BarCache] = None,
+    ) -> Dict[Tuple[str, dt.date], pd.DataFrame]:
+        """
+        Reads every stock over every date in a single query and splits the result into the
+        per (ticker, day) frames that get_day would give. Days without data get an empty frame.
+        With a cache, only the days that aren't cached yet are queried.
+        """
+        raw_frames: Dict[Tuple[str, dt.date], pd.DataFrame] = cls._load_raw(
+            stocks, dates, cache
+        )
+        return {
+            key: cls.sort_day(cls.clean_data(raw_frame.copy()))
+            for key, raw_frame in raw_frames.items()
+        }
+
+    @classmethod
+    def load_store(
+        cls,
+        stocks: List[StockBase],
+        dates: List[dt.datetime],
+        cache: Optional[BarCache] = None,
+        dtype: type = np.float64,
+    ) -> BarStore:
+        """Same read as load_many, held as a columnar BarStore rather than a frame per day."""
+        raw_frames: Dict[Tuple[str, dt.date], pd.DataFrame] = cls._load_raw(
+            stocks, dates, cache
+        )
+        non_empty_frames: List[pd.DataFrame] = [
+            raw_frame for raw_frame in raw_frames.values() if not raw_frame.empty
+        ]
+        if not non_empty_frames:
+            return BarStore(dtype)
+        return BarStore.from_frame(pd.concat(non_empty_frames), dtype)
+
+    @classmethod
+    def _load_raw(
+        cls,
+        stocks: List[StockBase],
+        dates: List[dt.datetime],
+        cache: Optional[BarCache] = None,
+    ) -> Dict[Tuple[str, dt.date], pd.DataFrame]:
+        """The rows read from SQL (or the cache) for each (ticker, day), in ticker then day order."""
+        days: List[dt.date] = sorted({cls._as_date(date) for date in dates})
+        tickers: List[str] = [stock.ticker for stock in stocks]
+        keys: List[Tuple[str, dt.date]] = [
+            (ticker, day) for ticker in tickers for day in days
+        ]
+
+        raw_frames: Dict[Tuple[str, dt.date], pd.DataFrame] = {}
+        if cache is not None:
+            for ticker, day in keys:
+                cached_data: Optional[pd.DataFrame] = cache.read_day(ticker, day)
+                if cached_data is not None:
+                    raw_frames[(ticker, day)] = cached_data
+
+        missing_keys: List[Tuple[str, dt.date]] = [
+            key for key in keys if key not in raw_frames
+        ]
+        if missing_keys:
+            missing_tickers: List[str] = list(
+                dict.fromkeys(key[0] for key in missing_keys)
             )
-            date_filter: str = (
-                f"AND AsAtDateTime >= '{day_filter_string}' AND AsAtDateTime < '{day_filter_plus_one_string}'"
+            missing_days: List[dt.date] = sorted({key[1] for key in missing_keys})
+            data: pd.DataFrame = cls._many_data(missing_tickers, missing_days)
+
+            # Partitioning in memory, a ticker may have days that weren't missing for it
+            partitions: Dict[Tuple[str, dt.date], pd.DataFrame] = cls.partition_days(
+                data
+            )
+            for key in missing_keys:
+                raw_frames[key] = partitions.get(key, data.iloc[0:0])
+                if cache is not None:
+                    cache.write_day(*key, raw_frames[key])
+
+        return {key: raw_frames[key] for key in keys}
+
+    @staticmethod
+    def partition_days(data: pd.DataFrame) -> Dict[Tuple[str, dt.date], pd.DataFrame]:
+        """Splits data read from SQL into a frame per (security, day)."""
+        days: pd.Series = pd.to_datetime(data[SQLYahooData.as_at_date]).dt.date
+        return {
+            key: partition
+            for key, partition in data.groupby(
+                [data[SQLYahooData.security], days], sort=False
             )
-            query_base += date_filter
+        }
 
-        final_query: TextClause = text(query_base)
-        return final_query
+    @staticmethod
+    def sort_day(data: pd.DataFrame) -> pd.DataFrame:
+        # Ensuring that we are ascending
+        data.sort_values(by=SQLYahooData.as_at_date, ascending=True, inplace=True)
+        return data
+
+    @staticmethod
+    def _as_date(day: dt.date) -> dt.date:
+        return day.date() if isinstance(day, dt.datetime) else day
+
+    @classmethod
+    @ExecuteQuery()
+    def _many_data(cls, tickers: List[str], days: List[dt.date]) -> db.Select:
+        """Gets the data for all the stocks on only the given days."""
+        return BarQuery().for_securities(tickers).on_days(days).select()
+
+    def get_day(
+        self, day: Optional[dt.datetime], columns: Optional[List[str]] = None
+    ) -> pd.DataFrame:
+        """
+        The bars of the day, only reading that day and the columns asked for (plus the time)
+        from SQL. Without a day, the latest day with data.
+        """
+        if self.cache is not None and day is not None:
+            day_data: pd.DataFrame = self.load_many(
+                [self.stock_choice], [day], self.cache
+            )[(self.name, self._as_date(day))]
+            return self.asked_columns(day_data, columns)
 
-    def get_day(self, day: Optional[dt.datetime]) -> pd.DataFrame:
-        data: pd.DataFrame = self.data
         if day is None:
             # If none, take the latest date
-            day: dt.datetime = data[SQLYahooData.date].max()
-
-        data_filtered: pd.DataFrame = data.loc[
-            data[SQLYahooData.date] == day.date()
-        ].copy()
+            latest_times: pd.DataFrame = self._latest_time()
+            if latest_times.empty:
+                raise ValueError(f"No data for {self.name}.")
+            day: dt.datetime = pd.Timestamp(
+                latest_times[SQLYahooData.as_at_date].iloc[0]
+            ).to_pydatetime()
 
-        # Ensuring that we are ascending
-        data_filtered.sort_values(
-            by=SQLYahooData.as_at_date, ascending=True, inplace=True
+        day_start: dt.datetime = dt.datetime.combine(self._as_date(day), dt.time())
+        # Reading the prices the empty rows are found from, so the same rows are kept as load_many
+        data_filtered: pd.DataFrame = self.clean_data(
+            self._data(
+                day_start, day_start + dt.timedelta(days=1), self.read_columns(columns)
+            )
         )
-        return data_filtered
+        return self.sort_day(self.asked_columns(data_filtered, columns))
 
     def plot_day(
         self,
@@ -113,8 +306,18 @@ class Stock:
         column_choice: Optional[str] = None,
         SHOW_PLOT: bool = False,
     ) -> None:
+        # Only imported when plotting, matplotlib is slow to import
+        import matplotlib.pyplot as plt
 
-        data_filtered: pd.DataFrame = self.get_day(day_to_plot)
+        # Reading only the columns that get plotted
+        if column_choice is None:
+            plot_columns: List[str] = [
+                SQLYahooData.market_high,
+                SQLYahooData.market_low,
+            ]
+        else:
+            plot_columns: List[str] = [column_choice]
+        data_filtered: pd.DataFrame = self.get_day(day_to_plot, plot_columns)
 
         # Plotting
         datetimes: List[dt.datetime] = pd.to_datetime(
@@ -0,0 +1,111 @@
+import argparse
+import datetime as dt
+import os
+
+from typing import Dict, List, Optional
+
+from py_max.finance_data.config import logger, StockBase
+from py_max.finance_data.read_sql import BarCache
+from py_max.finance_data.upload_to_sql.data_capture import DataCapture, DedupMethod
+from py_max.finance_data.upload_to_sql.ingest_ledger import IngestLedger
+from py_max.py_utils import DBChoice
+
+# Where the ledger is kept unless --ledger is given, --ledger is required when it isn't set
+LEDGER_PATH_VARIABLE: str = "PY_MAX_LEDGER_PATH"
+
+
+def parse_day(day_string: str) -> dt.datetime:
+    return dt.datetime.strptime(day_string, r"%Y-%m-%d")
+
+
+def known_stocks() -> Dict[str, StockBase]:
+    return {stock.ticker: stock for stock in StockBase.__subclasses__()}
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser: argparse.ArgumentParser = argparse.ArgumentParser(
+        description="Captures the Yahoo minute bars of a date range into SQL, skipping the days the ledger has as complete."
+    )
+    parser.add_argument(
+        "--start", type=parse_day, help="First day to capture, YYYY-MM-DD."
+    )
+    parser.add_argument(
+        "--end",
+        type=parse_day,
+        help="Last day to capture, YYYY-MM-DD. Defaults to today.",
+    )
+    parser.add_argument(
+        "--tickers",
+        nargs="+",
+        choices=sorted(known_stocks()),
+        help="Tickers to capture, all of them by default.",
+    )
+    ledger_path: Optional[str] = os.environ.get(LEDGER_PATH_VARIABLE)
+    parser.add_argument(
+        "--ledger",
+        default=ledger_path,
+        required=ledger_path is None,
+        help=f"Ingest ledger JSON file, {LEDGER_PATH_VARIABLE} by default.",
+    )
+    parser.add_argument(
+        "--cache",
+        help="Bar cache directory, the cached days that get written to are invalidated.",
+    )
+    parser.add_argument(
+        "--database",
+        choices=[choice.name for choice in DBChoice],
+        default=DBChoice.LOCAL.name,
+    )
+    parser.add_argument("--workers", type=int, default=1)
+    parser.add_argument("--range-days", type=int, default=1)
+    parser.add_argument(
+        "--dedup",
+        choices=[method.name for method in DedupMethod],
+        default=DedupMethod.INDEX.name,
+    )
+    parser.add_argument(
+        "--staging", action="store_true", help="Insert through the staging table."
+    )
+    parser.add_argument(
+        "--stream", action="store_true", help="Write each ticker as it is gathered."
+    )
+    parser.add_argument(
+        "--dry-run",
+        action="store_true",
+        help="List the days that would be requested without capturing them.",
+    )
+    return parser
+
+
+def main(arguments: Optional[List[str]] = None) -> None:
+    options: argparse.Namespace = build_parser().parse_args(arguments)
+
+    stocks: Dict[str, StockBase] = known_stocks()
+    valid_stocks: Optional[List[StockBase]] = (
+        [stocks[ticker] for ticker in options.tickers] if options.tickers else None
+    )
+
+    capture: DataCapture = DataCapture(
+        valid_stocks=valid_stocks,
+        max_workers=options.workers,
+        range_days=options.range_days,
+        db_choice=DBChoice[options.database],
+        STAGING=options.staging,
+        dedup=DedupMethod[options.dedup],
+        start_date=options.start,
+        end_date=options.end,
+        ledger=IngestLedger(options.ledger),
+        cache=BarCache(options.cache) if options.cache else None,
+    )
+
+    if options.dry_run:
+        for stock in capture.valid_stocks:
+            days: List[dt.datetime] = list(capture.date_generator(stock.ticker))
+            logger.LogInfo(f"{stock.ticker}: {len(days)} days to capture.")
+        return
+
+    capture.DataCreation(write=True, STREAM=options.stream)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+import numpy as np
+import datetime as dt
+import json
+
+from typing import Any, Dict, Optional, Sequence
+
+try:
+    import orjson
+except ImportError:  # Optional, the standard library parser is used otherwise
+    orjson = None
+
+# Yahoo's charset, used when the body isn't valid UTF-8
+FALLBACK_ENCODING: str = "ISO-8859-1"
+
+# Every time zone's offset changes on a multiple of this many seconds in UTC
+OFFSET_BLOCK_SECONDS: int = 900
+
+
+def load_json(content: bytes) -> Dict[str, Any]:
+    """Parses the response body straight from bytes, with orjson when it is installed."""
+    try:
+        if orjson is not None:
+            return orjson.loads(content)
+        return json.loads(content)
+    except ValueError:
+        return json.loads(content.decode(FALLBACK_ENCODING))
+
+
+def float_column(values: Sequence[Optional[float]]) -> np.ndarray:
+    """Quote list to a float64 array, with the missing (None) minutes as nan."""
+    return np.array(values, dtype=np.float64)
+
+
+def epoch_to_datetime64(
+    timestamps: Sequence[int], gmt_offset: Optional[int] = None
+) -> np.ndarray:
+    """
+    Epoch seconds to naive datetime64[s]. With a gmt_offset (seconds east of UTC) the times are in
+    the exchange's time, otherwise in this machine's local time as datetime.fromtimestamp gives.
+    """
+    epochs: np.ndarray = np.asarray(timestamps, dtype=np.int64)
+
+    if gmt_offset is not None:
+        offsets: np.ndarray = np.int64(gmt_offset)
+    else:
+        # Adelaide's offset changes on the half hour in UTC, so it's looked up per 15 minute block
+        blocks, block_positions = np.unique(
+            epochs // OFFSET_BLOCK_SECONDS, return_inverse=True
+        )
+        block_offsets: np.ndarray = np.array(
+            [local_offset(int(block) * OFFSET_BLOCK_SECONDS) for block in blocks],
+            dtype=np.int64,
+        )
+        offsets: np.ndarray = block_offsets[block_positions]
+
+    return (epochs + offsets).astype("datetime64[s]")
+
+
+def local_offset(epoch: int) -> int:
+    """Seconds this machine's local time is ahead of UTC at the epoch."""
+    local_time: dt.datetime = dt.datetime.fromtimestamp(epoch)
+    utc_time: dt.datetime = dt.datetime.fromtimestamp(epoch, dt.timezone.utc)
+    return round((local_time - utc_time.replace(tzinfo=None)).total_seconds())
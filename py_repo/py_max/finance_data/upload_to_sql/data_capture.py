@@ -1,12 +1,14 @@
 from py_max.finance_data.upload_to_sql.stock_stripper import StockGrabber
 import pandas as pd
+import numpy as np
 import datetime as dt
-import holidays
 import sqlalchemy as db
+import os
+import uuid
 
-from typing import List, Optional, Any, Dict, Iterator
-from sqlalchemy.types import Integer, String, DateTime, Float
-
+from concurrent.futures import ThreadPoolExecutor
+from enum import Enum
+from typing import List, Optional, Dict, Iterator, Tuple
 
 from py_max.finance_data.config import (
     logger,
@@ -19,11 +21,59 @@ from py_max.finance_data.config import (
     Nvidia,
     StockBase,
 )
-from py_max.py_utils import SQLYahooData, DatabaseConnector, DBChoice, ExecuteQuery
+from py_max.finance_data.read_sql import BarCache
+from py_max.finance_data.upload_to_sql.yahoo_session import YahooSession
+from py_max.finance_data.upload_to_sql.ingest_ledger import (
+    IngestLedger,
+    covers_session,
+    session_window,
+)
+from py_max.py_utils import (
+    timed,
+    add_count,
+    trading_days,
+    SQLYahooData,
+    YAHOO_DATA_SCHEMA,
+    yahoo_data_table,
+    BarQuery,
+    DatabaseConnector,
+    DBChoice,
+    ExecuteQuery,
+    StreamQuery,
+)
+
+
+class DedupMethod(Enum):
+    # Pulls every stored row since the earliest new row and diffs the indices
+    INDEX: str = "Index"
+    # Keeps the rows after the latest stored time of each security
+    WATERMARK: str = "Watermark"
+    # Anti-joins against the stored keys within the new rows' time span only
+    KEYS: str = "Keys"
+    # Leaves it to the database, through the staging table insert
+    SERVER: str = "Server"
 
 
 class DataCapture:
-    def __init__(self, valid_stocks: Optional[List[StockBase]] = None):
+
+    # Yahoo only serves 8 days of 1 minute bars per request
+    MAX_RANGE_DAYS: int = 7
+
+    def __init__(
+        self,
+        valid_stocks: Optional[List[StockBase]] = None,
+        cache: Optional[BarCache] = None,
+        max_workers: int = 1,
+        session: Optional[YahooSession] = None,
+        range_days: int = 1,
+        db_choice: DBChoice = DBChoice.LOCAL,
+        chunksize: Optional[int] = 10_000,
+        STAGING: bool = False,
+        dedup: DedupMethod = DedupMethod.INDEX,
+        start_date: Optional[dt.datetime] = None,
+        end_date: Optional[dt.datetime] = None,
+        ledger: Optional[IngestLedger] = None,
+    ):
         if valid_stocks is None:
             # Have default options for the stocks to strip
             self.valid_stocks: List[StockBase] = [
@@ -37,133 +87,469 @@ class DataCapture:
             ]
         else:
             self.valid_stocks: List[str] = valid_stocks
-        self.end_date_dt: dt.datetime = dt.datetime.today().replace(
-            hour=0, minute=0, microsecond=0, second=0
-        )
-        self.start_date_dt: dt.datetime = self.end_date_dt - dt.timedelta(days=30)
-
-    def date_generator(self) -> Iterator[dt.datetime]:
-        us_holidays: Any = holidays.US()
-        time_delta: dt.timedelta = self.end_date_dt - self.start_date_dt
-        day_iterable_dt: dt.datetime = self.start_date_dt
-        for _ in range(time_delta.days):
-            day_iterable_dt += dt.timedelta(days=1)
-            if (day_iterable_dt in us_holidays) or (
-                day_iterable_dt.weekday() in [5, 6]
-            ):
+        # Captures the first to the last day given, inclusive, otherwise the last 30 days to today
+        if end_date is None:
+            end_date = dt.datetime.today()
+        self.end_date_dt: dt.datetime = dt.datetime.combine(end_date, dt.time())
+        if start_date is None:
+            self.start_date_dt: dt.datetime = self.end_date_dt - dt.timedelta(days=30)
+        else:
+            # The generator starts the day after start_date_dt
+            self.start_date_dt: dt.datetime = dt.datetime.combine(
+                start_date, dt.time()
+            ) - dt.timedelta(days=1)
+
+        # Cached days that we write to are invalidated so they are re-read from SQL
+        self.cache: Optional[BarCache] = cache
+
+        # With more than one worker the days are requested concurrently over a shared session
+        self.max_workers: int = max_workers
+        self.session: Optional[YahooSession] = session
+
+        # Calendar days covered by each request, days are requested one at a time when 1
+        self.range_days: int = min(range_days, self.MAX_RANGE_DAYS)
+
+        # Rows are inserted in executemany batches of chunksize, through a staging table when STAGING
+        self.db_choice: DBChoice = db_choice
+        self.chunksize: Optional[int] = chunksize
+        self.STAGING: bool = STAGING
+
+        # How rows already in SQL are filtered out before writing
+        self.dedup: DedupMethod = dedup
+
+        # Days the ledger has as complete are skipped, and written days are recorded in it
+        self.ledger: Optional[IngestLedger] = ledger
+
+    def date_generator(self, ticker: Optional[str] = None) -> Iterator[dt.datetime]:
+        """The trading days in range, leaving out the ones the ledger has complete for the ticker."""
+        # Starting the day after start_date_dt, up to and including end_date_dt
+        for day_iterable_dt in trading_days(
+            self.start_date_dt + dt.timedelta(days=1), self.end_date_dt
+        ):
+            if self.is_captured(ticker, day_iterable_dt):
                 pass
             else:
                 yield day_iterable_dt
 
+    def is_captured(self, ticker: Optional[str], day_dt: dt.datetime) -> bool:
+        if self.ledger is None or ticker is None:
+            return False
+        return self.ledger.is_complete(ticker, day_dt)
+
+    def grab_day(
+        self,
+        ticker: str,
+        day_dt: dt.datetime,
+        session: Optional[YahooSession] = None,
+    ) -> pd.DataFrame:
+        """Requests the 09:00 - 21:00 window of the day for the ticker."""
+        start_time, end_time = session_window(day_dt)
+        stock_df: pd.DataFrame = StockGrabber(
+            ticker, start_time, end_time, session or self.session
+        ).GetData()
+        return stock_df
+
+    def day_windows(self, ticker: Optional[str] = None) -> List[List[dt.datetime]]:
+        """Groups the trading days into the windows requested together, range_days at most."""
+        windows: List[List[dt.datetime]] = []
+        for day_dt in self.date_generator(ticker):
+            if windows and (day_dt - windows[-1][0]).days < self.range_days:
+                windows[-1].append(day_dt)
+            else:
+                windows.append([day_dt])
+        return windows
+
+    def grab_range(
+        self,
+        ticker: str,
+        days: List[dt.datetime],
+        session: Optional[YahooSession] = None,
+    ) -> List[pd.DataFrame]:
+        """
+        Requests all of the days in one go and splits the response back into each day's 09:00 - 21:00
+        window. Any day the response doesn't cover (the source truncated it, or it failed) is
+        requested on its own instead, so the result is the same as grabbing day by day.
+        """
+        if len(days) == 1:
+            return [self.grab_day(ticker, days[0], session)]
+
+        start_time: dt.datetime = session_window(days[0])[0]
+        end_time: dt.datetime = session_window(days[-1])[1]
+        range_df: pd.DataFrame = StockGrabber(
+            ticker, start_time, end_time, session or self.session
+        ).GetData()
+
+        # A failed request comes back as a single nan row without a security
+        range_df = range_df.dropna(subset=[SQLYahooData.security])
+        range_times: pd.Series = pd.to_datetime(range_df[SQLYahooData.as_at_date])
+
+        day_frames: List[pd.DataFrame] = []
+        for day_dt in days:
+            if covers_session(range_times, day_dt):
+                day_start, day_end = session_window(day_dt)
+                day_frames.append(
+                    range_df.loc[(range_times >= day_start) & (range_times < day_end)]
+                )
+            else:
+                logger.LogInfo(
+                    f"{ticker} {day_dt:%Y-%m-%d} not covered by the range request, requesting the day."
+                )
+                day_frames.append(self.grab_day(ticker, day_dt, session))
+        return day_frames
+
     def stock_call(self, ticker: str) -> pd.DataFrame:
-        stock_timeseries_df: pd.DataFrame = pd.DataFrame()
-        for day_dt in self.date_generator():
-            start_time: dt.datetime = day_dt + dt.timedelta(hours=9)
-            end_time: dt.datetime = day_dt + dt.timedelta(hours=21)
-            stock_df: pd.DataFrame = StockGrabber(
-                ticker, start_time, end_time
-            ).GetData()
-            stock_timeseries_df: pd.DataFrame = pd.concat(
-                [stock_timeseries_df, stock_df]
-            )
+        day_frames: List[pd.DataFrame] = []
+        for days in self.day_windows(ticker):
+            day_frames.extend(self.grab_range(ticker, days))
+
+        # Concatenating once, rather than copying everything so far for every day
+        stock_timeseries_df: pd.DataFrame = (
+            pd.concat(day_frames) if day_frames else pd.DataFrame()
+        )
         return stock_timeseries_df
 
+    def pool_session(self) -> YahooSession:
+        """The session given to share, or a new one sized to the pool."""
+        return self.session or YahooSession(self.max_workers)
+
+    def concurrent_stock_calls(
+        self, tickers: List[str], session: Optional[YahooSession] = None
+    ) -> Dict[str, pd.DataFrame]:
+        """
+        Requests every (ticker, day window) across a thread pool sharing one keep-alive session.
+        The days are put back in order, so each ticker's data is the same as stock_call gives.
+        A session passed in is left open for the caller to reuse.
+        """
+        jobs: List[Tuple[str, List[dt.datetime]]] = [
+            (ticker, days) for ticker in tickers for days in self.day_windows(ticker)
+        ]
+
+        # Sized to the pool unless a session was given to share
+        pool_session: YahooSession = session or self.pool_session()
+        try:
+            with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+                window_frames: List[List[pd.DataFrame]] = list(
+                    executor.map(lambda job: self.grab_range(*job, pool_session), jobs)
+                )
+        finally:
+            if pool_session is not session and pool_session is not self.session:
+                pool_session.close()
+
+        ticker_frames: Dict[str, List[pd.DataFrame]] = {
+            ticker: [] for ticker in tickers
+        }
+        for (ticker, _), day_frames in zip(jobs, window_frames):
+            ticker_frames[ticker].extend(day_frames)
+
+        return {
+            ticker: pd.concat(frames) if frames else pd.DataFrame()
+            for ticker, frames in ticker_frames.items()
+        }
+
+    @timed("sql.insert")
     def insert_to_sql(self, dataframe: pd.DataFrame) -> None:
-        dataframe_schema: Dict[str, Any] = {
-            SQLYahooData.as_at_date: DateTime,
-            SQLYahooData.security: String(255),
-            SQLYahooData.currency: String(255),
-            SQLYahooData.market_low: Float,
-            SQLYahooData.market_high: Float,
-            SQLYahooData.market_open: Float,
-            SQLYahooData.market_close: Float,
-            SQLYahooData.market_volume: Float,
-            SQLYahooData.instrument_type: String(255),
-            SQLYahooData.exchange_name: String(255),
-            SQLYahooData.time_zone: String(255),
-            SQLYahooData.gmt_off_set: Integer,
+        """
+        Appends the rows in executemany batches of chunksize. With STAGING, the rows are loaded
+        into a staging table and moved across in one set-based insert of the rows not already there.
+        """
+        if self.STAGING or self.dedup == DedupMethod.SERVER:
+            inserted_rows: int = self.insert_through_staging(dataframe)
+        else:
+            with DatabaseConnector(self.db_choice) as connection:
+                dataframe.to_sql(
+                    SQLYahooData.table_name,
+                    connection,
+                    schema=SQLYahooData.schema,
+                    index=False,
+                    if_exists="append",
+                    dtype=YAHOO_DATA_SCHEMA,
+                    chunksize=self.chunksize,
+                )
+            inserted_rows: int = len(dataframe)
+
+        add_count("sql.inserted_rows", inserted_rows)
+        logger.LogInfo(f"Successfully written {inserted_rows} rows to database.")
+
+        if self.cache is not None:
+            self.invalidate_cache(dataframe)
+
+    def insert_through_staging(self, dataframe: pd.DataFrame) -> int:
+        """
+        INSERT ... SELECT ... WHERE NOT EXISTS from a staging table, all in one transaction.
+        The target table must already exist. Returns the number of rows that were new.
+        """
+        # Each run has a staging table of its own, so concurrent runs don't clobber each other
+        staging_table_name: str = (
+            f"{SQLYahooData.staging_table_name}_{os.getpid()}_{uuid.uuid4().hex[:8]}"
+        )
+        metadata: db.MetaData = db.MetaData()
+        target: db.Table = yahoo_data_table(SQLYahooData.table_name, metadata)
+        staging: db.Table = yahoo_data_table(staging_table_name, metadata)
+
+        # Our distinct keys are the datetime, security and currency
+        already_exists: db.Exists = db.exists().where(
+            target.c[SQLYahooData.as_at_date] == staging.c[SQLYahooData.as_at_date],
+            target.c[SQLYahooData.security] == staging.c[SQLYahooData.security],
+            target.c[SQLYahooData.currency] == staging.c[SQLYahooData.currency],
+        )
+        column_names: List[str] = list(YAHOO_DATA_SCHEMA)
+        move_new_rows: db.Insert = target.insert().from_select(
+            column_names,
+            db.select(*[staging.c[name] for name in column_names]).where(
+                ~already_exists
+            ),
+        )
+
+        with DatabaseConnector(self.db_choice) as connection:
+            with connection.begin():
+                staging.create(connection)
+
+                dataframe[column_names].to_sql(
+                    staging_table_name,
+                    connection,
+                    schema=SQLYahooData.schema,
+                    index=False,
+                    if_exists="append",
+                    dtype=YAHOO_DATA_SCHEMA,
+                    chunksize=self.chunksize,
+                )
+                inserted_rows: int = connection.execute(move_new_rows).rowcount
+                staging.drop(connection)
+
+        return inserted_rows
+
+    def invalidate_cache(self, dataframe: pd.DataFrame) -> None:
+        """Drops the cached (security, day) partitions that the dataframe has written to."""
+        written_days: pd.DataFrame = pd.DataFrame(
+            {
+                SQLYahooData.security: dataframe[SQLYahooData.security],
+                SQLYahooData.date: pd.to_datetime(
+                    dataframe[SQLYahooData.as_at_date]
+                ).dt.date,
+            }
+        ).drop_duplicates()
+
+        for security, days in written_days.groupby(SQLYahooData.security)[
+            SQLYahooData.date
+        ]:
+            self.cache.invalidate(security, days.to_list())
+
+    def DataCreation(self, write: bool, STREAM: bool = False) -> None:
+        """
+        Gathers the data for every stock and writes anything new to SQL. With STREAM, each stock is
+        written as soon as it is gathered, so only one stock's data is held at a time.
+        """
+        stock_datasets: List[pd.DataFrame] = []
+        requested_days: Dict[str, List[dt.datetime]] = {
+            stock.ticker: list(self.date_generator(stock.ticker))
+            for stock in self.valid_stocks
         }
+        CONCURRENT: bool = self.max_workers > 1
 
-        with DatabaseConnector(DBChoice.LOCAL) as connection:
-            dataframe.to_sql(
-                SQLYahooData.table_name,
-                connection,
-                schema=SQLYahooData.schema,
-                index=False,
-                if_exists="append",
-                dtype=dataframe_schema,
+        # Requesting every ticker and day up front when running concurrently, unless streaming
+        if CONCURRENT and not STREAM:
+            concurrent_datasets: Dict[str, pd.DataFrame] = self.concurrent_stock_calls(
+                list(requested_days)
             )
 
-        logger.LogInfo("Successfully written to database.")
-
-    def DataCreation(self, write: bool) -> None:
-        all_stock_dataset_df: pd.DataFrame = pd.DataFrame()
-        for stock in self.valid_stocks:
-            stock_dataset_df: pd.DataFrame = self.stock_call(stock.ticker)
-            logger.LogInfo(f"{stock.ticker} information successfully gathered.")
-            all_stock_dataset_df = pd.concat([all_stock_dataset_df, stock_dataset_df])
-
-        if write:
-            unique_stocks: List[str] = all_stock_dataset_df[
-                SQLYahooData.security
-            ].unique()
-            minimum_date: dt.datetime = all_stock_dataset_df[
-                SQLYahooData.as_at_date
-            ].min()
-            existing_data: pd.DataFrame = self.get_sql_data(unique_stocks, minimum_date)
-
-            # Taking the existing data and dropping anything in the new data that isn't inscope
-            # our distinct keys are the datetime, security and currency
-            master_keys: List[str] = [
-                SQLYahooData.as_at_date,
-                SQLYahooData.security,
-                SQLYahooData.currency,
-            ]
-            existing_data.set_index(master_keys, inplace=True)
-            all_stock_dataset_df.set_index(master_keys, inplace=True)
+        # A stream requests a stock at a time, all over the one keep-alive session
+        if CONCURRENT and STREAM:
+            stream_session: Optional[YahooSession] = self.pool_session()
+        else:
+            stream_session: Optional[YahooSession] = None
 
-            # Taking the difference on the indices
-            index_difference: pd.MultiIndex = all_stock_dataset_df.index.difference(
-                existing_data.index
-            )
-            all_stock_dataset_df = all_stock_dataset_df[
-                all_stock_dataset_df.index.isin(index_difference)
-            ].copy()
-            if len(index_difference) != len(all_stock_dataset_df):
-                raise IndexError("Missing some indices somewhere. Debug.")
+        try:
+            for stock in self.valid_stocks:
+                if CONCURRENT and STREAM:
+                    stock_dataset_df: pd.DataFrame = self.concurrent_stock_calls(
+                        [stock.ticker], stream_session
+                    )[stock.ticker]
+                elif CONCURRENT:
+                    stock_dataset_df: pd.DataFrame = concurrent_datasets[stock.ticker]
+                else:
+                    stock_dataset_df: pd.DataFrame = self.stock_call(stock.ticker)
+                logger.LogInfo(f"{stock.ticker} information successfully gathered.")
 
-            # Final removal of null values and resetting of index
-            all_stock_dataset_df.reset_index(inplace=True)
-            all_stock_dataset_df.dropna(subset=master_keys, how="any", inplace=True)
+                if write and STREAM:
+                    self.write_new_data(stock_dataset_df)
+                    self.record_capture(
+                        {stock.ticker: requested_days[stock.ticker]}, stock_dataset_df
+                    )
+                else:
+                    stock_datasets.append(stock_dataset_df)
+        finally:
+            if stream_session is not None and stream_session is not self.session:
+                stream_session.close()
 
-            self.insert_to_sql(all_stock_dataset_df)
+        if write and not STREAM:
+            # Materialising once rather than growing the frame a stock at a time
+            all_stock_dataset_df: pd.DataFrame = pd.concat(stock_datasets)
+            self.write_new_data(all_stock_dataset_df)
+            self.record_capture(requested_days, all_stock_dataset_df)
         else:
             pass
 
+    def record_capture(
+        self, requested_days: Dict[str, List[dt.datetime]], data: pd.DataFrame
+    ) -> None:
+        """Marks the requested days in the ledger once their data has been written."""
+        if self.ledger is None:
+            return
+
+        for ticker, days in requested_days.items():
+            if data.empty:
+                ticker_data: pd.DataFrame = data
+            else:
+                ticker_data: pd.DataFrame = data.loc[
+                    data[SQLYahooData.security] == ticker
+                ]
+            self.ledger.record_capture(ticker, days, ticker_data)
+        self.ledger.save()
+
+    def write_new_data(self, all_stock_dataset_df: pd.DataFrame) -> None:
+        """Inserts the rows of the data that aren't in SQL already."""
+        # Our distinct keys are the datetime, security and currency
+        master_keys: List[str] = [
+            SQLYahooData.as_at_date,
+            SQLYahooData.security,
+            SQLYahooData.currency,
+        ]
+        if not all_stock_dataset_df.empty:
+            all_stock_dataset_df = all_stock_dataset_df.dropna(
+                subset=master_keys, how="any"
+            )
+        if all_stock_dataset_df.empty:
+            logger.LogInfo("No new data to write to database.")
+            return
+
+        match self.dedup:
+            case DedupMethod.INDEX:
+                new_data: pd.DataFrame = self.index_difference(
+                    all_stock_dataset_df, master_keys
+                )
+            case DedupMethod.WATERMARK:
+                new_data: pd.DataFrame = self.after_watermarks(all_stock_dataset_df)
+            case DedupMethod.KEYS:
+                new_data: pd.DataFrame = self.key_anti_join(
+                    all_stock_dataset_df, master_keys
+                )
+            case DedupMethod.SERVER:
+                new_data: pd.DataFrame = all_stock_dataset_df
+
+        self.insert_to_sql(new_data)
+
+    def index_difference(
+        self, all_stock_dataset_df: pd.DataFrame, master_keys: List[str]
+    ) -> pd.DataFrame:
+        """
+        The rows whose keys aren't in SQL, comparing against every stored row since the earliest.
+        The stored keys are streamed a chunk at a time, so the history can be any length.
+        """
+        unique_stocks: List[str] = all_stock_dataset_df[SQLYahooData.security].unique()
+        minimum_date: dt.datetime = all_stock_dataset_df[SQLYahooData.as_at_date].min()
+
+        new_keys: pd.MultiIndex = self.key_index(all_stock_dataset_df, master_keys)
+        if new_keys.has_duplicates:
+            raise IndexError("Missing some indices somewhere. Debug.")
+
+        # Taking the difference on the keys, one chunk of the existing data at a time
+        IS_NEW: np.ndarray = np.ones(len(new_keys), dtype=bool)
+        for existing_keys in self.stream_sql_keys(unique_stocks, minimum_date):
+            IS_NEW &= ~new_keys.isin(self.key_index(existing_keys, master_keys))
+
+        return all_stock_dataset_df.loc[IS_NEW].reset_index(drop=True)
+
+    @staticmethod
+    def key_index(data: pd.DataFrame, master_keys: List[str]) -> pd.MultiIndex:
+        """The keys of the rows, with the times at one resolution so stored and new keys compare."""
+        keys: pd.DataFrame = data[master_keys].copy()
+        keys[SQLYahooData.as_at_date] = pd.to_datetime(
+            keys[SQLYahooData.as_at_date]
+        ).astype("datetime64[ns]")
+        return pd.MultiIndex.from_frame(keys)
+
+    def after_watermarks(self, all_stock_dataset_df: pd.DataFrame) -> pd.DataFrame:
+        """
+        The rows after the latest stored time of their security. Only a single aggregate row per
+        security is read, but gaps before the watermark are never filled in.
+        """
+        unique_stocks: List[str] = all_stock_dataset_df[SQLYahooData.security].unique()
+        watermarks: pd.Series = self.get_sql_watermarks(unique_stocks).set_index(
+            SQLYahooData.security
+        )[SQLYahooData.as_at_date]
+
+        # Converted after mapping, a security with nothing stored has no watermark (NaT)
+        row_watermarks: pd.Series = pd.to_datetime(
+            all_stock_dataset_df[SQLYahooData.security].map(watermarks)
+        )
+        row_times: pd.Series = pd.to_datetime(
+            all_stock_dataset_df[SQLYahooData.as_at_date]
+        )
+        is_new: pd.Series = row_watermarks.isna() | (row_times > row_watermarks)
+        return all_stock_dataset_df.loc[is_new]
+
+    def key_anti_join(
+        self, all_stock_dataset_df: pd.DataFrame, master_keys: List[str]
+    ) -> pd.DataFrame:
+        """The rows whose keys aren't in SQL, only reading the stored keys within the new rows' span."""
+        unique_stocks: List[str] = all_stock_dataset_df[SQLYahooData.security].unique()
+        row_times: pd.Series = pd.to_datetime(
+            all_stock_dataset_df[SQLYahooData.as_at_date]
+        )
+        existing_keys: pd.DataFrame = self.get_sql_keys(
+            unique_stocks, row_times.min(), row_times.max()
+        )
+        existing_keys[SQLYahooData.as_at_date] = pd.to_datetime(
+            existing_keys[SQLYahooData.as_at_date]
+        )
+
+        # Left anti-join on the keys
+        joined: pd.DataFrame = all_stock_dataset_df.assign(
+            **{SQLYahooData.as_at_date: row_times}
+        ).merge(
+            existing_keys.drop_duplicates(),
+            on=master_keys,
+            how="left",
+            indicator=True,
+        )
+        return all_stock_dataset_df.loc[(joined["_merge"] == "left_only").to_numpy()]
+
     @ExecuteQuery()
-    def get_sql_data(
+    def get_sql_watermarks(self, inscope_stocks: List[str]) -> db.Select:
+        """The latest stored time of each security."""
+        return BarQuery().for_securities(inscope_stocks).latest_times()
+
+    @ExecuteQuery()
+    def get_sql_keys(
+        self,
+        inscope_stocks: List[str],
+        minimum_date: dt.datetime,
+        maximum_date: dt.datetime,
+    ) -> db.Select:
+        """The stored keys of the securities between the two times, inclusive."""
+        # The end of between is exclusive, a second past the last time takes it in. A stored key
+        # in that second is read but matches none of the new rows.
+        return (
+            BarQuery([SQLYahooData.security, SQLYahooData.currency])
+            .for_securities(inscope_stocks)
+            .between(
+                minimum_date.to_pydatetime(),
+                maximum_date.to_pydatetime() + dt.timedelta(seconds=1),
+            )
+            .select()
+        )
+
+    @StreamQuery()
+    def stream_sql_keys(
         self, inscope_stocks: List[str], minimum_date: dt.datetime
-    ) -> db.TextClause:
-        min_date_string: str = dt.datetime.strftime(minimum_date, r"%Y-%m-%d")
-        security_string: str = ",".join([f"'{isin}'" for isin in inscope_stocks])
-        query: db.TextClause = db.text(
-            f"""
-            SELECT [AsAtDateTime]
-                ,[Security]
-                ,[Currency]
-                ,[MarketLow]
-                ,[MarketHigh]
-                ,[MarketOpen]
-                ,[MarketClose]
-                ,[MarketVolume]
-                ,[InstrumentType]
-                ,[ExchangeName]
-                ,[TimeZone]
-                ,[GmtOffSet]
-            FROM [max_dev].[stk].[yahooData]
-            WHERE Security in ({security_string}) AND AsAtDateTime >= '{min_date_string}'"""
+    ) -> db.Select:
+        """The stored keys of the securities from the day of the minimum date onwards, in chunks."""
+        return (
+            BarQuery([SQLYahooData.security, SQLYahooData.currency])
+            .for_securities(inscope_stocks)
+            .between(pd.Timestamp(minimum_date).normalize().to_pydatetime())
+            .select()
         )
-        return query
 
 
 if __name__ == "__main__":
@@ -0,0 +1,106 @@
+import pandas as pd
+import datetime as dt
+import json
+import os
+
+from pathlib import Path
+from typing import Dict, Iterable, Optional, Tuple
+
+from py_max.finance_data.config import logger
+from py_max.py_utils import SQLYahooData
+
+# The window of each day that is captured, from the day's midnight
+SESSION_START: dt.timedelta = dt.timedelta(hours=9)
+SESSION_END: dt.timedelta = dt.timedelta(hours=21)
+
+# Bars are sparse at the edges of pre and post market, so the bars cover the window when the first
+# and last of them are within this of its ends
+COVERAGE_TOLERANCE: dt.timedelta = dt.timedelta(minutes=30)
+
+
+def session_window(day_dt: dt.date) -> Tuple[dt.datetime, dt.datetime]:
+    """The [start, end) window of the day that is requested."""
+    midnight: dt.datetime = dt.datetime.combine(day_dt, dt.time())
+    return midnight + SESSION_START, midnight + SESSION_END
+
+
+def covers_session(times: pd.Series, day_dt: dt.date) -> bool:
+    """Whether the bar times run from the start to the end of the day's window."""
+    start_time, end_time = session_window(day_dt)
+    in_window: pd.Series = times[(times >= start_time) & (times < end_time)]
+    if in_window.empty:
+        return False
+    return (in_window.min() - start_time <= COVERAGE_TOLERANCE) and (
+        end_time - in_window.max() <= COVERAGE_TOLERANCE
+    )
+
+
+class LedgerStatus:
+    # Captured after the day had finished, never needs requesting again
+    complete: str = "Complete"
+    # Captured while the day was still trading, or cut short of the session window
+    partial: str = "Partial"
+    # Only the nan row came back, worth requesting again
+    empty: str = "Empty"
+
+
+class IngestLedger:
+    """
+    Persisted record of the (ticker, trading day) pairs that have been captured to SQL, stored as
+    JSON of {ticker: {day: status}}. Only complete days are skipped by the capture.
+    """
+
+    def __init__(self, path: str) -> None:
+        self.path: Path = Path(path)
+        self.entries: Dict[str, Dict[str, str]] = {}
+        if self.path.exists():
+            with open(self.path) as file:
+                self.entries = json.load(file)
+
+    def __repr__(self) -> str:
+        return f"Ingest ledger at {self.path}"
+
+    def status(self, ticker: str, day: dt.date) -> Optional[str]:
+        return self.entries.get(ticker, {}).get(f"{day:%Y-%m-%d}")
+
+    def is_complete(self, ticker: str, day: dt.date) -> bool:
+        return self.status(ticker, day) == LedgerStatus.complete
+
+    def record(self, ticker: str, day: dt.date, status: str) -> None:
+        self.entries.setdefault(ticker, {})[f"{day:%Y-%m-%d}"] = status
+
+    def record_capture(
+        self, ticker: str, days: Iterable[dt.datetime], data: pd.DataFrame
+    ) -> None:
+        """
+        Records the status of each requested day from the data captured for the ticker. A day is
+        only complete once it has finished and its bars cover the session window.
+        """
+        captured_times: pd.Series = pd.Series(dtype="datetime64[ns]")
+        if not data.empty:
+            captured: pd.DataFrame = data.dropna(subset=[SQLYahooData.security])
+            captured_times = pd.to_datetime(captured[SQLYahooData.as_at_date])
+        captured_days: set = set(captured_times.dt.date)
+
+        today: dt.date = dt.date.today()
+        for day_dt in days:
+            day: dt.date = day_dt.date() if isinstance(day_dt, dt.datetime) else day_dt
+            if day not in captured_days:
+                status: str = LedgerStatus.empty
+            elif day < today and covers_session(captured_times, day):
+                status: str = LedgerStatus.complete
+            else:
+                status: str = LedgerStatus.partial
+            self.record(ticker, day, status)
+
+    def save(self) -> None:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+
+        # Writing to a temporary file first so an interrupted run never loses the ledger
+        temporary_path: Path = self.path.with_suffix(f".{os.getpid()}.tmp")
+        with open(temporary_path, "w") as file:
+            json.dump(self.entries, file, indent=1, sort_keys=True)
+        os.replace(temporary_path, self.path)
+
+        recorded: int = sum(len(days) for days in self.entries.values())
+        logger.LogInfo(f"Saved {recorded} ledger entries to {self.path}.")
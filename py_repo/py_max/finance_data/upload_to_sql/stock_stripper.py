@@ -1,12 +1,18 @@
 import requests
 import pandas as pd
 import numpy as np
-import json
 import datetime as dt
-from typing import List, Tuple, Dict, Any, Union, Set
+from typing import List, Tuple, Dict, Any, Set, Optional
 from py_max.finance_data.config import logger
 from py_max.finance_data.static import WebPageStatics
+from py_max.finance_data.upload_to_sql.yahoo_session import YahooSession
+from py_max.finance_data.upload_to_sql.chart_parser import (
+    load_json,
+    float_column,
+    epoch_to_datetime64,
+)
 from py_max.py_utils.sql import SQLYahooData
+from py_max.py_utils.instrumentation import timer, timed, add_count
 
 
 class StockGrabber:
@@ -14,8 +20,16 @@ class StockGrabber:
     Class object for reading stock market data from Yahoo finance
     """
 
+    # Overridable so the grabber can be pointed at a local stub server
+    base_url: str = "https://query1.finance.yahoo.com"
+
     def __init__(
-        self, ticker: str, from_date_dt: dt.datetime, to_date_dt: dt.datetime
+        self,
+        ticker: str,
+        from_date_dt: dt.datetime,
+        to_date_dt: dt.datetime,
+        session: Optional[YahooSession] = None,
+        EXCHANGE_TIME: bool = False,
     ) -> None:
         # Static data initialisation
         self.header: Dict[str, str] = {
@@ -27,18 +41,32 @@ class StockGrabber:
         self.from_date: int = round(dt.datetime.timestamp(self.from_date_dt))
         self.to_date: int = round(dt.datetime.timestamp(self.to_date_dt))
         self.url: str = (
-            f"https://query1.finance.yahoo.com/v8/finance/chart/{self.ticker}?symbol={self.ticker}&period1={self.from_date}&period2={self.to_date}&useYfid=true&interval=1m&includePrePost=true&events=div%7Csplit%7Cearn&lang=en-US&region=US&crumb=azr2X8.O.Sf&corsDomain=finance.yahoo.com"
+            f"{self.base_url}/v8/finance/chart/{self.ticker}?symbol={self.ticker}&period1={self.from_date}&period2={self.to_date}&useYfid=true&interval=1m&includePrePost=true&events=div%7Csplit%7Cearn&lang=en-US&region=US&crumb=azr2X8.O.Sf&corsDomain=finance.yahoo.com"
         )
 
+        # Shared keep-alive session, otherwise a one off request
+        self.session: Optional[YahooSession] = session
+
+        # Times in the exchange's gmtoffset rather than this machine's local time
+        self.EXCHANGE_TIME: bool = EXCHANGE_TIME
+
     def __enter__(self) -> Dict[str, Any]:
         # Request execution
-        self.request: requests.Response = requests.get(self.url, headers=self.header)
-        self.decode_format: str = "ISO-8859-1"
-        self.content: bytes = self.request.content
+        with timer("yahoo.http"):
+            if self.session is not None:
+                self.request: requests.Response = self.session.get(
+                    self.url, headers=self.header
+                )
+            else:
+                self.request: requests.Response = requests.get(
+                    self.url, headers=self.header
+                )
+            self.content: bytes = self.request.content
+        add_count("yahoo.bytes", len(self.content))
 
-        self.main_dictionary: Dict[str, Any] = json.loads(
-            self.content.decode(self.decode_format)
-        )
+        # Parsed from the bytes, without decoding to a str first
+        with timer("yahoo.json"):
+            self.main_dictionary: Dict[str, Any] = load_json(self.content)
 
         return self.main_dictionary
 
@@ -98,13 +126,13 @@ class StockGrabber:
                     exchange_name,
                 ) = self.meta_processing(meta_data)
 
-                # Converting timestamp to datetime
-                datetime_info: List[dt.datetime] = [
-                    dt.datetime.fromtimestamp(timestamp) for timestamp in timestamp_info
-                ]
+                # Converting timestamp to datetime in one go
+                datetime_info: np.ndarray = epoch_to_datetime64(
+                    timestamp_info, gmt_offset if self.EXCHANGE_TIME else None
+                )
 
                 # Creation of headers for dataframe
-                stock_info_pre_dataframe: Dict[str, List[Union[dt.datetime, float]]] = {
+                stock_info_pre_dataframe: Dict[str, np.ndarray] = {
                     SQLYahooData.as_at_date: datetime_info,
                     SQLYahooData.market_low: low,
                     SQLYahooData.market_high: high,
@@ -197,11 +225,11 @@ class StockGrabber:
             logger.LogError("Dataset has columns of different lengths.")
             raise AttributeError("This dataset has columns of different lengths.")
 
-        market_low: np.array = np.float_(main_data[WebPageStatics.low])
-        market_high: np.array = np.float_(main_data[WebPageStatics.high])
-        market_open: np.array = np.float_(main_data[WebPageStatics.open])
-        market_volume: np.array = np.float_(main_data[WebPageStatics.volume])
-        market_close: np.array = np.float_(main_data[WebPageStatics.close])
+        market_low: np.array = float_column(main_data[WebPageStatics.low])
+        market_high: np.array = float_column(main_data[WebPageStatics.high])
+        market_open: np.array = float_column(main_data[WebPageStatics.open])
+        market_volume: np.array = float_column(main_data[WebPageStatics.volume])
+        market_close: np.array = float_column(main_data[WebPageStatics.close])
 
         return (market_low, market_high, market_open, market_close, market_volume)
 
@@ -231,6 +259,7 @@ class StockGrabber:
             exchange_name,
         )
 
+    @timed("yahoo.get_data")
     def GetData(self) -> pd.DataFrame:
         daily_information_df: pd.DataFrame = self.data_processing()
         return daily_information_df
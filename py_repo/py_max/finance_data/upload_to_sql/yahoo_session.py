@@ -0,0 +1,94 @@
+import requests
+import threading
+import time
+
+from requests.adapters import HTTPAdapter
+from urllib.parse import urlsplit
+from typing import Dict, Optional
+
+from py_max.finance_data.config import logger
+
+
+class HostRateLimiter:
+    """Spaces out requests to each host so there are at most requests_per_second of them."""
+
+    def __init__(self, requests_per_second: float) -> None:
+        self.interval: float = 1 / requests_per_second if requests_per_second else 0
+        self._next_slot: Dict[str, float] = {}
+        self._lock: threading.Lock = threading.Lock()
+
+    def wait(self, host: str) -> None:
+        # Claiming the next slot under the lock, then sleeping outside of it
+        with self._lock:
+            now: float = time.monotonic()
+            slot: float = max(now, self._next_slot.get(host, now))
+            self._next_slot[host] = slot + self.interval
+
+        if slot > now:
+            time.sleep(slot - now)
+
+
+class YahooSession:
+    """
+    Keep-alive HTTP session shared between StockGrabbers, with a bounded connection pool,
+    per-host rate limiting and retries with exponential backoff. Safe to use from threads.
+    """
+
+    # Worth retrying, anything else is returned for the grabber to handle
+    RETRY_STATUSES: tuple = (429, 500, 502, 503, 504)
+
+    def __init__(
+        self,
+        max_connections: int = 8,
+        requests_per_second: float = 5.0,
+        retries: int = 3,
+        backoff: float = 0.5,
+        timeout: float = 30.0,
+    ) -> None:
+        self.retries: int = retries
+        self.backoff: float = backoff
+        self.timeout: float = timeout
+        self.rate_limiter: HostRateLimiter = HostRateLimiter(requests_per_second)
+
+        self.session: requests.Session = requests.Session()
+        adapter: HTTPAdapter = HTTPAdapter(
+            pool_connections=max_connections, pool_maxsize=max_connections
+        )
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+
+    def __enter__(self) -> "YahooSession":
+        return self
+
+    def __exit__(self, arg1, arg2, arg3):
+        self.close()
+
+    def close(self) -> None:
+        self.session.close()
+
+    def get(
+        self, url: str, headers: Optional[Dict[str, str]] = None
+    ) -> requests.Response:
+        host: str = urlsplit(url).netloc
+        for attempt in range(self.retries + 1):
+            self.rate_limiter.wait(host)
+            try:
+                response: requests.Response = self.session.get(
+                    url, headers=headers, timeout=self.timeout
+                )
+            except (requests.ConnectionError, requests.Timeout) as error:
+                if attempt == self.retries:
+                    raise
+                logger.LogWarning(f"Request to {host} failed ({error}), retrying.")
+            else:
+                if (
+                    response.status_code not in self.RETRY_STATUSES
+                    or attempt == self.retries
+                ):
+                    return response
+                logger.LogWarning(
+                    f"Request to {host} returned {response.status_code}, retrying."
+                )
+                response.close()
+
+            time.sleep(self.backoff * 2**attempt)
@@ -3,12 +3,15 @@ import numpy as np
 import datetime as dt
 
 from copy import deepcopy
-from typing import Optional, List, Dict, Union
-from sklearn.linear_model import LinearRegression
+from concurrent.futures import ProcessPoolExecutor, Future
+from typing import Optional, List, Dict, Union, Tuple, Iterator, Any
 from enum import Enum
 
 from py_max.finance_data import (
     Stock,
+    BarCache,
+    BarStore,
+    SecurityBars,
     Amazon,
     StockBase,
     Nvidia,
@@ -18,8 +21,13 @@ from py_max.finance_data import (
     Paypal,
     Meta,
 )
-from py_max.py_utils import SQLYahooData
+from py_max.py_utils import SQLYahooData, Prefetcher, timed
 from py_max.model_data.config import log
+from py_max.model_data.regression_kernel import (
+    trailing_windows,
+    rolling_least_squares,
+    rolling_extreme_line,
+)
 
 
 # Guesses - narrowing window from a regression implies that the volatility is reducing => people will buy lower vol so price will rise
@@ -29,51 +37,195 @@ class Regressions(Enum):
     LOWER: str = "Lower"
 
 
+# Columns of the daily reports given by Portfolio.simulate_trade
+REPORT_COLUMNS: List[str] = ["Date", "Ticker", "Return", "TradeCount"]
+
+
 class StrategyColumns:
     Data: str = "Data"
+    Buy: str = "Buy"
+    EvaluationTime: str = "EvaluationTime"
+
+
+def minute_indices(times: np.ndarray) -> np.ndarray:
+    """
+    Converts sorted, unique datetimes to the number of whole minutes since the first of them.
+    Raises a ValueError if the times are out of order or repeated.
+    """
+    times = np.asarray(times, dtype="datetime64[ns]")
+    if len(times) == 0:
+        return np.zeros(0, dtype=np.int64)
+
+    steps: np.ndarray = np.diff(times)
+    if (steps < np.timedelta64(0, "ns")).any():
+        raise ValueError("Times must be sorted in ascending order to be indexed.")
+    if (steps == np.timedelta64(0, "ns")).any():
+        raise ValueError("Times contain duplicates so can not be indexed.")
+
+    return (times - times[0]) // np.timedelta64(1, "m")
 
 
 def create_time_indices(time_data: pd.DataFrame) -> pd.DataFrame:
     """Takes a dataframe with a datetime column and converts each minute forward to an index."""
     times: np.ndarray = time_data[SQLYahooData.as_at_date].to_numpy()
-    min_time: np.datetime64 = times.min()
-    max_time: np.datetime64 = times.max()
-
-    time_indices: List[int] = []
-    counter: int = 0
-    while min_time <= max_time:
-        # Append only if the time is inscope
-        if min_time in times:
-            time_indices.append(counter)
-
-        # Iterate forward by a minute every time
-        min_time += np.timedelta64(1, "m")
-        counter += 1
 
     # Converting these new time indices into the index for the dataframe
-    time_data.index = time_indices
+    time_data.index = minute_indices(times)
     return time_data
 
 
-def gradient(data: pd.DataFrame) -> float:
-    """Gets the gradient of a series-like data frame."""
-    y_final_value: float = data.iloc[-1, 0]
-    y_first_value: float = data.iloc[0, 0]
-
-    x_final_value: float = data.index[-1]
-    x_first_value: float = data.index[0]
-
-    grad: float = (y_final_value - y_first_value) / (x_final_value - x_first_value)
+def gradient(x_data: np.ndarray, y_data: np.ndarray) -> float:
+    """Gets the gradient between the first and last points of a regression line."""
+    grad: float = (y_data[-1] - y_data[0]) / (x_data[-1] - x_data[0])
     return grad
 
 
-def width_variance(data_upper: pd.DataFrame, data_lower: pd.DataFrame) -> float:
+def width_variance(data_upper: np.ndarray, data_lower: np.ndarray) -> float:
     """Gives a measure of whether the trend lines are closing in or not."""
-    end_minus_end: float = data_upper.iloc[-1, 0] - data_lower.iloc[-1, 0]
-    start_minus_start: float = data_upper.iloc[0, 0] - data_lower.iloc[0, 0]
+    end_minus_end: float = data_upper[-1] - data_lower[-1]
+    start_minus_start: float = data_upper[0] - data_lower[0]
     return end_minus_end, start_minus_start
 
 
+def windowed_std(windows: np.ndarray, valid: np.ndarray) -> np.ndarray:
+    """Sample standard deviation (ddof=1, as pandas) of each trailing window."""
+    counts: np.ndarray = valid.sum(axis=1)
+    means: np.ndarray = np.where(valid, windows, 0).sum(axis=1) / counts
+    deviations: np.ndarray = np.where(valid, windows - means[:, None], 0)
+
+    with np.errstate(invalid="ignore", divide="ignore"):
+        variance: np.ndarray = (deviations**2).sum(axis=1) / (counts - 1)
+    return np.sqrt(np.where(counts > 1, variance, np.nan))
+
+
+def expanding_std(values: np.ndarray) -> np.ndarray:
+    """Sample standard deviation (ddof=1) of all the values up to and including each row."""
+    # Shifting by the first value keeps the running sums small and avoids cancellation
+    shifted: np.ndarray = np.asarray(values, dtype=float)
+    shifted = shifted - shifted[0]
+    counts: np.ndarray = np.arange(1, len(shifted) + 1)
+    sums: np.ndarray = np.cumsum(shifted)
+    sums_squared: np.ndarray = np.cumsum(shifted**2)
+
+    with np.errstate(invalid="ignore", divide="ignore"):
+        variance: np.ndarray = (sums_squared - sums**2 / counts) / (counts - 1)
+    return np.sqrt(np.where(counts > 1, np.maximum(variance, 0), np.nan))
+
+
+def batch_signals(
+    time_indices: np.ndarray,
+    values: np.ndarray,
+    reverse_points: int = 10,
+    regression_points: int = 10,
+    mins_to_the_future: int = 10,
+    trend_threshold: float = 0.1,
+    width_threshold: float = 1.0,
+) -> np.ndarray:
+    """
+    Vectorised version of the Trade.run_day decision. Returns the BUY flag run_day would give
+    at the time of every row, using only the rows up to and including that row.
+    """
+    if len(values) == 0:
+        return np.zeros(0, dtype=bool)
+
+    return strategy_signals(
+        *volatility_statistics(values, reverse_points),
+        *regression_statistics(
+            time_indices, values, regression_points, mins_to_the_future
+        ),
+        trend_threshold=trend_threshold,
+        width_threshold=width_threshold,
+    )
+
+
+def volatility_statistics(
+    values: np.ndarray, reverse_points: int = 10
+) -> Tuple[np.ndarray, np.ndarray]:
+    """The day's volatility up to each row and that of the last reverse_points rows."""
+    y_data: np.ndarray = np.asarray(values, dtype=float)
+    rows: np.ndarray = np.arange(len(y_data))
+
+    # While the day is shorter than the window both are the same series, so they are the
+    # same value in run_day.
+    total_daily_vol: np.ndarray = expanding_std(y_data)
+    inscope_vol: np.ndarray = windowed_std(*trailing_windows(y_data, reverse_points))
+    inscope_vol = np.where(rows < reverse_points, total_daily_vol, inscope_vol)
+    return total_daily_vol, inscope_vol
+
+
+def regression_statistics(
+    time_indices: np.ndarray,
+    values: np.ndarray,
+    regression_points: int = 10,
+    mins_to_the_future: int = 10,
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """
+    The trend, upper and lower gradients and the end and start widths of the regressions over
+    the trailing window at each row, predicted from its first time to mins_to_the_future on.
+    """
+    x_data: np.ndarray = np.asarray(time_indices, dtype=float)
+    y_data: np.ndarray = np.asarray(values, dtype=float)
+    rows: np.ndarray = np.arange(len(y_data))
+
+    x_start: np.ndarray = x_data[np.maximum(rows - regression_points + 1, 0)]
+    x_end: np.ndarray = x_data + mins_to_the_future
+
+    regged_start: Dict[Regressions, np.ndarray] = {}
+    regged_end: Dict[Regressions, np.ndarray] = {}
+    for regression in Regressions:
+        slope, intercept = rolling_regression(
+            regression, x_data, y_data, regression_points
+        )
+        regged_start[regression] = intercept + slope * x_start
+        regged_end[regression] = intercept + slope * x_end
+
+    with np.errstate(invalid="ignore", divide="ignore"):
+        span: np.ndarray = x_end - x_start
+        trend_grad: np.ndarray = (
+            regged_end[Regressions.FULL] - regged_start[Regressions.FULL]
+        ) / span
+        upper_grad: np.ndarray = (
+            regged_end[Regressions.UPPER] - regged_start[Regressions.UPPER]
+        ) / span
+        lower_grad: np.ndarray = (
+            regged_end[Regressions.LOWER] - regged_start[Regressions.LOWER]
+        ) / span
+    end_minus_end: np.ndarray = (
+        regged_end[Regressions.UPPER] - regged_end[Regressions.LOWER]
+    )
+    start_minus_start: np.ndarray = (
+        regged_start[Regressions.UPPER] - regged_start[Regressions.LOWER]
+    )
+    return trend_grad, upper_grad, lower_grad, end_minus_end, start_minus_start
+
+
+def strategy_signals(
+    total_daily_vol: np.ndarray,
+    inscope_vol: np.ndarray,
+    trend_grad: np.ndarray,
+    upper_grad: np.ndarray,
+    lower_grad: np.ndarray,
+    end_minus_end: np.ndarray,
+    start_minus_start: np.ndarray,
+    trend_threshold: float = 0.1,
+    width_threshold: float = 1.0,
+) -> np.ndarray:
+    """The run_day conditions applied to precomputed statistics, a BUY flag per row."""
+    ### - BASIC STRATEGY CONDITIONS - ###
+    # Written as the negation of each 'pass' branch in run_day, so nan compares the same way.
+    in_scope: np.ndarray = ~(trend_grad <= trend_threshold) & ~(
+        inscope_vol > total_daily_vol
+    )
+    BUY: np.ndarray = in_scope & (
+        ((upper_grad > 0) & (lower_grad > 0))
+        | (
+            (np.abs(start_minus_start) < width_threshold)
+            & (start_minus_start - end_minus_end > 0)
+        )
+    )
+    return BUY
+
+
 class Trade:
 
     POSITION: float = None
@@ -86,6 +238,7 @@ class Trade:
         stock: Stock,
         trade_date: dt.datetime,
         starting_capital: Optional[float] = None,
+        day_data: Optional[pd.DataFrame] = None,
     ) -> None:
         self.stock: Stock = stock
         self.trade_date: dt.datetime = trade_date
@@ -94,31 +247,60 @@ class Trade:
             self.NET_MARKET_VALUE = starting_capital
 
         # Storing the data for that particular day
-        self.create_performance_data(self.trade_date)
+        self.create_performance_data(self.trade_date, day_data)
 
         # Flag to mark whether portfolio holds security
         self.IN_PORTFOLIO: bool = False
 
-    def create_performance_data(self, trade_date: dt.datetime) -> None:
-        # Storing the data for that particular day
-        if trade_date != self.trade_date:
-            self.stock.day_filter = trade_date  # resetting
+    def create_performance_data(
+        self, trade_date: dt.datetime, day_data: Optional[pd.DataFrame] = None
+    ) -> None:
+        """Stores the data for the day, read from the stock unless day_data is already loaded."""
+        if day_data is not None:
+            self.performance_data: pd.DataFrame = day_data
+        else:
+            if trade_date != self.trade_date:
+                self.stock.day_filter = trade_date  # resetting
+
+            # Only the columns the strategy reads
+            self.performance_data: pd.DataFrame = self.stock.get_day(
+                trade_date, [SQLYahooData.market_high, SQLYahooData.market_low]
+            )
 
-        self.performance_data: pd.DataFrame = self.stock.get_day(trade_date)
         self.performance_data[SQLYahooData.market_mid] = (
             self.performance_data[SQLYahooData.market_high]
             .add(self.performance_data[SQLYahooData.market_low])
             .div(2)
         )
 
-        # Adding the time indices to the data
+        # A bar with a close but no high or low has no mid. Dropping it keeps run_day and
+        # run_day_batch on the same rows, one nan would poison every later window of the batch sums.
+        MID_MISSING: pd.Series = self.performance_data[SQLYahooData.market_mid].isna()
+        if MID_MISSING.any():
+            self.performance_data = self.performance_data.loc[~MID_MISSING].copy()
+
+        # Adding the time indices to the data. They are the index of the day's rows, so the
+        # regressions read them from there rather than rebuilding them.
         self.performance_data = create_time_indices(self.performance_data)
 
+    def day_prices(self) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """The times, highs and lows of the day as arrays, all the sim needs to rebuild the trade."""
+        return (
+            self.performance_data[SQLYahooData.as_at_date].to_numpy(),
+            self.performance_data[SQLYahooData.market_high].to_numpy(dtype=float),
+            self.performance_data[SQLYahooData.market_low].to_numpy(dtype=float),
+        )
+
+    @timed("trade.run_day")
     def run_day(
         self,
         time: dt.datetime,
         BASED_ON: str = SQLYahooData.market_mid,
         reverse_points: int = 10,
+        regression_points: int = 10,
+        mins_to_the_future: int = 10,
+        trend_threshold: float = 0.1,
+        width_threshold: float = 1.0,
     ) -> Union[pd.DataFrame, bool]:
         # Filter onto the time in scope
         time_data: pd.DataFrame = self.performance_data.loc[
@@ -135,21 +317,21 @@ class Trade:
         # Only really concerned about the time and the column that you execute on
         time_data = time_data[[SQLYahooData.as_at_date, BASED_ON]].copy()
 
-        regged_data: Dict[Regressions, pd.DataFrame] = self.regression_analysis(
-            time_data
+        predicting_indices, regged_data = self.regression_analysis(
+            time_data, regression_points, mins_to_the_future
         )
 
         # If we think the stock is going down, we wish to sell, if we think
         # it's going up, we buy.
-        reg_trend: pd.DataFrame = regged_data[Regressions.FULL]
-        trend_grad: float = gradient(reg_trend)
+        reg_trend: np.ndarray = regged_data[Regressions.FULL]
+        trend_grad: float = gradient(predicting_indices, reg_trend)
 
-        reg_upper: pd.DataFrame = regged_data[Regressions.UPPER]
-        reg_lower: pd.DataFrame = regged_data[Regressions.LOWER]
+        reg_upper: np.ndarray = regged_data[Regressions.UPPER]
+        reg_lower: np.ndarray = regged_data[Regressions.LOWER]
 
         # Some stats for the regs
-        upper_grad: float = gradient(reg_upper)
-        lower_grad: float = gradient(reg_lower)
+        upper_grad: float = gradient(predicting_indices, reg_upper)
+        lower_grad: float = gradient(predicting_indices, reg_lower)
         end_minus_end, start_minus_start = width_variance(reg_upper, reg_lower)
 
         ### - BASIC STRATEGY CONDITIONS - ###
@@ -157,7 +339,7 @@ class Trade:
 
         BUY: bool = False
         # Never buy if we are trending downwards on a small time scale
-        if trend_grad <= 0.1:
+        if trend_grad <= trend_threshold:
             pass
         # Condition on keeping the volatility low
         elif inscope_vol > total_daily_vol:
@@ -167,7 +349,7 @@ class Trade:
             BUY = True
         # Else, we are trending upwards and now testing whether the 'variance' is narrowing
         elif (
-            (abs(start_minus_start) < 1)
+            (abs(start_minus_start) < width_threshold)
             # & (start_minus_start < 10)
             & (start_minus_start - end_minus_end > 0)
         ):
@@ -176,6 +358,77 @@ class Trade:
             pass
         return time_data_snapshot, BUY
 
+    @timed("trade.run_day_batch")
+    def run_day_batch(
+        self,
+        start_time: dt.datetime,
+        end_time: dt.datetime,
+        BASED_ON: str = SQLYahooData.market_mid,
+        reverse_points: int = 10,
+        regression_points: int = 10,
+        mins_to_the_future: int = 10,
+        trend_threshold: float = 0.1,
+        width_threshold: float = 1.0,
+    ) -> pd.DataFrame:
+        """
+        Gives the run_day decision for every minute from start_time up to end_time in a single pass
+        over the day, rather than re-running the regressions for each minute.
+        """
+        day_data: pd.DataFrame = self.performance_data.loc[
+            self.performance_data[SQLYahooData.date] == start_time.date()
+        ]
+        times: np.ndarray = day_data[SQLYahooData.as_at_date].to_numpy()
+        BUY: np.ndarray = batch_signals(
+            day_data.index.to_numpy(),
+            day_data[BASED_ON].to_numpy(),
+            reverse_points=reverse_points,
+            regression_points=regression_points,
+            mins_to_the_future=mins_to_the_future,
+            trend_threshold=trend_threshold,
+            width_threshold=width_threshold,
+        )
+
+        # Each minute sees the last row at or before it, same as the filter in run_day
+        evaluation_times: pd.DatetimeIndex = pd.date_range(
+            start_time, end_time, freq="1min", inclusive="left"
+        )
+        rows: np.ndarray = (
+            np.searchsorted(times, evaluation_times.to_numpy(), side="right") - 1
+        )
+
+        # Before the first bar of the day (row -1) there is no snapshot and never a buy
+        snapshot_times: np.ndarray = np.append(times, np.datetime64("NaT"))[rows]
+        snapshot_values: np.ndarray = np.append(
+            day_data[SQLYahooData.market_mid].to_numpy(dtype=float), np.nan
+        )[rows]
+        snapshot_buys: np.ndarray = np.append(BUY, False)[rows]
+
+        signals: pd.DataFrame = pd.DataFrame(
+            {
+                SQLYahooData.as_at_date: snapshot_times,
+                SQLYahooData.market_mid: snapshot_values,
+                StrategyColumns.Buy: snapshot_buys,
+            },
+            index=pd.Index(evaluation_times, name=StrategyColumns.EvaluationTime),
+        )
+        return signals
+
+    def signal_stream(
+        self, start_time: dt.datetime, end_time: dt.datetime, BATCH: bool = True
+    ) -> Iterator[Tuple[Any, bool]]:
+        """Yields the (snapshot, BUY) pair for each minute of the simulation."""
+        if BATCH:
+            signals: pd.DataFrame = self.run_day_batch(start_time, end_time)
+            for snapshot in signals.to_dict("records"):
+                yield snapshot, snapshot[StrategyColumns.Buy]
+        else:
+            current_time: dt.datetime = start_time
+            while current_time < end_time:
+                yield self.run_day(current_time)
+
+                # Increment by a minute
+                current_time += dt.timedelta(minutes=1)
+
     def first_trade(
         self, price: float, initial_capital: Optional[float] = None
     ) -> None:
@@ -225,123 +478,71 @@ class Trade:
         self.LAST_TRADED_PRICE = price
         self.TRADE_COUNT += 1
 
+    @timed("trade.regression_analysis")
     def regression_analysis(
-        self, time_data: pd.DataFrame, reverse_points: int = 10
-    ) -> Dict[Regressions, pd.DataFrame]:
+        self,
+        time_data: pd.DataFrame,
+        reverse_points: int = 10,
+        mins_to_the_future: int = 10,
+    ) -> Tuple[np.ndarray, Dict[Regressions, np.ndarray]]:
+        """
+        Fits the regressions to the last reverse_points rows and predicts them from the first of
+        those rows to mins_to_the_future past the last. Returns the predicting indices and the line values.
+        The rows keep the day's time indices from create_performance_data, which are extended
+        rather than rebuilt.
+        """
+        time_data = time_data.iloc[-reverse_points:].copy()
+        known_indices: np.ndarray = time_data.index.to_numpy()
 
-        # Extending all of the times that we have by 10 minutes. We then filter after that so we preserve the
-        # mapping of any indices.
-        predicting_times: pd.DataFrame = extend_time_data(
-            time_data[SQLYahooData.as_at_date].to_numpy()
+        # Extending the times that we have by mins_to_the_future minutes
+        predicting_indices: np.ndarray = np.concatenate(
+            (known_indices, known_indices[-1] + np.arange(1, mins_to_the_future + 1))
         )
-        predicting_times = create_time_indices(predicting_times)
-        predicting_times = predicting_times.iloc[-10 - reverse_points :].copy()
-        time_data = time_data.iloc[-reverse_points:].copy()
 
         # Creating a dictionary to store the regged data
-        output_data: Dict[Regressions, pd.DataFrame] = {}
+        output_data: Dict[Regressions, np.ndarray] = {}
 
         # Performing the regressions
         for regression in Regressions:
-            fitted_reg: LinearRegression = process_regression_type(
-                regression, time_data
-            )
-            reg_values: np.ndarray = fitted_reg.predict(
-                predicting_times.index.to_numpy().reshape(-1, 1)
-            )
+            slope, intercept = process_regression_type(regression, time_data)
+            output_data[regression] = intercept + slope * predicting_indices
 
-            regged_dataframe: pd.DataFrame = pd.DataFrame(
-                {StrategyColumns.Data: reg_values},
-                index=predicting_times.index.to_numpy(),
-            )
-            output_data[regression] = regged_dataframe
-
-        return output_data
-
-
-def extend_time_data(times: np.ndarray, mins_to_the_future: int = 10) -> pd.DataFrame:
-    """Extends time data n minutes into the future for the reg models."""
-    max_time: np.datetime64 = times.max()
-
-    times_to_extend: List[dt.datetime] = []
-    for _ in range(mins_to_the_future):
-        max_time += np.timedelta64(1, "m")
-        times_to_extend.append(max_time)
-
-    times_to_extend_numpy: np.ndarray = np.array(times_to_extend)
+        return predicting_indices, output_data
 
-    # Concatenating the two data sources together.
-    times = np.concatenate((times, times_to_extend_numpy))
 
-    times.sort()
-
-    # Converting this to a dataframe
-    time_dataframe: pd.DataFrame = pd.DataFrame(times)
-    time_dataframe.columns = [SQLYahooData.as_at_date]
-
-    return time_dataframe
+def rolling_regression(
+    regression: Regressions, x_data: np.ndarray, y_data: np.ndarray, window: int
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Slope and intercept of the given regression over the trailing window ending at each row.
+    FULL is a least squares line, UPPER/LOWER the line through the two highest/lowest points.
+    """
+    match regression:
+        case Regressions.FULL:
+            return rolling_least_squares(x_data, y_data, window)
+        case Regressions.UPPER:
+            return rolling_extreme_line(x_data, y_data, window, UPPER=True)
+        case Regressions.LOWER:
+            return rolling_extreme_line(x_data, y_data, window, UPPER=False)
 
 
 def process_regression_type(
     regression: Regressions, time_data: pd.DataFrame
-) -> LinearRegression:
+) -> Tuple[float, float]:
     """
     Contains the logic for regressing our data. For the given type, takes our data
-    and returns a linear reg model fitted based on the condition provided.
+    and returns the slope and intercept of the line fitted based on the condition provided.
     """
-    # Creating the base model
-    linear_model: LinearRegression = LinearRegression()
-
     # Sample column is always the last element
     sampled_column: str = list(time_data.columns)[-1]
 
     # Converting data to numpy arrays
     x_data: np.ndarray = time_data.index.to_numpy()
-    # x_data: np.ndarray = time_data[SQLYahooData.as_at_date].to_numpy()
     y_data: np.ndarray = time_data[sampled_column].to_numpy()
-    match regression:
-        case Regressions.FULL:
-            # If full, we regress the full data
-            pass
-        case Regressions.UPPER:
-            # Take the largest two values and regress based on these
-            y_max: float = y_data.max()
-            try:
-                y_second_max: float = y_data[np.where(y_data != y_max)].max()
-            except ValueError:
-                y_second_max = y_max
-
-            # Returning the corresponding x values
-            x_max: int = x_data[np.where(y_data == y_max)][0]
-
-            if y_max == y_second_max:
-                x_second_max: int = x_data[np.where(y_data == y_second_max)][1]
-            else:
-                x_second_max: int = x_data[np.where(y_data == y_second_max)][0]
-
-            # Writing the numpy arrays
-            y_data = np.array([y_max, y_second_max])
-            x_data = np.array([x_max, x_second_max])
-        case Regressions.LOWER:
-            y_min: float = y_data.min()
-            try:
-                y_second_min: float = y_data[np.where(y_data != y_min)].min()
-            except ValueError:
-                y_second_min = y_min
-
-            # Returning the corresponding x values
-            x_min: int = x_data[np.where(y_data == y_min)][0]
-
-            if y_min == y_second_min:
-                x_second_min: int = x_data[np.where(y_data == y_second_min)][1]
-            else:
-                x_second_min: int = x_data[np.where(y_data == y_second_min)][0]
 
-            # Writing the numpy arrays
-            y_data = np.array([y_min, y_second_min])
-            x_data = np.array([x_min, x_second_min])
-    linear_model.fit(x_data.reshape(-1, 1), y_data)
-    return linear_model
+    # The whole of the data is a single window, ending at the last row
+    slopes, intercepts = rolling_regression(regression, x_data, y_data, len(y_data))
+    return slopes[-1], intercepts[-1]
 
 
 class Portfolio:
@@ -355,13 +556,45 @@ class Portfolio:
         stocks: List[StockBase],
         trade_dates: List[dt.datetime],
         CAPITAL: float = 1_000_000,
+        cache: Optional[BarCache] = None,
     ) -> None:
         self.stocks: List[StockBase] = stocks
         self.trade_dates: List[dt.datetime] = trade_dates
         self.CAPITAL: float = CAPITAL
+        self.cache: Optional[BarCache] = cache
 
         self.trades: Dict[dt.datetime, List[Trade]] = {}
 
+        # Bars for every stock over the trade dates, filled in a single query by load_data
+        self.bars: Optional[BarStore] = None
+
+    def load_data(self) -> None:
+        """Reads the data for all of the stocks and trade dates up front."""
+        self.bars = Stock.load_store(self.stocks, self.trade_dates, self.cache)
+        log.LogInfo(
+            f"Loaded data for {len(self.stocks)} stocks over {len(self.trade_dates)} days."
+        )
+
+    def load_date(self, trade_date: dt.datetime) -> Tuple[dt.datetime, BarStore]:
+        """Reads the data for all of the stocks on a single trade date."""
+        return trade_date, Stock.load_store(self.stocks, [trade_date], self.cache)
+
+    def daily_bars(self, prefetch: int = 0) -> Iterator[Tuple[dt.datetime, BarStore]]:
+        """
+        The bars for each trade date. Without prefetch, everything is read up front in one query.
+        With prefetch, each date is read on a background thread up to prefetch dates ahead of the
+        sim, so the reads overlap the compute and only a few days are held at a time.
+        """
+        if prefetch <= 0:
+            self.load_data()
+            for date in self.trade_dates:
+                yield date, self.bars
+            return
+
+        yield from Prefetcher(
+            (self.load_date(date) for date in self.trade_dates), prefetch
+        )
+
     def initalise_trades(self, trade_date: dt.datetime) -> None:
         """Imports the data for the stocks, ready for testing that day."""
         # Clearing any existing data.
@@ -369,89 +602,213 @@ class Portfolio:
             self.trades = []
 
         for stock in self.stocks:
+            # Using the bulk loaded data when we have it, otherwise querying the stock directly
+            day_data: Optional[pd.DataFrame] = None
+            if self.bars is not None:
+                day_data = self.day_frame(stock.ticker, trade_date)
+
             # Initialising each trade with the same amount of capital (we are only testing strategy)
             self.trades.append(
-                Trade(Stock(stock, trade_date), trade_date, self.CAPITAL)
+                Trade(
+                    Stock(stock, trade_date, self.cache),
+                    trade_date,
+                    self.CAPITAL,
+                    day_data,
+                )
             )
             log.LogInfo(f"Initialised data for stock: {stock.ticker}")
 
-    def test_data(self) -> None:
-        """Testing the model for the data of the trade day."""
-        output_data: pd.DataFrame = pd.DataFrame()
-
-        # Running through each day
-        for date in self.trade_dates:
-            # Initalising the data for that trade date
-            self.initalise_trades(date)
+    def day_frame(self, ticker: str, trade_date: dt.datetime) -> pd.DataFrame:
+        """The prices the trade needs for the day, sliced from the loaded bars."""
+        return price_frame(*self.day_prices(ticker, trade_date))
+
+    def day_prices(
+        self, ticker: str, trade_date: dt.datetime
+    ) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """The times, highs and lows of the day as views onto the loaded bars."""
+        if ticker not in self.bars:
+            return np.array([], dtype="datetime64[s]"), np.array([]), np.array([])
+
+        day_bars: SecurityBars = self.bars.day(ticker, trade_date)
+        return (
+            day_bars.datetimes,
+            day_bars[SQLYahooData.market_high],
+            day_bars[SQLYahooData.market_low],
+        )
 
-            # Running the sim for each trde
-            for trade in self.trades:
-                if trade.performance_data.empty:
-                    log.LogWarning(f"No data for {trade.stock.name} on {date}")
+    def simulate_trade(
+        self, trade: Trade, date: dt.datetime, BATCH: bool = True
+    ) -> Dict[str, Any]:
+        """Runs the sim for a single trade over the trade day, returning the daily report."""
+        if trade.performance_data.empty:
+            log.LogWarning(f"No data for {trade.stock.name} on {date}")
 
-                # Setting the current time (initally the start time of the sim, iterated through the loop)
-                current_time: dt.datetime = deepcopy(date).replace(
-                    minute=30, hour=self.open_time
-                )
+        # Setting the current time (initally the start time of the sim, iterated through the loop)
+        current_time: dt.datetime = deepcopy(date).replace(
+            minute=30, hour=self.open_time
+        )
 
-                # Cut off time of the simulation
-                end_time: dt.datetime = deepcopy(date).replace(
-                    minute=0, hour=self.end_time
-                )
+        # Cut off time of the simulation
+        end_time: dt.datetime = deepcopy(date).replace(minute=0, hour=self.end_time)
 
-                # Running the daily data
-                BUY_STATUS: bool = False
-                while current_time < end_time:
+        # Running the daily data
+        BUY_STATUS: bool = False
+        for trade_snap_shot, NEW_BUY_STATUS in trade.signal_stream(
+            current_time, end_time, BATCH=BATCH
+        ):
 
-                    # Running the data for the day, at that time
-                    trade_snap_shot, NEW_BUY_STATUS = trade.run_day(current_time)
+            # If our position is less than zero, we are bust
+            if trade.POSITION is not None and trade.POSITION < 0:
+                log.LogInfo(f"{trade.stock.name} has gone bust.")
+                break
 
-                    # If our position is less than zero, we are bust
-                    if trade.POSITION is not None and trade.POSITION < 0:
-                        log.LogInfo(f"{trade.stock.name} has gone bust.")
-                        break
+            # If the buy statuses are not matching, this means we either buy or we sell
+            if NEW_BUY_STATUS != BUY_STATUS:
+                # Updating the status
+                BUY_STATUS = NEW_BUY_STATUS
 
-                    # If the buy statuses are not matching, this means we either buy or we sell
-                    if NEW_BUY_STATUS != BUY_STATUS:
-                        # Updating the status
-                        BUY_STATUS = NEW_BUY_STATUS
+                # Getting price at that time
+                price: float = trade_snap_shot[SQLYahooData.market_mid] / 100
 
-                        # Getting price at that time
-                        price: float = trade_snap_shot[SQLYahooData.market_mid] / 100
+                # Buy security
+                if BUY_STATUS == True:
+                    # If the security is not traded yet and we need to buy, we need to initialise.
+                    if trade.POSITION is None:
+                        trade.first_trade(self.CAPITAL, price)
 
-                        # Buy security
-                        if BUY_STATUS == True:
-                            # If the security is not traded yet and we need to buy, we need to initialise.
-                            if trade.POSITION is None:
-                                trade.first_trade(self.CAPITAL, price)
+                # Else, we can just execute the trade.
+                trade.execute_trade(price=price, BUY=BUY_STATUS)
 
-                        # Else, we can just execute the trade.
-                        trade.execute_trade(price=price, BUY=BUY_STATUS)
+        # return
+        return_value: float = trade.NET_MARKET_VALUE / self.CAPITAL - 1
 
-                    # Increment by a minute
-                    current_time += dt.timedelta(minutes=1)
+        # Logging the daily info
+        log.LogInfo(
+            f"Day {date} capital for {trade.stock.name}: {trade.NET_MARKET_VALUE} - daily return is {return_value*100:.2f}%"
+        )
 
-                # return
-                return_value: float = trade.NET_MARKET_VALUE / self.CAPITAL - 1
+        # Storing the data for output to excel
+        daily_report: Dict[str, Any] = {
+            "Date": date,
+            "Ticker": trade.stock.name,
+            "Return": return_value,
+            "TradeCount": trade.TRADE_COUNT,
+        }
+        return daily_report
+
+    def daily_reports(
+        self, BATCH: bool = True, workers: Optional[int] = None, prefetch: int = 0
+    ) -> Iterator[Tuple[dt.datetime, List[Dict[str, Any]]]]:
+        """
+        Runs the sim for every stock on each trade date, yielding the date and its daily reports in
+        date order. With more than one worker, the (stock, date) sims are spread over a process pool.
+        With prefetch, the next dates are read in the background while a date is being run.
+        """
+        if workers is not None and workers > 1:
+            date_futures: List[Tuple[dt.datetime, List[Future]]] = []
+            with ProcessPoolExecutor(max_workers=workers) as executor:
+                for date, day_bars in self.daily_bars(prefetch):
+                    self.bars = day_bars
+                    self.initalise_trades(date)
+
+                    # Workers only get the prices they need, not the trade or its SQL frame
+                    date_futures.append(
+                        (
+                            date,
+                            [
+                                executor.submit(
+                                    simulate_day_prices,
+                                    trade.stock.stock_choice,
+                                    date,
+                                    *trade.day_prices(),
+                                    self.CAPITAL,
+                                    self.open_time,
+                                    self.end_time,
+                                    BATCH,
+                                )
+                                for trade in self.trades
+                            ],
+                        )
+                    )
+
+                # Merging in submission order so the output matches the serial run
+                for date, report_futures in date_futures:
+                    yield date, [
+                        report_future.result() for report_future in report_futures
+                    ]
+        else:
+            # Running through each day
+            for date, day_bars in self.daily_bars(prefetch):
+                # Initalising the data for that trade date
+                self.bars = day_bars
+                self.initalise_trades(date)
+
+                # Running the sim for each trde
+                yield date, [
+                    self.simulate_trade(trade, date, BATCH) for trade in self.trades
+                ]
+
+    def test_data(
+        self,
+        BATCH: bool = True,
+        workers: Optional[int] = None,
+        output_path: Optional[str] = None,
+        prefetch: int = 0,
+    ) -> pd.DataFrame:
+        """
+        Testing the model for the data of the trade days. BATCH computes the whole day's signals in
+        one pass, otherwise run_day is called for every minute. With prefetch, up to that many
+        dates are read ahead on a background thread rather than all of them up front. The output
+        is written to a csv when an output path is given.
+        """
+        # Collecting the daily reports, the output is only built once at the end
+        daily_reports: List[Dict[str, Any]] = []
+        for _, date_reports in self.daily_reports(BATCH, workers, prefetch):
+            daily_reports.extend(date_reports)
+
+        output_data: pd.DataFrame = pd.DataFrame(daily_reports, columns=REPORT_COLUMNS)
+        if output_path is not None:
+            output_data.to_csv(output_path)
+        return output_data
 
-                # Logging the daily info
-                log.LogInfo(
-                    f"Day {date} capital for {trade.stock.name}: {trade.NET_MARKET_VALUE} - daily return is {return_value*100:.2f}%"
-                )
 
-                # Storing the data for output to excel
-                daily_report: pd.DataFrame = pd.DataFrame(
-                    {
-                        "Date": [date],
-                        "Ticker": [trade.stock.name],
-                        "Return": [return_value],
-                        "TradeCount": [trade.TRADE_COUNT],
-                    }
-                )
-                output_data = pd.concat([output_data, daily_report])
+def price_frame(
+    times: np.ndarray, market_high: np.ndarray, market_low: np.ndarray
+) -> pd.DataFrame:
+    """Minimal day frame for a Trade, only the columns the strategy reads."""
+    day_data: pd.DataFrame = pd.DataFrame(
+        {
+            SQLYahooData.as_at_date: times,
+            SQLYahooData.market_high: market_high,
+            SQLYahooData.market_low: market_low,
+        }
+    )
+    day_data[SQLYahooData.date] = day_data[SQLYahooData.as_at_date].dt.date
+    return day_data
+
+
+def simulate_day_prices(
+    stock: StockBase,
+    trade_date: dt.datetime,
+    times: np.ndarray,
+    market_high: np.ndarray,
+    market_low: np.ndarray,
+    CAPITAL: float,
+    open_time: int = Portfolio.open_time,
+    end_time: int = Portfolio.end_time,
+    BATCH: bool = True,
+) -> Dict[str, Any]:
+    """
+    Process pool entry point. Rebuilds the trade for one stock and day from its price arrays
+    and runs the sim, returning the daily report.
+    """
+    day_data: pd.DataFrame = price_frame(times, market_high, market_low)
+    trade: Trade = Trade(Stock(stock, trade_date), trade_date, CAPITAL, day_data)
 
-        output_data.to_csv("C:/Temp/StockTesterData.csv")
-        return output_data
+    portfolio: Portfolio = Portfolio([stock], [trade_date], CAPITAL)
+    portfolio.open_time = open_time
+    portfolio.end_time = end_time
+    return portfolio.simulate_trade(trade, trade_date, BATCH)
 
 
 if __name__ == "__main__":
@@ -472,4 +829,4 @@ if __name__ == "__main__":
             # dt.datetime(year=2024, month=5, day=30),
             # dt.datetime(year=2024, month=5, day=31),
         ],
-    ).test_data()
+    ).test_data(output_path="C:/Temp/StockTesterData.csv")
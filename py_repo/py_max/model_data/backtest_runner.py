@@ -0,0 +1,184 @@
+import pandas as pd
+import datetime as dt
+import os
+
+from pathlib import Path
+from typing import Optional, List, Dict, Any, Set
+
+from py_max.finance_data import BarCache, StockBase
+from py_max.model_data.config import log
+from py_max.model_data.algo_strat import Portfolio, REPORT_COLUMNS
+from py_max.py_utils import trading_days
+
+try:
+    import pyarrow
+except ImportError:  # Optional, only needed for a Parquet sink
+    pyarrow = None
+
+
+class ResultSink:
+    """
+    Appends the daily reports of a backtest to disk as they finish. A path ending in .csv is a
+    single csv, anything else is a directory of Parquet part files. Each flush is a whole number
+    of days, appended to the csv in a single fsynced write or written to a temporary part file
+    and moved into place, so a killed run leaves the previous results untouched, the dates on
+    disk are complete and a run can carry on from them.
+    """
+
+    def __init__(self, path: str) -> None:
+        self.path: Path = Path(path)
+        self.CSV: bool = self.path.suffix.lower() == ".csv"
+        if not self.CSV and pyarrow is None:
+            raise ImportError("A Parquet sink needs pyarrow installed.")
+
+        self.buffer: List[Dict[str, Any]] = []
+        if self.CSV:
+            self.drop_partial_line()
+
+    def __repr__(self) -> str:
+        return f"Backtest results at {self.path}"
+
+    def completed_dates(self) -> Set[dt.date]:
+        """The dates already written by an earlier run."""
+        existing_data: Optional[pd.DataFrame] = self.read()
+        if existing_data is None or existing_data.empty:
+            return set()
+        return set(pd.to_datetime(existing_data["Date"]).dt.date)
+
+    def read(self) -> Optional[pd.DataFrame]:
+        if self.CSV:
+            if not self.path.exists():
+                return None
+            return pd.read_csv(
+                self.path, parse_dates=["Date"], float_precision="round_trip"
+            )
+
+        part_paths: List[Path] = sorted(self.path.glob("part-*.parquet"))
+        if not part_paths:
+            return None
+        return pd.concat(
+            [pd.read_parquet(part_path) for part_path in part_paths], ignore_index=True
+        )
+
+    def write(self, reports: List[Dict[str, Any]]) -> None:
+        self.buffer.extend(reports)
+
+    def flush(self) -> None:
+        if not self.buffer:
+            return
+
+        output_data: pd.DataFrame = pd.DataFrame(self.buffer, columns=REPORT_COLUMNS)
+        if self.CSV:
+            self.append_csv(output_data)
+        else:
+            self.path.mkdir(parents=True, exist_ok=True)
+            part_number: int = len(list(self.path.glob("part-*.parquet")))
+            part_path: Path = self.path / f"part-{part_number:05d}.parquet"
+
+            # Writing to a temporary file first so a resumed run never reads a partial part
+            temporary_path: Path = part_path.with_suffix(f".{os.getpid()}.tmp")
+            output_data.to_parquet(temporary_path, index=False)
+            os.replace(temporary_path, part_path)
+
+        self.buffer = []
+
+    def append_csv(self, output_data: pd.DataFrame) -> None:
+        """
+        Appends the rows to the csv in a single write and fsyncs it, rather than copying the
+        results so far to add to them.
+        """
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        HEADER: bool = not self.path.exists() or self.path.stat().st_size == 0
+        content: bytes = output_data.to_csv(
+            header=HEADER, index=False, lineterminator="\n"
+        ).encode()
+
+        descriptor: int = os.open(
+            self.path,
+            os.O_WRONLY | os.O_APPEND | os.O_CREAT | getattr(os, "O_BINARY", 0),
+            0o644,
+        )
+        try:
+            written: int = 0
+            while written < len(content):
+                written += os.write(descriptor, content[written:])
+            os.fsync(descriptor)
+        finally:
+            os.close(descriptor)
+
+    def drop_partial_line(self) -> None:
+        """Cuts off a line left half written by a machine going down mid-append."""
+        if not self.path.exists() or self.path.stat().st_size == 0:
+            return
+
+        with open(self.path, "rb+") as file:
+            file.seek(-1, os.SEEK_END)
+            if file.read(1) == b"\n":
+                return
+
+            file.seek(0)
+            content: bytes = file.read()
+            file.truncate(content.rfind(b"\n") + 1)
+        log.LogInfo(f"Dropped a partly written line from {self.path}.")
+
+
+class BacktestRunner:
+    """
+    Backtests the stocks over every trading day in a date range. The days are loaded and run a
+    chunk of chunk_days at a time, so memory stays bounded however long the range, and each
+    date's reports are flushed to the sink as soon as it finishes. Dates the sink already has
+    are skipped, so a stopped run is resumed by running it again, from the date it stopped on.
+    """
+
+    def __init__(
+        self,
+        stocks: List[StockBase],
+        start_date: dt.datetime,
+        end_date: dt.datetime,
+        output_path: str,
+        CAPITAL: float = 1_000_000,
+        cache: Optional[BarCache] = None,
+        chunk_days: int = 20,
+    ) -> None:
+        self.stocks: List[StockBase] = stocks
+        self.trade_dates: List[dt.datetime] = list(trading_days(start_date, end_date))
+        self.sink: ResultSink = ResultSink(output_path)
+        self.CAPITAL: float = CAPITAL
+        self.cache: Optional[BarCache] = cache
+        self.chunk_days: int = chunk_days
+
+    def __repr__(self) -> str:
+        return (
+            f"Backtest of {len(self.stocks)} stocks over {len(self.trade_dates)} days"
+        )
+
+    def remaining_dates(self) -> List[dt.datetime]:
+        completed_dates: Set[dt.date] = self.sink.completed_dates()
+        return [date for date in self.trade_dates if date.date() not in completed_dates]
+
+    def run(
+        self, BATCH: bool = True, workers: Optional[int] = None, prefetch: int = 0
+    ) -> Optional[pd.DataFrame]:
+        """
+        Runs the remaining dates and returns every result in the sink. With prefetch, each chunk's
+        dates are read ahead on a background thread while the sim runs.
+        """
+        remaining_dates: List[dt.datetime] = self.remaining_dates()
+        log.LogInfo(
+            f"{len(self.trade_dates) - len(remaining_dates)} of {len(self.trade_dates)} days already run."
+        )
+
+        for start in range(0, len(remaining_dates), self.chunk_days):
+            chunk_dates: List[dt.datetime] = remaining_dates[
+                start : start + self.chunk_days
+            ]
+            portfolio: Portfolio = Portfolio(
+                self.stocks, chunk_dates, self.CAPITAL, self.cache
+            )
+            for _, date_reports in portfolio.daily_reports(BATCH, workers, prefetch):
+                self.sink.write(date_reports)
+                self.sink.flush()
+
+            log.LogInfo(f"Backtested up to {chunk_dates[-1]:%Y-%m-%d}.")
+
+        return self.sink.read()
@@ -1,2 +1,10 @@
-import keras
 import pandas as pd
+
+from typing import Any
+
+
+def load_keras() -> Any:
+    """Imported on first use, keras and its backend take seconds to import."""
+    import keras
+
+    return keras
@@ -0,0 +1,225 @@
+import pandas as pd
+import numpy as np
+import datetime as dt
+import itertools
+
+from concurrent.futures import ProcessPoolExecutor, Future
+from typing import Optional, List, Dict, Tuple, Any, NamedTuple
+
+from py_max.finance_data import BarCache, StockBase
+from py_max.model_data.config import log
+from py_max.model_data.algo_strat import (
+    Portfolio,
+    REPORT_COLUMNS,
+    minute_indices,
+    volatility_statistics,
+    regression_statistics,
+    strategy_signals,
+)
+
+
+class StrategyParameters(NamedTuple):
+    """The tunable settings of the run_day strategy, defaulting to its hardcoded values."""
+
+    reverse_points: int = 10
+    regression_points: int = 10
+    mins_to_the_future: int = 10
+    trend_threshold: float = 0.1
+    width_threshold: float = 1.0
+
+
+def parameter_grid(**grids: List[Any]) -> List[StrategyParameters]:
+    """
+    Every combination of the values given for each parameter, e.g.
+    parameter_grid(reverse_points=[5, 10], trend_threshold=[0.05, 0.1]). Parameters that
+    aren't given keep their default.
+    """
+    unknown: List[str] = [
+        name for name in grids if name not in StrategyParameters._fields
+    ]
+    if unknown:
+        raise ValueError(f"Unknown strategy parameters: {unknown}")
+
+    values: List[List[Any]] = [
+        list(grids.get(name, [StrategyParameters._field_defaults[name]]))
+        for name in StrategyParameters._fields
+    ]
+    return [
+        StrategyParameters(*combination) for combination in itertools.product(*values)
+    ]
+
+
+class ParameterSweep:
+    """
+    Runs the strategy for many parameter sets over the same stocks and trade dates. The prices
+    are loaded once, and within a (stock, date) the rolling statistics are computed once for each
+    window setting and shared by every threshold that uses them.
+    """
+
+    def __init__(
+        self,
+        stocks: List[StockBase],
+        trade_dates: List[dt.datetime],
+        parameters: List[StrategyParameters],
+        CAPITAL: float = 1_000_000,
+        cache: Optional[BarCache] = None,
+    ) -> None:
+        self.parameters: List[StrategyParameters] = parameters
+        self.portfolio: Portfolio = Portfolio(stocks, trade_dates, CAPITAL, cache)
+
+    def __repr__(self) -> str:
+        return f"Sweep of {len(self.parameters)} parameter sets"
+
+    def run(self, workers: Optional[int] = None, batch_size: int = 500) -> pd.DataFrame:
+        """
+        Gives the return and trade count of every (parameters, ticker, date). With more than one
+        worker, the (stock, date, batch of parameters) jobs are spread over a process pool.
+        """
+        portfolio: Portfolio = self.portfolio
+        portfolio.load_data()
+
+        parameter_batches: List[List[StrategyParameters]] = [
+            self.parameters[start : start + batch_size]
+            for start in range(0, len(self.parameters), batch_size)
+        ]
+        jobs: List[Tuple[Any, ...]] = [
+            (
+                stock.ticker,
+                date,
+                *portfolio.day_prices(stock.ticker, date),
+                parameter_batch,
+                portfolio.CAPITAL,
+                portfolio.open_time,
+                portfolio.end_time,
+            )
+            for date in portfolio.trade_dates
+            for stock in portfolio.stocks
+            for parameter_batch in parameter_batches
+        ]
+
+        records: List[Dict[str, Any]] = []
+        if workers is not None and workers > 1:
+            with ProcessPoolExecutor(max_workers=workers) as executor:
+                record_futures: List[Future] = [
+                    executor.submit(sweep_day_prices, *job) for job in jobs
+                ]
+
+                # Merging in submission order so the output matches the serial run
+                for record_future in record_futures:
+                    records.extend(record_future.result())
+        else:
+            for job in jobs:
+                records.extend(sweep_day_prices(*job))
+
+        log.LogInfo(
+            f"Swept {len(self.parameters)} parameter sets over {len(jobs) // len(parameter_batches)} stock days."
+        )
+        return pd.DataFrame(
+            records,
+            columns=[*StrategyParameters._fields, *REPORT_COLUMNS],
+        )
+
+
+def sweep_day_prices(
+    ticker: str,
+    trade_date: dt.datetime,
+    times: np.ndarray,
+    market_high: np.ndarray,
+    market_low: np.ndarray,
+    parameters: List[StrategyParameters],
+    CAPITAL: float,
+    open_time: int = Portfolio.open_time,
+    end_time: int = Portfolio.end_time,
+) -> List[Dict[str, Any]]:
+    """
+    Process pool entry point. Runs every parameter set over one stock and day, giving the same
+    daily report as Portfolio.simulate_trade for each.
+    """
+    market_mid: np.ndarray = (
+        pd.Series(market_high, dtype=float)
+        .add(pd.Series(market_low, dtype=float))
+        .div(2)
+    ).to_numpy()
+
+    # Bars without a mid are dropped, as Trade drops them
+    MID_PRESENT: np.ndarray = ~np.isnan(market_mid)
+    times, market_mid = np.asarray(times)[MID_PRESENT], market_mid[MID_PRESENT]
+    time_indices: np.ndarray = minute_indices(times)
+
+    # Each minute of the sim sees the last bar at or before it, as in run_day_batch
+    evaluation_times: pd.DatetimeIndex = pd.date_range(
+        trade_date.replace(hour=open_time, minute=30),
+        trade_date.replace(hour=end_time, minute=0),
+        freq="1min",
+        inclusive="left",
+    )
+    rows: np.ndarray = (
+        np.searchsorted(times, evaluation_times.to_numpy(), side="right") - 1
+    )
+    prices: np.ndarray = np.append(market_mid, np.nan)[rows] / 100
+
+    # Shared by every parameter set with the same windows
+    volatilities: Dict[int, Tuple[np.ndarray, ...]] = {}
+    regressions: Dict[Tuple[int, int], Tuple[np.ndarray, ...]] = {}
+
+    records: List[Dict[str, Any]] = []
+    for parameter_set in parameters:
+        if len(market_mid) == 0:
+            BUY: np.ndarray = np.zeros(0, dtype=bool)
+        else:
+            if parameter_set.reverse_points not in volatilities:
+                volatilities[parameter_set.reverse_points] = volatility_statistics(
+                    market_mid, parameter_set.reverse_points
+                )
+            regression_key: Tuple[int, int] = (
+                parameter_set.regression_points,
+                parameter_set.mins_to_the_future,
+            )
+            if regression_key not in regressions:
+                regressions[regression_key] = regression_statistics(
+                    time_indices, market_mid, *regression_key
+                )
+
+            BUY: np.ndarray = strategy_signals(
+                *volatilities[parameter_set.reverse_points],
+                *regressions[regression_key],
+                trend_threshold=parameter_set.trend_threshold,
+                width_threshold=parameter_set.width_threshold,
+            )
+
+        return_value, trade_count = simulate_signals(
+            np.append(BUY, False)[rows], prices, CAPITAL
+        )
+        records.append(
+            {
+                **parameter_set._asdict(),
+                "Date": trade_date,
+                "Ticker": ticker,
+                "Return": return_value,
+                "TradeCount": trade_count,
+            }
+        )
+    return records
+
+
+def simulate_signals(
+    buys: np.ndarray, prices: np.ndarray, CAPITAL: float
+) -> Tuple[float, int]:
+    """
+    The return and trade count of Portfolio.simulate_trade from the BUY flag and price of each
+    minute. Only the minutes where the flag flips are visited, in the same order of operations.
+    """
+    flips: np.ndarray = np.flatnonzero(np.diff(buys.astype(np.int8), prepend=0))
+    if len(flips) == 0:
+        return 0.0, 0
+
+    net_market_value: float = CAPITAL
+    position: float = 0.0
+    for flip in flips:
+        if buys[flip]:
+            position = net_market_value / prices[flip]
+        else:
+            net_market_value = position * prices[flip]
+
+    # The first buy also counts the opening trade
+    return net_market_value / CAPITAL - 1, len(flips) + 1
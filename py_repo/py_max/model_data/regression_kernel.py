@@ -0,0 +1,117 @@
+import numpy as np
+
+from typing import Tuple
+
+
+def trailing_windows(values: np.ndarray, window: int) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Stacks the trailing window ending at each row into a (rows, window) view. The start of the
+    day has fewer points than the window, so a mask of the valid entries is returned alongside.
+    """
+    values = np.asarray(values, dtype=float)
+    padded: np.ndarray = np.concatenate((np.full(window - 1, np.nan), values))
+    windows: np.ndarray = np.lib.stride_tricks.sliding_window_view(padded, window)
+
+    # Row i only has i + 1 points available when i + 1 < window
+    valid: np.ndarray = (
+        np.arange(window)[None, :] >= (window - 1 - np.arange(len(values)))[:, None]
+    )
+    return windows, valid
+
+
+def windowed_sum(values: np.ndarray, window: int) -> np.ndarray:
+    """Running sum of the trailing window ending at each row."""
+    cumulative: np.ndarray = np.concatenate(([0.0], np.cumsum(values)))
+    ends: np.ndarray = np.arange(1, len(values) + 1)
+    return cumulative[ends] - cumulative[np.maximum(ends - window, 0)]
+
+
+def rolling_least_squares(
+    x_data: np.ndarray, y_data: np.ndarray, window: int
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Slope and intercept of the least squares line through the trailing window ending at each row,
+    from running sums. A window with a single distinct x has a flat line through its mean, as sklearn.
+    """
+    x_data = np.asarray(x_data, dtype=float)
+    y_data = np.asarray(y_data, dtype=float)
+    if len(x_data) == 0:
+        return np.zeros(0), np.zeros(0)
+
+    # Shifting to the first point keeps the running sums small and avoids cancellation
+    x_origin: float = x_data[0]
+    y_origin: float = y_data[0]
+    x_shifted: np.ndarray = x_data - x_origin
+    y_shifted: np.ndarray = y_data - y_origin
+
+    counts: np.ndarray = windowed_sum(np.ones(len(x_data)), window)
+    sum_x: np.ndarray = windowed_sum(x_shifted, window)
+    sum_y: np.ndarray = windowed_sum(y_shifted, window)
+    sum_xx: np.ndarray = windowed_sum(x_shifted**2, window)
+    sum_xy: np.ndarray = windowed_sum(x_shifted * y_shifted, window)
+
+    denominator: np.ndarray = counts * sum_xx - sum_x**2
+    with np.errstate(invalid="ignore", divide="ignore"):
+        slope: np.ndarray = np.where(
+            denominator > 0, (counts * sum_xy - sum_x * sum_y) / denominator, 0.0
+        )
+
+    # Line passes through the window means, moved back from the shifted origin
+    intercept: np.ndarray = (
+        y_origin + sum_y / counts - slope * (x_origin + sum_x / counts)
+    )
+    return slope, intercept
+
+
+def extreme_pair(
+    windows: np.ndarray, valid: np.ndarray
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Window positions of the two highest points (pass negated windows for the lowest). That is the
+    first occurrence of the max, then the first occurrence of the largest value below it, or the
+    second occurrence of the max if every value is equal.
+    """
+    rows: np.ndarray = np.arange(len(windows))
+    masked: np.ndarray = np.where(valid, windows, -np.inf)
+
+    first_position: np.ndarray = masked.argmax(axis=1)
+    top_values: np.ndarray = masked[rows, first_position]
+    is_top: np.ndarray = valid & (windows == top_values[:, None])
+
+    # Largest value strictly below the max
+    is_other: np.ndarray = valid & ~is_top
+    has_other: np.ndarray = is_other.any(axis=1)
+    other_position: np.ndarray = np.where(is_other, windows, -np.inf).argmax(axis=1)
+
+    # Otherwise the second occurrence of the max
+    repeat_position: np.ndarray = (np.cumsum(is_top, axis=1) == 2).argmax(axis=1)
+
+    second_position: np.ndarray = np.where(has_other, other_position, repeat_position)
+    found: np.ndarray = has_other | (is_top.sum(axis=1) >= 2)
+    return first_position, second_position, found
+
+
+def rolling_extreme_line(
+    x_data: np.ndarray, y_data: np.ndarray, window: int, UPPER: bool = True
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Slope and intercept of the exact line through the two highest (UPPER) or lowest points of the
+    trailing window ending at each row. Nan where the window has fewer than two points.
+    """
+    x_windows, valid = trailing_windows(x_data, window)
+    y_windows, _ = trailing_windows(y_data, window)
+    rows: np.ndarray = np.arange(len(y_windows))
+
+    sign: float = 1.0 if UPPER else -1.0
+    first, second, found = extreme_pair(sign * y_windows, valid)
+
+    x_first: np.ndarray = x_windows[rows, first]
+    y_first: np.ndarray = y_windows[rows, first]
+    x_second: np.ndarray = x_windows[rows, second]
+    y_second: np.ndarray = y_windows[rows, second]
+
+    with np.errstate(invalid="ignore", divide="ignore"):
+        slope: np.ndarray = (y_second - y_first) / (x_second - x_first)
+    slope = np.where(found, slope, np.nan)
+    intercept: np.ndarray = y_first - slope * x_first
+    return slope, intercept
@@ -0,0 +1,330 @@
+import numpy as np
+import datetime as dt
+import math
+
+from collections import deque
+from typing import Deque, Dict, Optional, Tuple
+
+from py_max.model_data.algo_strat import Regressions
+
+
+class RunningVariance:
+    """Welford's running mean and sample variance (ddof=1, as pandas)."""
+
+    def __init__(self) -> None:
+        self.count: int = 0
+        self.mean: float = 0.0
+        self.sum_squares: float = 0.0
+
+    def add(self, value: float) -> None:
+        self.count += 1
+        delta: float = value - self.mean
+        self.mean += delta / self.count
+        self.sum_squares += delta * (value - self.mean)
+
+    @property
+    def std(self) -> float:
+        if self.count < 2:
+            return np.nan
+        return math.sqrt(max(self.sum_squares / (self.count - 1), 0.0))
+
+
+class WindowSum:
+    """
+    Sum of the last window values, as regression_kernel.windowed_sum gives it: the running total
+    now less the running total window values ago. Each value is an O(1) update.
+    """
+
+    def __init__(self, window: int) -> None:
+        self.total: float = 0.0
+        self.totals: Deque[float] = deque([0.0], maxlen=window + 1)
+
+    def add(self, value: float) -> None:
+        self.total += value
+        self.totals.append(self.total)
+
+    @property
+    def value(self) -> float:
+        return self.totals[-1] - self.totals[0]
+
+
+class WindowVariance:
+    """
+    Sample standard deviation (ddof=1) of the last window values, from window sums of the values
+    shifted to the first one, as expanding_std works over the whole day.
+    """
+
+    def __init__(self, window: int) -> None:
+        self.origin: Optional[float] = None
+        self.count: WindowSum = WindowSum(window)
+        self.sum: WindowSum = WindowSum(window)
+        self.sum_squares: WindowSum = WindowSum(window)
+
+    def add(self, value: float) -> None:
+        if self.origin is None:
+            self.origin = value
+        shifted: float = value - self.origin
+        self.count.add(1.0)
+        self.sum.add(shifted)
+        self.sum_squares.add(shifted * shifted)
+
+    @property
+    def std(self) -> float:
+        count: float = self.count.value
+        if count < 2:
+            return np.nan
+        total: float = self.sum.value
+        variance: float = (self.sum_squares.value - total * total / count) / (count - 1)
+        return math.sqrt(max(variance, 0.0))
+
+
+class WindowLeastSquares:
+    """
+    Least squares line through the last window points. The points are shifted to the day's first
+    point and summed as running totals, the same sums and arithmetic as
+    regression_kernel.rolling_least_squares over the day, so the line is identical to the batch
+    one. Each point is an O(1) update.
+    """
+
+    def __init__(self, window: int) -> None:
+        self.x_origin: Optional[float] = None
+        self.y_origin: Optional[float] = None
+        self.count: WindowSum = WindowSum(window)
+        self.sum_x: WindowSum = WindowSum(window)
+        self.sum_y: WindowSum = WindowSum(window)
+        self.sum_xx: WindowSum = WindowSum(window)
+        self.sum_xy: WindowSum = WindowSum(window)
+
+    def add(self, x_value: float, y_value: float) -> None:
+        if self.x_origin is None:
+            self.x_origin, self.y_origin = float(x_value), y_value
+        x_shifted: float = float(x_value) - self.x_origin
+        y_shifted: float = y_value - self.y_origin
+        self.count.add(1.0)
+        self.sum_x.add(x_shifted)
+        self.sum_y.add(y_shifted)
+        self.sum_xx.add(x_shifted * x_shifted)
+        self.sum_xy.add(x_shifted * y_shifted)
+
+    def line(self) -> Tuple[float, float]:
+        """Slope and intercept, a flat line through the mean when there is a single distinct x."""
+        count: float = self.count.value
+        sum_x: float = self.sum_x.value
+        sum_y: float = self.sum_y.value
+
+        denominator: float = count * self.sum_xx.value - sum_x * sum_x
+        slope: float = (
+            (count * self.sum_xy.value - sum_x * sum_y) / denominator
+            if denominator > 0
+            else 0.0
+        )
+        intercept: float = (
+            self.y_origin + sum_y / count - slope * (self.x_origin + sum_x / count)
+        )
+        return slope, intercept
+
+
+class ExtremeTracker:
+    """
+    Tracks the two highest (UPPER) or lowest points of a sliding window of (position, x, y) bars,
+    with the same tie rules as regression_kernel.extreme_pair: the first occurrence of the top
+    value, then the first occurrence of the best value below it, else the top value's second
+    occurrence. A new bar is an O(1) update, only losing one of the pair rescans the window.
+    """
+
+    def __init__(self, UPPER: bool = True) -> None:
+        self.sign: float = 1.0 if UPPER else -1.0
+        self.top: Optional[Tuple[int, float, float]] = None
+        self.second: Optional[Tuple[int, float, float]] = None
+        # Whether second is a repeat of the top value rather than a value below it
+        self.REPEAT: bool = False
+
+    def add(self, bar: Tuple[int, float, float]) -> None:
+        value: float = self.sign * bar[2]
+        if self.top is None:
+            self.top = bar
+        elif value > self.sign * self.top[2]:
+            # The old top is now the best value below the top
+            self.top, self.second, self.REPEAT = bar, self.top, False
+        elif value == self.sign * self.top[2]:
+            if self.second is None:
+                self.second, self.REPEAT = bar, True
+        elif self.second is None or self.REPEAT:
+            self.second, self.REPEAT = bar, False
+        elif value > self.sign * self.second[2]:
+            self.second = bar
+
+    def evict(
+        self, bar: Tuple[int, float, float], window: Deque[Tuple[int, float, float]]
+    ) -> None:
+        """Called once the bar has left the window."""
+        if bar is self.top or bar is self.second:
+            self.rescan(window)
+
+    def rescan(self, window: Deque[Tuple[int, float, float]]) -> None:
+        self.top, self.second, self.REPEAT = None, None, False
+        for bar in window:
+            self.add(bar)
+
+    def line(self) -> Tuple[float, float]:
+        """Slope and intercept of the line through the pair, nan without two points."""
+        if self.second is None:
+            return np.nan, np.nan
+
+        _, x_first, y_first = self.top
+        _, x_second, y_second = self.second
+        with np.errstate(invalid="ignore", divide="ignore"):
+            slope: float = np.float64(y_second - y_first) / np.float64(
+                x_second - x_first
+            )
+        return slope, y_first - slope * x_first
+
+
+class SignalEngine:
+    """
+    Streaming version of the Trade.run_day decision for live data. Takes the day's bars one at
+    a time and gives the BUY flag run_day would give at that bar, keeping only running
+    statistics and a ring buffer of the last few bars, so each bar is an O(1) update. A bar from
+    a new day starts afresh.
+    """
+
+    def __init__(
+        self,
+        reverse_points: int = 10,
+        regression_points: int = 10,
+        mins_to_the_future: int = 10,
+        trend_threshold: float = 0.1,
+        width_threshold: float = 1.0,
+    ) -> None:
+        self.reverse_points: int = reverse_points
+        self.regression_points: int = regression_points
+        self.mins_to_the_future: int = mins_to_the_future
+        self.trend_threshold: float = trend_threshold
+        self.width_threshold: float = width_threshold
+        self.reset()
+
+    def __repr__(self) -> str:
+        return f"Signal engine at {self.last_time} after {self.total.count} bars"
+
+    def reset(self) -> None:
+        self.day: Optional[dt.date] = None
+        self.BUY: bool = False
+        self.first_time: Optional[np.datetime64] = None
+        self.last_time: Optional[np.datetime64] = None
+
+        self.total: RunningVariance = RunningVariance()
+        self.inscope: WindowVariance = WindowVariance(self.reverse_points)
+        self.trend: WindowLeastSquares = WindowLeastSquares(self.regression_points)
+        self.regression_window: Deque[Tuple[int, float, float]] = deque(
+            maxlen=self.regression_points
+        )
+        self.upper: ExtremeTracker = ExtremeTracker(UPPER=True)
+        self.lower: ExtremeTracker = ExtremeTracker(UPPER=False)
+
+    def update(self, time: dt.datetime, value: float) -> bool:
+        """
+        Adds the next bar's time and mid, returning the BUY flag as at that bar. A bar without a
+        mid is skipped, as Trade drops it, and the flag stays as it was.
+        """
+        bar_time: np.datetime64 = np.datetime64(time, "ns")
+        bar_day: dt.date = bar_time.astype("datetime64[D]").item()
+        if math.isnan(value):
+            return self.BUY if bar_day == self.day else False
+
+        if bar_day != self.day:
+            self.reset()
+            self.day = bar_day
+            self.first_time = bar_time
+        elif bar_time <= self.last_time:
+            raise ValueError("Bars must be given in ascending time without repeats.")
+        self.last_time = bar_time
+
+        value = float(value)
+        x_value: int = int((bar_time - self.first_time) // np.timedelta64(1, "m"))
+
+        self.total.add(value)
+        self.inscope.add(value)
+        self.trend.add(x_value, value)
+
+        bar: Tuple[int, float, float] = (self.total.count, x_value, value)
+        evicted: Optional[Tuple[int, float, float]] = None
+        if len(self.regression_window) == self.regression_points:
+            evicted = self.regression_window[0]
+        self.regression_window.append(bar)
+        for tracker in (self.upper, self.lower):
+            tracker.add(bar)
+            if evicted is not None:
+                tracker.evict(evicted, self.regression_window)
+
+        self.BUY = self.signal()
+        return self.BUY
+
+    def signal(self) -> bool:
+        total_daily_vol: float = self.total.std
+        if self.total.count <= self.reverse_points:
+            # Both are the std of the whole day so far, same as run_day
+            inscope_vol: float = total_daily_vol
+        else:
+            inscope_vol: float = self.inscope.std
+
+        x_start: float = float(self.regression_window[0][1])
+        x_end: float = float(self.regression_window[-1][1] + self.mins_to_the_future)
+        span: float = x_end - x_start
+
+        lines: Dict[Regressions, Tuple[float, float]] = {
+            Regressions.FULL: self.trend.line(),
+            Regressions.UPPER: self.upper.line(),
+            Regressions.LOWER: self.lower.line(),
+        }
+        regged_start: Dict[Regressions, float] = {
+            regression: intercept + slope * x_start
+            for regression, (slope, intercept) in lines.items()
+        }
+        regged_end: Dict[Regressions, float] = {
+            regression: intercept + slope * x_end
+            for regression, (slope, intercept) in lines.items()
+        }
+
+        with np.errstate(invalid="ignore", divide="ignore"):
+            trend_grad: float = (
+                np.float64(
+                    regged_end[Regressions.FULL] - regged_start[Regressions.FULL]
+                )
+                / span
+            )
+            upper_grad: float = (
+                np.float64(
+                    regged_end[Regressions.UPPER] - regged_start[Regressions.UPPER]
+                )
+                / span
+            )
+            lower_grad: float = (
+                np.float64(
+                    regged_end[Regressions.LOWER] - regged_start[Regressions.LOWER]
+                )
+                / span
+            )
+        end_minus_end: float = (
+            regged_end[Regressions.UPPER] - regged_end[Regressions.LOWER]
+        )
+        start_minus_start: float = (
+            regged_start[Regressions.UPPER] - regged_start[Regressions.LOWER]
+        )
+
+        ### - BASIC STRATEGY CONDITIONS - ###
+        BUY: bool = False
+        # Never buy if we are trending downwards on a small time scale
+        if trend_grad <= self.trend_threshold:
+            pass
+        # Condition on keeping the volatility low
+        elif inscope_vol > total_daily_vol:
+            pass
+        # If the upper and lower regressions are greater than zero, definitely buy
+        elif (upper_grad > 0) & (lower_grad > 0):
+            BUY = True
+        # Else, we are trending upwards and now testing whether the 'variance' is narrowing
+        elif (abs(start_minus_start) < self.width_threshold) & (
+            start_minus_start - end_minus_end > 0
+        ):
+            BUY = True
+        return bool(BUY)
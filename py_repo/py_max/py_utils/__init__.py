@@ -1,2 +1,26 @@
 from py_max.py_utils.error_logging import ErrorLogger
-from py_max.py_utils.sql import DatabaseConnector, SQLYahooData, ExecuteQuery, DBChoice
+from py_max.py_utils.instrumentation import (
+    Instrumentation,
+    INSTRUMENTATION,
+    enable_instrumentation,
+    profile_run,
+    timed,
+    timer,
+    add_count,
+)
+from py_max.py_utils.sql import (
+    DatabaseConnector,
+    SQLYahooData,
+    YAHOO_DATA_SCHEMA,
+    yahoo_data_table,
+    BarQuery,
+    query_columns,
+    ExecuteQuery,
+    StreamQuery,
+    DBChoice,
+    configure_engine,
+    get_engine,
+    dispose_engines,
+)
+from py_max.py_utils.prefetch import Prefetcher
+from py_max.py_utils.trading_calendar import trading_days, is_trading_day
@@ -0,0 +1,158 @@
+import pandas as pd
+import cProfile
+import pstats
+import os
+import threading
+import time
+
+from contextlib import contextmanager
+from functools import wraps
+from pathlib import Path
+from typing import Callable, Dict, Iterator, List
+
+try:
+    import pyinstrument
+except ImportError:  # Optional, cProfile is used otherwise
+    pyinstrument = None
+
+
+class Instrumentation:
+    """
+    Opt-in process wide timers and counters. Off unless enabled, or PY_MAX_INSTRUMENT=1 is set,
+    in which case every hook is a single flag check. Process pool workers keep their own.
+    """
+
+    def __init__(self) -> None:
+        self.ENABLED: bool = os.environ.get("PY_MAX_INSTRUMENT", "0") == "1"
+        self._lock: threading.Lock = threading.Lock()
+        self.reset()
+
+    def reset(self) -> None:
+        with self._lock:
+            self.calls: Dict[str, int] = {}
+            self.seconds: Dict[str, float] = {}
+            self.max_seconds: Dict[str, float] = {}
+            self.counters: Dict[str, float] = {}
+
+    def record_time(self, name: str, seconds: float) -> None:
+        with self._lock:
+            self.calls[name] = self.calls.get(name, 0) + 1
+            self.seconds[name] = self.seconds.get(name, 0.0) + seconds
+            self.max_seconds[name] = max(self.max_seconds.get(name, 0.0), seconds)
+
+    def add_count(self, name: str, value: float = 1) -> None:
+        if not self.ENABLED:
+            return
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + value
+
+    @contextmanager
+    def timer(self, name: str) -> Iterator[None]:
+        if not self.ENABLED:
+            yield
+            return
+
+        start: float = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record_time(name, time.perf_counter() - start)
+
+    def timed(self, name: str) -> Callable:
+        """Decorator timing every call of the function under the name."""
+
+        def decorator(func: Callable) -> Callable:
+            @wraps(func)
+            def wrapper(*args, **kwargs):
+                if not self.ENABLED:
+                    return func(*args, **kwargs)
+
+                start: float = time.perf_counter()
+                try:
+                    return func(*args, **kwargs)
+                finally:
+                    self.record_time(name, time.perf_counter() - start)
+
+            return wrapper
+
+        return decorator
+
+    def summary(self) -> pd.DataFrame:
+        """A row per timer, slowest in total first."""
+        with self._lock:
+            timers: List[Dict[str, float]] = [
+                {
+                    "Name": name,
+                    "Calls": calls,
+                    "TotalSeconds": self.seconds[name],
+                    "MeanSeconds": self.seconds[name] / calls,
+                    "MaxSeconds": self.max_seconds[name],
+                }
+                for name, calls in self.calls.items()
+            ]
+        return pd.DataFrame(
+            timers,
+            columns=["Name", "Calls", "TotalSeconds", "MeanSeconds", "MaxSeconds"],
+        ).sort_values("TotalSeconds", ascending=False, ignore_index=True)
+
+    def counter_summary(self) -> pd.DataFrame:
+        with self._lock:
+            return pd.DataFrame(
+                list(self.counters.items()), columns=["Name", "Count"]
+            ).sort_values("Name", ignore_index=True)
+
+    def report(self) -> str:
+        return "\n\n".join(
+            [
+                self.summary().to_string(index=False, float_format="{:.6f}".format),
+                self.counter_summary().to_string(index=False),
+            ]
+        )
+
+
+INSTRUMENTATION: Instrumentation = Instrumentation()
+
+
+def enable_instrumentation(ENABLED: bool = True) -> Instrumentation:
+    INSTRUMENTATION.ENABLED = ENABLED
+    return INSTRUMENTATION
+
+
+# Module level shortcuts for the hooks
+timed: Callable = INSTRUMENTATION.timed
+timer: Callable = INSTRUMENTATION.timer
+add_count: Callable = INSTRUMENTATION.add_count
+
+
+@contextmanager
+def profile_run(output_path: str, top: int = 50) -> Iterator[None]:
+    """
+    Profiles the block. With a .html path and pyinstrument installed, a pyinstrument page is
+    written, otherwise the cProfile stats (for snakeviz and the like) go to the path and the
+    top functions by cumulative time to a .txt beside it.
+    """
+    path: Path = Path(output_path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+
+    if path.suffix.lower() == ".html" and pyinstrument is not None:
+        profiler: pyinstrument.Profiler = pyinstrument.Profiler()
+        profiler.start()
+        try:
+            yield
+        finally:
+            profiler.stop()
+            path.write_text(profiler.output_html())
+        return
+
+    if path.suffix.lower() == ".html":
+        path = path.with_suffix(".prof")
+
+    profile: cProfile.Profile = cProfile.Profile()
+    profile.enable()
+    try:
+        yield
+    finally:
+        profile.disable()
+        profile.dump_stats(path)
+        with open(path.with_suffix(".txt"), "w") as file:
+            pstats.Stats(profile, stream=file).sort_stats("cumulative").print_stats(top)
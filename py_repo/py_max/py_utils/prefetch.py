@@ -0,0 +1,67 @@
+import queue
+import threading
+
+from typing import Any, Iterable, Iterator, Optional, Tuple
+
+from py_max.py_utils.instrumentation import timer
+
+
+class Prefetcher:
+    """
+    Iterates over the items on a background thread, keeping up to lookahead of them ready in a
+    bounded queue. The producer blocks while the queue is full, so it never gets more than
+    lookahead items ahead. Its exceptions are raised in the consumer, and stopping iteration
+    early stops the producer.
+    """
+
+    # Marks the end of the items
+    _DONE: object = object()
+
+    def __init__(self, items: Iterable[Any], lookahead: int = 1) -> None:
+        self.items: Iterable[Any] = items
+        self.queue: queue.Queue = queue.Queue(maxsize=max(lookahead, 1))
+        self.stop_event: threading.Event = threading.Event()
+        self.thread: threading.Thread = threading.Thread(
+            target=self.produce, name="py_max-prefetch", daemon=True
+        )
+
+    def __repr__(self) -> str:
+        return (
+            f"Prefetcher with {self.queue.qsize()} of {self.queue.maxsize} items ready"
+        )
+
+    def produce(self) -> None:
+        try:
+            for item in self.items:
+                if not self.put((item, None)):
+                    return
+        except BaseException as error:
+            self.put((None, error))
+            return
+        self.put((self._DONE, None))
+
+    def put(self, entry: Tuple[Any, Optional[BaseException]]) -> bool:
+        """Waits for space in the queue, giving up once the consumer has stopped."""
+        while not self.stop_event.is_set():
+            try:
+                self.queue.put(entry, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def __iter__(self) -> Iterator[Any]:
+        self.thread.start()
+        try:
+            while True:
+                # Time spent here is I/O the lookahead didn't hide
+                with timer("prefetch.wait"):
+                    item, error = self.queue.get()
+                if error is not None:
+                    raise error
+                if item is self._DONE:
+                    return
+                yield item
+        finally:
+            self.stop_event.set()
+            self.thread.join()
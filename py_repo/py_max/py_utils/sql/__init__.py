@@ -1,6 +1,15 @@
-from py_max.py_utils.sql.yahoo_fin_data import SQLYahooData
+from py_max.py_utils.sql.yahoo_fin_data import (
+    SQLYahooData,
+    YAHOO_DATA_SCHEMA,
+    yahoo_data_table,
+)
+from py_max.py_utils.sql.bar_query import BarQuery, query_columns
 from py_max.py_utils.sql.database_connector import (
     DatabaseConnector,
     DBChoice,
     ExecuteQuery,
+    StreamQuery,
+    configure_engine,
+    get_engine,
+    dispose_engines,
 )
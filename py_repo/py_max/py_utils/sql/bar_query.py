@@ -0,0 +1,152 @@
+import sqlalchemy as db
+import datetime as dt
+
+from typing import Any, Iterable, List, Optional, Tuple
+
+from py_max.py_utils.sql.yahoo_fin_data import (
+    SQLYahooData,
+    YAHOO_DATA_SCHEMA,
+    yahoo_data_table,
+)
+
+
+def query_columns(columns: Optional[Iterable[str]] = None) -> List[str]:
+    """The yahooData columns to read in table order, always including the time. All of them when None."""
+    if columns is None:
+        return list(YAHOO_DATA_SCHEMA)
+
+    columns = list(columns)
+    unknown_columns: List[str] = [
+        column for column in columns if column not in YAHOO_DATA_SCHEMA
+    ]
+    if unknown_columns:
+        raise ValueError(f"Not columns of yahooData: {unknown_columns}")
+
+    return [
+        column
+        for column in YAHOO_DATA_SCHEMA
+        if column == SQLYahooData.as_at_date or column in columns
+    ]
+
+
+def padded(values: List[Any]) -> List[Any]:
+    """
+    Pads the list to the next power of two by repeating its last value. An IN list (or OR of day
+    ranges) is sent as parameters per value, so padding keeps the number of distinct statements
+    (and plans) small.
+    """
+    if not values:
+        return values
+    size: int = 1 << (len(values) - 1).bit_length()
+    return values + [values[-1]] * (size - len(values))
+
+
+def as_datetime(day: dt.date) -> dt.datetime:
+    """DateTime parameters need a datetime, a date is taken as its midnight."""
+    if isinstance(day, dt.datetime):
+        return day
+    return dt.datetime.combine(day, dt.time())
+
+
+def day_runs(days: Iterable[dt.date]) -> List[Tuple[dt.datetime, dt.datetime]]:
+    """The days as [start, end) ranges, consecutive days merged into a single range."""
+    runs: List[Tuple[dt.datetime, dt.datetime]] = []
+    for day_start in sorted({as_datetime(day) for day in days}):
+        day_end: dt.datetime = day_start + dt.timedelta(days=1)
+        if runs and runs[-1][1] == day_start:
+            runs[-1] = (runs[-1][0], day_end)
+        else:
+            runs.append((day_start, day_end))
+    return runs
+
+
+class BarQuery:
+    """
+    Builds reads of stk.yahooData as SQLAlchemy Core selects for ExecuteQuery methods to return.
+    Every value is a bound parameter rather than part of the SQL text, and the securities are an
+    expanding IN, so the database reuses a plan across tickers and days. Works against SQLite too.
+    """
+
+    def __init__(self, columns: Optional[Iterable[str]] = None) -> None:
+        self.table: db.Table = yahoo_data_table()
+        self.columns: List[str] = query_columns(columns)
+        self.securities: Optional[List[str]] = None
+        self.start_date: Optional[dt.datetime] = None
+        self.end_date: Optional[dt.datetime] = None
+        self.day_ranges: Optional[List[Tuple[dt.datetime, dt.datetime]]] = None
+        self.ORDERED: bool = False
+
+    def __repr__(self) -> str:
+        return str(self.select())
+
+    def for_securities(self, securities: Iterable[str]) -> "BarQuery":
+        self.securities = list(dict.fromkeys(securities))
+        return self
+
+    def between(
+        self,
+        start_date: Optional[dt.date] = None,
+        end_date: Optional[dt.date] = None,
+    ) -> "BarQuery":
+        """From the start date up to (not including) the end date, either end open when None."""
+        self.start_date = as_datetime(start_date) if start_date is not None else None
+        self.end_date = as_datetime(end_date) if end_date is not None else None
+        return self
+
+    def on_days(self, days: Iterable[dt.date]) -> "BarQuery":
+        """Only the given days, rather than everything between the first and last of them."""
+        self.day_ranges = day_runs(days)
+        return self
+
+    def ordered(self) -> "BarQuery":
+        """Sorted by security then time, so a stream of the rows can be split into days as it goes."""
+        self.ORDERED = True
+        return self
+
+    def conditions(self) -> List[db.ColumnElement]:
+        conditions: List[db.ColumnElement] = []
+        if self.securities is not None:
+            conditions.append(
+                self.table.c[SQLYahooData.security].in_(padded(self.securities))
+            )
+        if self.start_date is not None:
+            conditions.append(self.table.c[SQLYahooData.as_at_date] >= self.start_date)
+        if self.end_date is not None:
+            conditions.append(self.table.c[SQLYahooData.as_at_date] < self.end_date)
+        if self.day_ranges is not None:
+            time_column: db.Column = self.table.c[SQLYahooData.as_at_date]
+            conditions.append(
+                db.or_(
+                    db.false(),
+                    *[
+                        db.and_(time_column >= start_date, time_column < end_date)
+                        for start_date, end_date in padded(self.day_ranges)
+                    ],
+                )
+            )
+        return conditions
+
+    def select(self) -> db.Select:
+        """The bars' columns."""
+        query: db.Select = db.select(
+            *[self.table.c[column] for column in self.columns]
+        ).where(*self.conditions())
+        if self.ORDERED:
+            query = query.order_by(
+                self.table.c[SQLYahooData.security],
+                self.table.c[SQLYahooData.as_at_date],
+            )
+        return query
+
+    def latest_times(self) -> db.Select:
+        """The latest time of each security, a single row per security."""
+        return (
+            db.select(
+                self.table.c[SQLYahooData.security],
+                db.func.max(self.table.c[SQLYahooData.as_at_date]).label(
+                    SQLYahooData.as_at_date
+                ),
+            )
+            .where(*self.conditions())
+            .group_by(self.table.c[SQLYahooData.security])
+        )
@@ -1,20 +1,167 @@
 import sqlalchemy as db
 import pandas as pd
+import numpy as np
 import json
+import os
+import threading
+import time
 
 from sqlalchemy.engine.base import Engine, Connection
 from enum import Enum
-from typing import Callable, Dict
+from typing import Callable, Dict, Any, Optional, Iterator, List, Tuple, Union
 from functools import wraps
 
+from py_max.py_utils.sql.yahoo_fin_data import SQLYahooData
+from py_max.py_utils.instrumentation import INSTRUMENTATION, timer, add_count
+
+# Keys file holding the LOCAL connection string, read on first use unless PY_MAX_DB_CONNECTION is set
 KEYS_PATH: str = """C:/Users/User/Documents/Data/keys.json"""
-with open(KEYS_PATH) as file:
-    key_data: Dict[str, str] = json.load(file)
-    local_connection_string: str = key_data["DB_CONNECTION"]
 
 
 class DBChoice(Enum):
-    LOCAL: str = local_connection_string
+    # SQL Server, from PY_MAX_DB_CONNECTION or the DB_CONNECTION of the keys file
+    LOCAL: str = "Local"
+
+    # Local stand-in for tests and benchmarks, in memory unless PY_MAX_SQLITE_URL is set
+    SQLITE: str = "SQLite"
+
+    @property
+    def connection_string(self) -> str:
+        return resolve_connection_string(self)
+
+
+# Resolved when a database is first used rather than on import
+_CONNECTION_STRINGS: Dict[DBChoice, str] = {}
+
+
+def resolve_connection_string(db_choice: DBChoice) -> str:
+    connection_string: Optional[str] = _CONNECTION_STRINGS.get(db_choice)
+    if connection_string is not None:
+        return connection_string
+
+    if db_choice == DBChoice.SQLITE:
+        connection_string = os.environ.get("PY_MAX_SQLITE_URL", "sqlite:///:memory:")
+    else:
+        connection_string = os.environ.get("PY_MAX_DB_CONNECTION")
+        if connection_string is None:
+            keys_path: str = os.environ.get("PY_MAX_KEYS_PATH", KEYS_PATH)
+            try:
+                with open(keys_path) as file:
+                    connection_string = json.load(file)["DB_CONNECTION"]
+            except FileNotFoundError as error:
+                raise FileNotFoundError(
+                    f"No connection string for {db_choice.name}. Set PY_MAX_DB_CONNECTION, or PY_MAX_KEYS_PATH to a keys file with DB_CONNECTION."
+                ) from error
+
+    _CONNECTION_STRINGS[db_choice] = connection_string
+    return connection_string
+
+
+# Pool settings used for every engine unless overridden through configure_engine
+DEFAULT_ENGINE_OPTIONS: Dict[str, Any] = {
+    "pool_size": 5,
+    "max_overflow": 10,
+    "pool_pre_ping": True,
+    "pool_recycle": 3600,
+}
+
+# Process wide registry, so every query reuses the pooled connections of its database
+_ENGINES: Dict[DBChoice, Engine] = {}
+_ENGINE_OPTIONS: Dict[DBChoice, Dict[str, Any]] = {}
+_ENGINE_PID: int = os.getpid()
+_ENGINE_LOCK: threading.Lock = threading.Lock()
+
+
+def configure_engine(db_choice: DBChoice, **engine_options: Any) -> None:
+    """
+    Overrides the pool settings (pool_size, max_overflow, pool_pre_ping, pool_recycle or any
+    other create_engine argument) for a database. An existing engine is disposed so that the
+    next query picks up the new settings.
+    """
+    with _ENGINE_LOCK:
+        _ENGINE_OPTIONS[db_choice] = {
+            **_ENGINE_OPTIONS.get(db_choice, {}),
+            **engine_options,
+        }
+        engine: Engine = _ENGINES.pop(db_choice, None)
+        if engine is not None:
+            engine.dispose()
+
+
+def get_engine(db_choice: DBChoice) -> Engine:
+    """Returns the shared engine for the database, creating it on first use."""
+    with _ENGINE_LOCK:
+        # A forked child must never use the connections of its parent
+        if _ENGINE_PID != os.getpid():
+            _forget_engines()
+
+        engine: Engine = _ENGINES.get(db_choice)
+        if engine is None:
+            engine = db.create_engine(
+                db_choice.connection_string, echo=False, **_engine_options(db_choice)
+            )
+            if engine.dialect.name == "sqlite":
+                db.event.listen(engine, "connect", _attach_sqlite_schema)
+            _ENGINES[db_choice] = engine
+        return engine
+
+
+def dispose_engines() -> None:
+    """Closes every pooled connection, e.g. at the end of a job."""
+    with _ENGINE_LOCK:
+        for engine in _ENGINES.values():
+            engine.dispose()
+        _ENGINES.clear()
+
+
+def _engine_options(db_choice: DBChoice) -> Dict[str, Any]:
+    options: Dict[str, Any] = {
+        **DEFAULT_ENGINE_OPTIONS,
+        **_ENGINE_OPTIONS.get(db_choice, {}),
+    }
+
+    url: db.URL = db.engine.make_url(db_choice.connection_string)
+    if url.get_backend_name() == "sqlite":
+        # SQLite doesn't use a sized queue pool
+        options.pop("pool_size", None)
+        options.pop("max_overflow", None)
+    elif url.get_backend_name() == "mssql" and url.get_driver_name() == "pyodbc":
+        # Sends executemany inserts as parameter arrays rather than row by row
+        options.setdefault("fast_executemany", True)
+    return options
+
+
+def _attach_sqlite_schema(dbapi_connection: Any, connection_record: Any) -> None:
+    """SQLite has no schemas, so the tables' schema is an attached database of the same name."""
+    database: str = dbapi_connection.execute("PRAGMA database_list").fetchone()[2]
+    schema_database: str = (
+        f"{database}.{SQLYahooData.schema}" if database else ":memory:"
+    )
+    dbapi_connection.execute(
+        f"ATTACH DATABASE '{schema_database}' AS {SQLYahooData.schema}"
+    )
+
+
+def _forget_engines() -> None:
+    """Drops the engines inherited from a parent process without closing its connections."""
+    global _ENGINE_PID
+
+    for engine in _ENGINES.values():
+        engine.dispose(close=False)
+    _ENGINES.clear()
+    _ENGINE_PID = os.getpid()
+
+
+def _reset_after_fork() -> None:
+    """The lock may have been held by another thread of the parent when it forked."""
+    global _ENGINE_LOCK
+
+    _ENGINE_LOCK = threading.Lock()
+    _forget_engines()
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reset_after_fork)
 
 
 class DatabaseConnector:
@@ -23,22 +170,31 @@ class DatabaseConnector:
         self.db_choice: DBChoice = db_choice
 
     def __enter__(self) -> Connection:
-        self.engine: Engine = db.create_engine(self.db_choice.value, echo=False)
+        self.engine: Engine = get_engine(self.db_choice)
         self.connected_engine: Connection = self.engine.connect()
         return self.connected_engine
 
     def __exit__(self, exception_type, exception_value, traceback):
+        # Returns the connection to the pool, the engine stays alive for the next query
         self.connected_engine.close()
-        self.engine.dispose()
 
 
 class ExecuteQuery:
     def __init__(
-        self, db_choice: DBChoice = DBChoice.LOCAL, ALLOW_EMPTY: bool = True
+        self, db_choice: Optional[DBChoice] = None, ALLOW_EMPTY: bool = True
     ) -> None:
-        self.db_choice: DBChoice = db_choice
+        # Without a choice, methods query their instance's db_choice, otherwise LOCAL
+        self.db_choice: Optional[DBChoice] = db_choice
         self.ALLOW_EMPTY: bool = ALLOW_EMPTY
 
+    def choose_db(self, args: Tuple[Any, ...]) -> DBChoice:
+        db_choice: Optional[DBChoice] = self.db_choice
+        if db_choice is None:
+            db_choice = getattr(args[0] if args else None, "db_choice", None)
+        if not isinstance(db_choice, DBChoice):
+            db_choice = DBChoice.LOCAL
+        return db_choice
+
     def __call__(self, func: Callable) -> Callable:
         @wraps(func)
         def executor(*args, **kwargs) -> pd.DataFrame:
@@ -46,9 +202,15 @@ class ExecuteQuery:
             query: db.TextClause = func(*args, **kwargs)
 
             # Executing the query
-            with DatabaseConnector(db_choice=self.db_choice) as connection:
+            with timer("sql.query"), DatabaseConnector(
+                db_choice=self.choose_db(args)
+            ) as connection:
                 data: pd.DataFrame = pd.read_sql(query, connection)
 
+            if INSTRUMENTATION.ENABLED:
+                add_count("sql.rows", len(data))
+                add_count("sql.bytes", int(data.memory_usage(deep=True).sum()))
+
             if not self.ALLOW_EMPTY:
                 if data.empty:
                     raise ValueError("Returning empty data. Check validity of query")
@@ -56,3 +218,91 @@ class ExecuteQuery:
             return data
 
         return executor
+
+
+class StreamQuery(ExecuteQuery):
+    """
+    Like ExecuteQuery, but the method gives an iterator of chunks of at most chunksize rows,
+    fetched through a server side cursor so only one chunk is held at a time. Callers can pass
+    chunksize= to override the default. The chunks are typed from the query's column types, so
+    they all have the same dtypes however many nulls each holds. With NUMPY, each chunk is a
+    dict of column arrays rather than a DataFrame.
+    """
+
+    def __init__(
+        self,
+        db_choice: Optional[DBChoice] = None,
+        chunksize: int = 100_000,
+        NUMPY: bool = False,
+    ) -> None:
+        super().__init__(db_choice)
+        self.chunksize: int = chunksize
+        self.NUMPY: bool = NUMPY
+
+    def __call__(self, func: Callable) -> Callable:
+        @wraps(func)
+        def executor(
+            *args, **kwargs
+        ) -> Iterator[Union[pd.DataFrame, Dict[str, np.ndarray]]]:
+            chunksize: int = kwargs.pop("chunksize", self.chunksize)
+            query: db.Executable = func(*args, **kwargs)
+            dtypes: Dict[str, str] = column_dtypes(query)
+
+            with DatabaseConnector(db_choice=self.choose_db(args)) as connection:
+                start: float = time.perf_counter()
+                # yield_per streams the rows and sets the size of each partition
+                result: db.CursorResult = connection.execution_options(
+                    yield_per=chunksize
+                ).execute(query)
+                columns: List[str] = list(result.keys())
+
+                for rows in result.partitions():
+                    data: pd.DataFrame = typed_chunk(rows, columns, dtypes)
+
+                    # Each partition is timed as a read, the statement itself with the first one
+                    if INSTRUMENTATION.ENABLED:
+                        INSTRUMENTATION.record_time(
+                            "sql.query", time.perf_counter() - start
+                        )
+                        add_count("sql.rows", len(data))
+                        add_count("sql.bytes", int(data.memory_usage(deep=True).sum()))
+                        add_count("sql.chunks")
+
+                    if self.NUMPY:
+                        yield {column: column_array(data[column]) for column in columns}
+                    else:
+                        yield data
+                    start = time.perf_counter()
+
+        return executor
+
+
+def column_dtypes(query: db.Executable) -> Dict[str, str]:
+    """The dtypes of the query's time and numeric columns. Text queries are left to inference."""
+    dtypes: Dict[str, str] = {}
+    for column in getattr(query, "selected_columns", []):
+        if isinstance(column.type, db.DateTime):
+            dtypes[column.name] = "datetime64[ns]"
+        elif isinstance(column.type, db.Float):
+            dtypes[column.name] = "float64"
+        elif isinstance(column.type, db.Integer):
+            dtypes[column.name] = "Int64"
+    return dtypes
+
+
+def typed_chunk(
+    rows: List[Any], columns: List[str], dtypes: Dict[str, str]
+) -> pd.DataFrame:
+    data: pd.DataFrame = pd.DataFrame.from_records(rows, columns=columns)
+    return data.astype(
+        {column: dtype for column, dtype in dtypes.items() if column in data.columns}
+    )
+
+
+def column_array(values: pd.Series) -> np.ndarray:
+    """A NumPy array of the column, nullable integers as floats when they hold nulls."""
+    if isinstance(values.dtype, pd.Int64Dtype):
+        if values.isna().any():
+            return values.to_numpy(dtype=np.float64, na_value=np.nan)
+        return values.to_numpy(dtype=np.int64)
+    return values.to_numpy()
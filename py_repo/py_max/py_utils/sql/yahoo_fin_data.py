@@ -1,5 +1,12 @@
+import sqlalchemy as db
+
+from sqlalchemy.types import Integer, String, DateTime, Float
+from typing import Optional
+
+
 class SQLYahooData:
     table_name: str = "yahooData"
+    staging_table_name: str = "yahooDataStaging"
     schema: str = "stk"
     as_at_date: str = "AsAtDateTime"
     market_high: str = "MarketHigh"
@@ -17,3 +24,41 @@ class SQLYahooData:
     # User defined
     date: str = "Date"
     market_mid: str = "MarketMid"
+
+
+# Column types of the table, in table order
+YAHOO_DATA_SCHEMA: dict = {
+    SQLYahooData.as_at_date: DateTime,
+    SQLYahooData.security: String(255),
+    SQLYahooData.currency: String(255),
+    SQLYahooData.market_low: Float,
+    SQLYahooData.market_high: Float,
+    SQLYahooData.market_open: Float,
+    SQLYahooData.market_close: Float,
+    SQLYahooData.market_volume: Float,
+    SQLYahooData.instrument_type: String(255),
+    SQLYahooData.exchange_name: String(255),
+    SQLYahooData.time_zone: String(255),
+    SQLYahooData.gmt_off_set: Integer,
+}
+
+
+def yahoo_data_table(
+    table_name: str = SQLYahooData.table_name, metadata: Optional[db.MetaData] = None
+) -> db.Table:
+    """SQLAlchemy definition of the yahooData table (or a staging copy of it)."""
+    return db.Table(
+        table_name,
+        metadata if metadata is not None else db.MetaData(),
+        *[
+            db.Column(column_name, column_type)
+            for column_name, column_type in YAHOO_DATA_SCHEMA.items()
+        ],
+        # Reads filter on the security and a time range
+        db.Index(
+            f"ix_{table_name}_{SQLYahooData.security}_{SQLYahooData.as_at_date}",
+            SQLYahooData.security,
+            SQLYahooData.as_at_date,
+        ),
+        schema=SQLYahooData.schema,
+    )
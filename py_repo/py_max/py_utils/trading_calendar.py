@@ -0,0 +1,28 @@
+import datetime as dt
+
+from typing import Any, Iterator, Optional
+
+
+def holiday_calendar() -> Any:
+    # Imported on first use, holidays is slow to import
+    import holidays
+
+    return holidays.US()
+
+
+def is_trading_day(day: dt.date, us_holidays: Optional[Any] = None) -> bool:
+    """Weekdays that aren't US holidays."""
+    if us_holidays is None:
+        us_holidays = holiday_calendar()
+    return (day not in us_holidays) and (day.weekday() not in [5, 6])
+
+
+def trading_days(first_day: dt.date, last_day: dt.date) -> Iterator[dt.datetime]:
+    """The trading days from the first to the last day inclusive, as midnight datetimes."""
+    us_holidays: Any = holiday_calendar()
+    day_iterable_dt: dt.datetime = dt.datetime.combine(first_day, dt.time())
+    last_day_dt: dt.datetime = dt.datetime.combine(last_day, dt.time())
+    while day_iterable_dt <= last_day_dt:
+        if is_trading_day(day_iterable_dt, us_holidays):
+            yield day_iterable_dt
+        day_iterable_dt += dt.timedelta(days=1)
@@ -0,0 +1,50 @@
+import pytest
+import time
+
+from typing import Iterator
+
+from py_max.py_utils import DBChoice
+from py_max.py_utils.sql import database_connector
+
+from benchmarks.stand_ins import reset_sqlite_table
+from benchmarks.yahoo_stub import StubServer, grabbers_pointed_at
+
+
+@pytest.fixture
+def sqlite_db(tmp_path, monkeypatch) -> DBChoice:
+    """A SQLite DBChoice on a fresh file with an empty stk.yahooData."""
+    monkeypatch.setenv("PY_MAX_SQLITE_URL", f"sqlite:///{tmp_path / 'py_max.db'}")
+    database_connector._CONNECTION_STRINGS.pop(DBChoice.SQLITE, None)
+    reset_sqlite_table(DBChoice.SQLITE)
+    yield DBChoice.SQLITE
+
+    database_connector.dispose_engines()
+    database_connector._CONNECTION_STRINGS.pop(DBChoice.SQLITE, None)
+
+
+@pytest.fixture
+def local_db(sqlite_db: DBChoice, monkeypatch) -> DBChoice:
+    """LOCAL pointed at the SQLite file, for the reads that always query LOCAL."""
+    monkeypatch.setenv("PY_MAX_DB_CONNECTION", sqlite_db.connection_string)
+    database_connector._CONNECTION_STRINGS.pop(DBChoice.LOCAL, None)
+    yield DBChoice.LOCAL
+
+    database_connector.dispose_engines()
+    database_connector._CONNECTION_STRINGS.pop(DBChoice.LOCAL, None)
+
+
+@pytest.fixture
+def stub_server() -> Iterator[StubServer]:
+    """The local stand-in for the Yahoo chart endpoint, with the grabbers pointed at it."""
+    with StubServer() as server, grabbers_pointed_at(server.url):
+        yield server
+
+
+@pytest.fixture
+def exchange_time(monkeypatch) -> Iterator[None]:
+    """This machine's clock in the synthetic bars' zone, so the requested windows line up with them."""
+    monkeypatch.setenv("TZ", "America/New_York")
+    time.tzset()
+    yield
+    monkeypatch.undo()
+    time.tzset()
@@ -0,0 +1,40 @@
+import pandas as pd
+import numpy as np
+import datetime as dt
+
+from py_max.finance_data import Stock, Apple
+from py_max.model_data.algo_strat import Trade, price_frame
+from py_max.py_utils import SQLYahooData
+
+from benchmarks.synthetic_data import minute_bars
+
+# A Monday, the synthetic days run on from it
+FIRST_DAY: dt.datetime = dt.datetime(2024, 6, 3)
+
+
+def tick_rounded_bars(
+    day: dt.datetime, seed: int, bars: int, tick: float, missing: float = 0.1
+) -> pd.DataFrame:
+    """
+    Synthetic bars of the day with a fraction of the minutes missing, the highs and lows rounded
+    to the tick so that the windows have ties in them.
+    """
+    bars_df: pd.DataFrame = minute_bars(
+        Apple.ticker, day.date(), seed, bars=bars, missing=missing, empty=0
+    )
+    for column in (SQLYahooData.market_high, SQLYahooData.market_low):
+        bars_df[column] = np.round(bars_df[column] / tick) * tick
+    return Stock.clean_data(bars_df)
+
+
+def make_trade(bars_df: pd.DataFrame, day: dt.datetime) -> Trade:
+    return Trade(
+        Stock(Apple, day),
+        day,
+        1_000_000,
+        price_frame(
+            bars_df[SQLYahooData.as_at_date].to_numpy(),
+            bars_df[SQLYahooData.market_high].to_numpy(),
+            bars_df[SQLYahooData.market_low].to_numpy(),
+        ),
+    )
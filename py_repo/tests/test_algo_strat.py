@@ -0,0 +1,77 @@
+import pandas as pd
+import numpy as np
+import datetime as dt
+import pytest
+
+from py_max.model_data.algo_strat import Trade, StrategyColumns, batch_signals
+from py_max.py_utils import SQLYahooData
+
+from tests.helpers import FIRST_DAY, make_trade, tick_rounded_bars
+
+# The default windows, and windows wider than the first half hour of bars
+STRATEGY_PARAMETERS: list = [
+    {},
+    {"reverse_points": 5, "regression_points": 30, "mins_to_the_future": 5},
+]
+
+
+def reference_signals(trade: Trade, times: pd.Series, **parameters) -> np.ndarray:
+    return np.array(
+        [trade.run_day(time.to_pydatetime(), **parameters)[1] for time in times]
+    )
+
+
+@pytest.mark.parametrize("parameters", STRATEGY_PARAMETERS)
+@pytest.mark.parametrize("seed, tick", [(0, 0.01), (1, 0.05), (2, 0.25)])
+def test_batch_signals_match_run_day(seed: int, tick: float, parameters: dict) -> None:
+    trade: Trade = make_trade(tick_rounded_bars(FIRST_DAY, seed, 150, tick), FIRST_DAY)
+    day_data: pd.DataFrame = trade.performance_data
+
+    BUY: np.ndarray = batch_signals(
+        day_data.index.to_numpy(),
+        day_data[SQLYahooData.market_mid].to_numpy(),
+        **parameters,
+    )
+    expected: np.ndarray = reference_signals(
+        trade, day_data[SQLYahooData.as_at_date], **parameters
+    )
+    np.testing.assert_array_equal(BUY, expected)
+
+
+@pytest.mark.parametrize("parameters", STRATEGY_PARAMETERS)
+def test_run_day_batch_matches_run_day_each_minute(parameters: dict) -> None:
+    trade: Trade = make_trade(tick_rounded_bars(FIRST_DAY, 3, 120, 0.05), FIRST_DAY)
+    first_bar: dt.datetime = (
+        trade.performance_data[SQLYahooData.as_at_date].iloc[0].to_pydatetime()
+    )
+    # From before the first bar, which never buys, through the gaps between bars
+    signals: pd.DataFrame = trade.run_day_batch(
+        first_bar - dt.timedelta(minutes=5),
+        first_bar + dt.timedelta(minutes=120),
+        **parameters,
+    )
+    assert not signals[StrategyColumns.Buy].iloc[:5].any()
+
+    in_day: pd.DataFrame = signals.iloc[5:]
+    expected: np.ndarray = reference_signals(trade, in_day.index, **parameters)
+    np.testing.assert_array_equal(in_day[StrategyColumns.Buy].to_numpy(), expected)
+    assert expected.any()
+
+
+def test_bars_without_a_mid_are_dropped() -> None:
+    bars_df: pd.DataFrame = tick_rounded_bars(FIRST_DAY, 4, 150, 0.05)
+    no_mid: list = [bars_df.index[2], bars_df.index[40], bars_df.index[41]]
+    bars_df.loc[no_mid, [SQLYahooData.market_high, SQLYahooData.market_low]] = np.nan
+    trade: Trade = make_trade(bars_df, FIRST_DAY)
+    day_data: pd.DataFrame = trade.performance_data
+
+    assert len(day_data) == len(bars_df) - len(no_mid)
+    assert not day_data[SQLYahooData.market_mid].isna().any()
+
+    BUY: np.ndarray = batch_signals(
+        day_data.index.to_numpy(), day_data[SQLYahooData.market_mid].to_numpy()
+    )
+    np.testing.assert_array_equal(
+        BUY, reference_signals(trade, day_data[SQLYahooData.as_at_date])
+    )
+    assert BUY.any()
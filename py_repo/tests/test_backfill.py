@@ -0,0 +1,26 @@
+import argparse
+import pytest
+
+from py_max.finance_data.upload_to_sql.backfill import (
+    LEDGER_PATH_VARIABLE,
+    build_parser,
+)
+
+
+def test_ledger_path_from_the_environment(monkeypatch, tmp_path) -> None:
+    monkeypatch.setenv(LEDGER_PATH_VARIABLE, str(tmp_path / "ledger.json"))
+    options: argparse.Namespace = build_parser().parse_args([])
+    assert options.ledger == str(tmp_path / "ledger.json")
+
+    # --ledger wins over the environment
+    options = build_parser().parse_args(["--ledger", "other.json"])
+    assert options.ledger == "other.json"
+
+
+def test_ledger_required_without_the_environment(monkeypatch) -> None:
+    monkeypatch.delenv(LEDGER_PATH_VARIABLE, raising=False)
+    with pytest.raises(SystemExit):
+        build_parser().parse_args([])
+    assert (
+        build_parser().parse_args(["--ledger", "ledger.json"]).ledger == "ledger.json"
+    )
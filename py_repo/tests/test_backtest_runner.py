@@ -0,0 +1,84 @@
+import pandas as pd
+import datetime as dt
+import pytest
+
+from py_max.finance_data import Apple, Google
+from py_max.model_data import backtest_runner
+from py_max.model_data.backtest_runner import BacktestRunner, ResultSink
+
+START: dt.datetime = dt.datetime(2024, 6, 3)
+END: dt.datetime = dt.datetime(2024, 6, 14)
+
+
+def date_reports(date: dt.datetime) -> list:
+    return [
+        {"Date": date, "Ticker": ticker, "Return": 0.25, "TradeCount": 2}
+        for ticker in (Apple.ticker, Google.ticker)
+    ]
+
+
+class StoppingPortfolio:
+    """Stands in for Portfolio, giving fixed reports and stopping the run after a few dates."""
+
+    dates_run: list = []
+    stop_after: int = 3
+
+    def __init__(self, stocks, dates, CAPITAL, cache) -> None:
+        self.dates: list = dates
+
+    def daily_reports(self, BATCH, workers, prefetch):
+        for date in self.dates:
+            if len(StoppingPortfolio.dates_run) == StoppingPortfolio.stop_after:
+                raise KeyboardInterrupt
+            StoppingPortfolio.dates_run.append(date)
+            yield date, date_reports(date)
+
+
+@pytest.fixture(params=["results.csv", "results"])
+def output_path(request, tmp_path) -> str:
+    if not request.param.endswith(".csv"):
+        pytest.importorskip("pyarrow")
+    return str(tmp_path / request.param)
+
+
+def test_sink_appends_each_flush(output_path: str) -> None:
+    sink: ResultSink = ResultSink(output_path)
+    for date in (START, START + dt.timedelta(days=1)):
+        sink.write(date_reports(date))
+        sink.flush()
+
+    results: pd.DataFrame = ResultSink(output_path).read()
+    assert len(results) == 4
+    assert sink.completed_dates() == {START.date(), START.date() + dt.timedelta(days=1)}
+
+
+def test_sink_drops_a_partly_written_line(tmp_path) -> None:
+    output_path: str = str(tmp_path / "results.csv")
+    sink: ResultSink = ResultSink(output_path)
+    sink.write(date_reports(START))
+    sink.flush()
+    with open(output_path, "a") as file:
+        file.write("2024-06-04,AAPL,0.2")
+
+    assert ResultSink(output_path).completed_dates() == {START.date()}
+    assert len(ResultSink(output_path).read()) == 2
+
+
+def test_stopped_run_resumes_from_the_date_it_stopped_on(
+    output_path: str, monkeypatch
+) -> None:
+    monkeypatch.setattr(backtest_runner, "Portfolio", StoppingPortfolio)
+    monkeypatch.setattr(StoppingPortfolio, "dates_run", [])
+
+    # Stopped part way through the first chunk of five dates
+    with pytest.raises(KeyboardInterrupt):
+        BacktestRunner([Apple, Google], START, END, output_path, chunk_days=5).run()
+    assert len(ResultSink(output_path).completed_dates()) == 3
+
+    monkeypatch.setattr(StoppingPortfolio, "stop_after", None)
+    results: pd.DataFrame = BacktestRunner(
+        [Apple, Google], START, END, output_path, chunk_days=5
+    ).run()
+    assert len(StoppingPortfolio.dates_run) == 10
+    assert len(set(StoppingPortfolio.dates_run)) == 10
+    assert len(results) == 2 * 10
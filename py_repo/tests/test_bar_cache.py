@@ -0,0 +1,45 @@
+import pandas as pd
+import datetime as dt
+import subprocess
+import sys
+import pytest
+
+from pathlib import Path
+
+from py_max.finance_data import Apple
+from py_max.finance_data.read_sql import BarCache
+from py_max.finance_data.upload_to_sql.ingest_ledger import IngestLedger, LedgerStatus
+
+from benchmarks.synthetic_data import minute_bars
+
+DAY: dt.date = dt.date(2024, 6, 3)
+
+
+def test_ledger_decides_the_settled_days(tmp_path) -> None:
+    pytest.importorskip("pyarrow")
+    ledger: IngestLedger = IngestLedger(tmp_path / "ledger.json")
+    ledger.record(Apple.ticker, DAY, LedgerStatus.complete)
+    ledger.record(Apple.ticker, DAY + dt.timedelta(days=1), LedgerStatus.partial)
+    cache: BarCache = BarCache(str(tmp_path / "cache"), ledger)
+
+    for day in (DAY, DAY + dt.timedelta(days=1)):
+        cache.write_day(Apple.ticker, day, minute_bars(Apple.ticker, day, bars=30))
+
+    cached_data: pd.DataFrame = cache.read_day(Apple.ticker, DAY)
+    assert cached_data is not None and len(cached_data) > 0
+    assert cache.read_day(Apple.ticker, DAY + dt.timedelta(days=1)) is None
+
+
+def test_reading_does_not_import_the_capture() -> None:
+    completed: subprocess.CompletedProcess = subprocess.run(
+        [
+            sys.executable,
+            "-c",
+            "import sys, py_max.finance_data.read_sql.bar_cache; "
+            "print(any('upload_to_sql' in name for name in sys.modules))",
+        ],
+        capture_output=True,
+        text=True,
+        cwd=Path(__file__).parents[1],
+    )
+    assert completed.stdout.strip() == "False", completed.stderr
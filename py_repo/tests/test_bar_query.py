@@ -0,0 +1,127 @@
+import pandas as pd
+import datetime as dt
+import sqlalchemy as db
+import pytest
+
+from py_max.finance_data import Apple, Google, Tesla
+from py_max.py_utils import (
+    BarQuery,
+    DatabaseConnector,
+    DBChoice,
+    SQLYahooData,
+    YAHOO_DATA_SCHEMA,
+)
+from py_max.py_utils.sql import bar_query
+
+from benchmarks.synthetic_data import minute_bars_range
+
+TICKERS: list = [Apple.ticker, Google.ticker, Tesla.ticker]
+DAYS: list = [dt.date(2024, 6, 3) + dt.timedelta(days=offset) for offset in range(5)]
+
+
+@pytest.fixture
+def stored_bars(sqlite_db: DBChoice) -> pd.DataFrame:
+    bars_df: pd.DataFrame = minute_bars_range(TICKERS, DAYS, bars=30)
+    with DatabaseConnector(sqlite_db) as connection:
+        with connection.begin():
+            bars_df.to_sql(
+                SQLYahooData.table_name,
+                connection,
+                schema=SQLYahooData.schema,
+                index=False,
+                if_exists="append",
+                dtype=YAHOO_DATA_SCHEMA,
+            )
+    return bars_df
+
+
+def read(query: db.Select) -> pd.DataFrame:
+    with DatabaseConnector(DBChoice.SQLITE) as connection:
+        return pd.read_sql(query, connection)
+
+
+def keys(bars_df: pd.DataFrame) -> set:
+    return set(
+        zip(
+            bars_df[SQLYahooData.security],
+            pd.to_datetime(bars_df[SQLYahooData.as_at_date]),
+        )
+    )
+
+
+def expected_rows(bars_df: pd.DataFrame, securities: list, days: list) -> pd.DataFrame:
+    return bars_df.loc[
+        bars_df[SQLYahooData.security].isin(securities)
+        & bars_df[SQLYahooData.as_at_date].dt.date.isin(days)
+    ]
+
+
+def test_between(stored_bars: pd.DataFrame) -> None:
+    securities: list = [Apple.ticker, Tesla.ticker]
+    data: pd.DataFrame = read(
+        BarQuery().for_securities(securities).between(DAYS[1], DAYS[3]).select()
+    )
+    assert keys(data) == keys(expected_rows(stored_bars, securities, DAYS[1:3]))
+
+    # Open at the start
+    data = read(BarQuery().for_securities(securities).between(None, DAYS[1]).select())
+    assert keys(data) == keys(expected_rows(stored_bars, securities, DAYS[:1]))
+
+
+@pytest.mark.parametrize(
+    "days", [[DAYS[0], DAYS[2], DAYS[4]], [DAYS[0], DAYS[1], DAYS[3]], [DAYS[4]]]
+)
+def test_on_days(stored_bars: pd.DataFrame, days: list) -> None:
+    data: pd.DataFrame = read(
+        BarQuery().for_securities(TICKERS).on_days(days).ordered().select()
+    )
+    assert keys(data) == keys(expected_rows(stored_bars, TICKERS, days))
+    assert data[[SQLYahooData.security, SQLYahooData.as_at_date]].equals(
+        data.sort_values([SQLYahooData.security, SQLYahooData.as_at_date])[
+            [SQLYahooData.security, SQLYahooData.as_at_date]
+        ]
+    )
+
+
+def test_latest_times(stored_bars: pd.DataFrame) -> None:
+    securities: list = [Google.ticker, Tesla.ticker]
+    data: pd.DataFrame = read(
+        BarQuery().for_securities(securities).between(None, DAYS[3]).latest_times()
+    )
+    expected: pd.Series = (
+        expected_rows(stored_bars, securities, DAYS[:3])
+        .groupby(SQLYahooData.security)[SQLYahooData.as_at_date]
+        .max()
+    )
+    assert (
+        dict(
+            zip(
+                data[SQLYahooData.security],
+                pd.to_datetime(data[SQLYahooData.as_at_date]),
+            )
+        )
+        == expected.to_dict()
+    )
+
+
+def test_padding_keeps_the_rows(stored_bars: pd.DataFrame, monkeypatch) -> None:
+    # Three securities and three separate days are both padded to four
+    query: BarQuery = (
+        BarQuery()
+        .for_securities(TICKERS)
+        .on_days([DAYS[0], DAYS[2], DAYS[4]])
+        .ordered()
+    )
+    padded_data: pd.DataFrame = read(query.select())
+    padded_latest: pd.DataFrame = read(query.latest_times())
+
+    monkeypatch.setattr(bar_query, "padded", lambda values: values)
+    pd.testing.assert_frame_equal(read(query.select()), padded_data)
+    pd.testing.assert_frame_equal(read(query.latest_times()), padded_latest)
+
+
+def test_padded() -> None:
+    assert bar_query.padded([]) == []
+    assert bar_query.padded(["a"]) == ["a"]
+    assert bar_query.padded(["a", "b", "c"]) == ["a", "b", "c", "c"]
+    assert len(bar_query.padded(list(range(5)))) == 8
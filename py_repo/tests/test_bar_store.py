@@ -0,0 +1,48 @@
+import pandas as pd
+import numpy as np
+import datetime as dt
+import pytest
+
+from py_max.finance_data import Apple, Google
+from py_max.finance_data.read_sql import BarStore
+from py_max.py_utils import SQLYahooData
+
+from benchmarks.synthetic_data import GMT_OFFSET, minute_bars_range
+
+DAYS: list = [dt.date(2024, 6, 3), dt.date(2024, 6, 4)]
+
+
+def test_round_trips_a_day() -> None:
+    bars_df: pd.DataFrame = minute_bars_range(
+        [Apple.ticker, Google.ticker], DAYS, bars=60, empty=0
+    )
+    store: BarStore = BarStore.from_frame(bars_df.sample(frac=1, random_state=0))
+
+    expected: pd.DataFrame = bars_df.loc[
+        (bars_df[SQLYahooData.security] == Google.ticker)
+        & (bars_df[SQLYahooData.as_at_date].dt.date == DAYS[1])
+    ].reset_index(drop=True)
+    day_frame: pd.DataFrame = store.day(Google.ticker, DAYS[1]).to_frame()
+    pd.testing.assert_frame_equal(
+        day_frame[list(expected.columns)],
+        expected,
+        check_dtype=False,
+    )
+
+
+def test_missing_gmt_offsets_are_filled() -> None:
+    bars_df: pd.DataFrame = minute_bars_range([Apple.ticker], DAYS, bars=60, empty=0)
+    bars_df[SQLYahooData.gmt_off_set] = bars_df[SQLYahooData.gmt_off_set].astype(float)
+    bars_df.loc[[0, 1, 30], SQLYahooData.gmt_off_set] = np.nan
+
+    store: BarStore = BarStore.from_frame(bars_df)
+    gmt_offsets: np.ndarray = store[Apple.ticker].gmt_offsets
+    assert gmt_offsets.dtype == np.int32
+    assert (gmt_offsets == GMT_OFFSET).all()
+
+
+def test_no_gmt_offsets_raises() -> None:
+    bars_df: pd.DataFrame = minute_bars_range([Apple.ticker], DAYS, bars=60)
+    bars_df[SQLYahooData.gmt_off_set] = np.nan
+    with pytest.raises(ValueError):
+        BarStore.from_frame(bars_df)
@@ -0,0 +1,135 @@
+import pandas as pd
+import datetime as dt
+import sqlalchemy as db
+import pytest
+
+from py_max.finance_data import Apple, Google
+from py_max.finance_data.upload_to_sql.data_capture import DataCapture, DedupMethod
+from py_max.finance_data.upload_to_sql.ingest_ledger import IngestLedger, LedgerStatus
+from py_max.py_utils import DatabaseConnector, DBChoice, SQLYahooData
+
+from benchmarks.synthetic_data import minute_bars, minute_bars_range
+from benchmarks.yahoo_stub import StubServer
+
+DAYS: list = [dt.date(2024, 6, 3), dt.date(2024, 6, 4)]
+
+
+def stored_rows(db_choice: DBChoice) -> pd.DataFrame:
+    with DatabaseConnector(db_choice) as connection:
+        return pd.read_sql(
+            db.text(f"SELECT * FROM {SQLYahooData.schema}.{SQLYahooData.table_name}"),
+            connection,
+        )
+
+
+def table_names(db_choice: DBChoice) -> list:
+    with DatabaseConnector(db_choice) as connection:
+        return db.inspect(connection).get_table_names(schema=SQLYahooData.schema)
+
+
+def test_staging_insert_skips_stored_keys(sqlite_db: DBChoice) -> None:
+    bars_df: pd.DataFrame = minute_bars_range(
+        [Apple.ticker, Google.ticker], DAYS, bars=60
+    )
+    capture: DataCapture = DataCapture(db_choice=sqlite_db, STAGING=True)
+
+    first_rows: pd.DataFrame = bars_df.iloc[::2]
+    assert capture.insert_through_staging(first_rows) == len(first_rows)
+    # Half of these are already stored
+    assert capture.insert_through_staging(bars_df) == len(bars_df) - len(first_rows)
+    assert capture.insert_through_staging(bars_df) == 0
+
+    stored: pd.DataFrame = stored_rows(sqlite_db)
+    keys: list = [SQLYahooData.as_at_date, SQLYahooData.security, SQLYahooData.currency]
+    assert len(stored) == len(bars_df)
+    assert not stored.duplicated(keys).any()
+    # The staging tables are dropped once the rows are moved across
+    assert table_names(sqlite_db) == [SQLYahooData.table_name]
+
+
+@pytest.mark.parametrize("dedup", list(DedupMethod))
+def test_write_new_data_skips_stored_rows(
+    sqlite_db: DBChoice, dedup: DedupMethod
+) -> None:
+    bars_df: pd.DataFrame = minute_bars_range(
+        [Apple.ticker, Google.ticker], DAYS, bars=60
+    )
+    capture: DataCapture = DataCapture(db_choice=sqlite_db, dedup=dedup)
+
+    # The earlier half of each security is already stored
+    cut_time: pd.Timestamp = bars_df[SQLYahooData.as_at_date].median()
+    capture.write_new_data(bars_df.loc[bars_df[SQLYahooData.as_at_date] < cut_time])
+    capture.write_new_data(bars_df)
+
+    stored: pd.DataFrame = stored_rows(sqlite_db)
+    keys: list = [SQLYahooData.as_at_date, SQLYahooData.security, SQLYahooData.currency]
+    assert len(stored) == len(bars_df)
+    assert not stored.duplicated(keys).any()
+
+
+def test_key_anti_join_reads_up_to_the_last_time(sqlite_db: DBChoice) -> None:
+    bars_df: pd.DataFrame = minute_bars_range([Apple.ticker], DAYS, bars=60)
+    capture: DataCapture = DataCapture(db_choice=sqlite_db, dedup=DedupMethod.KEYS)
+
+    # The first and last rows are stored, the keys read must include both ends of the span
+    capture.write_new_data(bars_df.iloc[[0, -1]])
+    capture.write_new_data(bars_df)
+
+    assert len(stored_rows(sqlite_db)) == len(bars_df)
+
+
+def grab_days(capture: DataCapture, days: list) -> list:
+    return [capture.grab_day(Apple.ticker, day).reset_index(drop=True) for day in days]
+
+
+def test_grab_range_matches_grab_day(stub_server: StubServer, exchange_time) -> None:
+    days: list = [
+        dt.datetime(2024, 6, 3) + dt.timedelta(days=offset) for offset in range(5)
+    ]
+    capture: DataCapture = DataCapture(range_days=5)
+
+    range_frames: list = capture.grab_range(Apple.ticker, days)
+    assert len(stub_server.hits) == 1
+
+    for range_frame, day_frame in zip(range_frames, grab_days(capture, days)):
+        assert len(day_frame) > 600
+        pd.testing.assert_frame_equal(range_frame.reset_index(drop=True), day_frame)
+
+
+def test_grab_range_requests_the_days_cut_short(
+    stub_server: StubServer, exchange_time
+) -> None:
+    days: list = [
+        dt.datetime(2024, 6, 3) + dt.timedelta(days=offset) for offset in range(5)
+    ]
+    capture: DataCapture = DataCapture(range_days=5)
+
+    # Only the first day and part of the second come back from the range request
+    stub_server.bar_limit = 1_000
+    range_frames: list = capture.grab_range(Apple.ticker, days)
+    assert len(stub_server.hits) == 1 + 4
+
+    for range_frame, day_frame in zip(range_frames, grab_days(capture, days)):
+        pd.testing.assert_frame_equal(range_frame.reset_index(drop=True), day_frame)
+
+
+def test_ledger_completes_covered_days(tmp_path) -> None:
+    ledger: IngestLedger = IngestLedger(tmp_path / "ledger.json")
+    full_day, short_day, empty_day = DAYS[0], DAYS[1], dt.date(2024, 6, 5)
+    data: pd.DataFrame = pd.concat(
+        [
+            minute_bars(Apple.ticker, full_day),
+            # The first two hours of the day only
+            minute_bars(Apple.ticker, short_day, bars=120),
+        ]
+    )
+    ledger.record_capture(Apple.ticker, [full_day, short_day, empty_day], data)
+
+    assert ledger.status(Apple.ticker, full_day) == LedgerStatus.complete
+    assert ledger.status(Apple.ticker, short_day) == LedgerStatus.partial
+    assert ledger.status(Apple.ticker, empty_day) == LedgerStatus.empty
+
+    # Today is never complete, however much of it there is
+    today: dt.date = dt.date.today()
+    ledger.record_capture(Apple.ticker, [today], minute_bars(Apple.ticker, today))
+    assert ledger.status(Apple.ticker, today) == LedgerStatus.partial
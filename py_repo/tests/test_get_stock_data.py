@@ -0,0 +1,93 @@
+import pandas as pd
+import numpy as np
+import datetime as dt
+
+from py_max.finance_data import Apple, Stock
+from py_max.finance_data.read_sql import BarStore
+from py_max.py_utils import (
+    DatabaseConnector,
+    DBChoice,
+    Instrumentation,
+    SQLYahooData,
+    YAHOO_DATA_SCHEMA,
+    enable_instrumentation,
+)
+
+from benchmarks.synthetic_data import minute_bars_range
+
+DAY: dt.date = dt.date(2024, 6, 3)
+
+
+def store_bars(db_choice: DBChoice, bars_df: pd.DataFrame) -> None:
+    with DatabaseConnector(db_choice) as connection:
+        with connection.begin():
+            bars_df.to_sql(
+                SQLYahooData.table_name,
+                connection,
+                schema=SQLYahooData.schema,
+                index=False,
+                if_exists="append",
+                dtype=YAHOO_DATA_SCHEMA,
+            )
+
+
+def times(data: pd.DataFrame) -> list:
+    return pd.to_datetime(data[SQLYahooData.as_at_date]).to_list()
+
+
+def test_read_paths_keep_the_same_rows(local_db: DBChoice) -> None:
+    bars_df: pd.DataFrame = minute_bars_range([Apple.ticker], [DAY], bars=60, empty=0.1)
+    # Bars with only a close, which are kept, and bars with only a volume, which aren't
+    close_only: list = [bars_df.index[5], bars_df.index[6]]
+    bars_df.loc[
+        close_only,
+        [SQLYahooData.market_high, SQLYahooData.market_low, SQLYahooData.market_open],
+    ] = np.nan
+    empty_bars: pd.Series = bars_df[SQLYahooData.market_close].isna()
+    assert empty_bars.any()
+    store_bars(local_db, bars_df)
+
+    expected: list = times(bars_df.loc[~empty_bars])
+    stock: Stock = Stock(Apple)
+    high_low: pd.DataFrame = stock.get_day(
+        DAY, [SQLYahooData.market_high, SQLYahooData.market_low]
+    )
+    assert times(high_low) == expected
+    assert list(high_low.columns) == [
+        SQLYahooData.as_at_date,
+        SQLYahooData.market_low,
+        SQLYahooData.market_high,
+        SQLYahooData.date,
+    ]
+
+    assert times(stock.get_day(DAY)) == expected
+    assert times(Stock.load_many([Apple], [DAY])[(Apple.ticker, DAY)]) == expected
+    store: BarStore = Stock.load_store([Apple], [DAY])
+    assert times(store.day(Apple.ticker, DAY).to_frame()) == expected
+
+    streamed: list = list(
+        stock.stream_days(DAY, DAY + dt.timedelta(days=1), [SQLYahooData.market_high])
+    )
+    assert [day for day, _ in streamed] == [DAY]
+    assert times(streamed[0][1]) == expected
+
+
+def test_streamed_partitions_are_timed(local_db: DBChoice) -> None:
+    bars_df: pd.DataFrame = minute_bars_range([Apple.ticker], [DAY], bars=250, empty=0)
+    store_bars(local_db, bars_df)
+
+    instrumentation: Instrumentation = enable_instrumentation()
+    instrumentation.reset()
+    try:
+        chunks: list = list(Stock(Apple).stream_data(chunksize=100))
+        calls: dict = dict(instrumentation.calls)
+        counters: dict = dict(instrumentation.counters)
+    finally:
+        instrumentation.reset()
+        enable_instrumentation(False)
+
+    assert len(chunks) == 3
+    assert calls["sql.query"] == 3
+    assert counters["sql.chunks"] == 3
+    assert counters["sql.rows"] == len(bars_df)
+    assert counters["sql.bytes"] > 0
@@ -0,0 +1,19 @@
+import pytest
+
+from benchmarks.import_time import DEFAULT_BUDGET, LAZY_MODULES, MODULES, import_time
+
+
+@pytest.mark.parametrize("module", MODULES)
+def test_import_within_budget(module: str) -> None:
+    """Each entry point imports in a fresh interpreter without the keys file, within budget."""
+    result: dict = import_time(module)
+    assert "Error" not in result, f"{module} failed to import: {result.get('Error')}"
+    assert (
+        result["Seconds"] <= DEFAULT_BUDGET
+    ), f"{module} took {result['Seconds']:.2f}s, over the {DEFAULT_BUDGET:.2f}s budget"
+    # Only ever imported on first use
+    assert result["Loaded"] == [], f"{module} imported {', '.join(result['Loaded'])}"
+
+
+def test_lazy_modules_are_checked() -> None:
+    assert set(LAZY_MODULES) == {"keras", "tensorflow", "matplotlib", "holidays"}
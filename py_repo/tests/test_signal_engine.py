@@ -0,0 +1,61 @@
+import pandas as pd
+import numpy as np
+import datetime as dt
+import pytest
+
+from py_max.model_data.algo_strat import Trade, batch_signals
+from py_max.model_data.signal_engine import SignalEngine
+from py_max.py_utils import SQLYahooData
+
+from tests.helpers import FIRST_DAY, make_trade, tick_rounded_bars
+
+DAYS: list = [FIRST_DAY + dt.timedelta(days=offset) for offset in range(3)]
+
+
+@pytest.mark.parametrize(
+    "parameters",
+    [{}, {"reverse_points": 5, "regression_points": 30, "mins_to_the_future": 5}],
+)
+@pytest.mark.parametrize("tick", [0.01, 0.05])
+def test_signal_engine_matches_batch_signals(tick: float, parameters: dict) -> None:
+    engine: SignalEngine = SignalEngine(**parameters)
+    signals: list = []
+    expected: list = []
+    for seed, day in enumerate(DAYS):
+        bars_df: pd.DataFrame = tick_rounded_bars(day, seed, 180, tick, missing=0.15)
+        # Bars without a mid, the first of the day among them
+        no_mid: list = [bars_df.index[0], bars_df.index[50], bars_df.index[51]]
+        bars_df.loc[no_mid, [SQLYahooData.market_high, SQLYahooData.market_low]] = (
+            np.nan
+        )
+
+        mid: np.ndarray = (
+            bars_df[SQLYahooData.market_high] + bars_df[SQLYahooData.market_low]
+        ).to_numpy() / 2
+        BUY: list = [
+            engine.update(time, value)
+            for time, value in zip(bars_df[SQLYahooData.as_at_date], mid)
+        ]
+        # The skipped bars give back the flag as it was
+        assert BUY[0] is False
+        assert BUY[50] == BUY[51] == BUY[49]
+        signals.extend(value for value, present in zip(BUY, ~np.isnan(mid)) if present)
+
+        trade: Trade = make_trade(bars_df, day)
+        expected.extend(
+            batch_signals(
+                trade.performance_data.index.to_numpy(),
+                trade.performance_data[SQLYahooData.market_mid].to_numpy(),
+                **parameters,
+            )
+        )
+
+    np.testing.assert_array_equal(np.array(signals), np.array(expected))
+    assert any(expected)
+
+
+def test_signal_engine_rejects_bars_out_of_order() -> None:
+    engine: SignalEngine = SignalEngine()
+    engine.update(FIRST_DAY.replace(hour=9, minute=30), 100.0)
+    with pytest.raises(ValueError):
+        engine.update(FIRST_DAY.replace(hour=9, minute=30), 100.0)
@@ -0,0 +1,80 @@
+import requests
+import pandas as pd
+import datetime as dt
+import pytest
+
+from concurrent.futures import ThreadPoolExecutor
+
+from py_max.finance_data import Apple, Google, Tesla
+from py_max.finance_data.upload_to_sql.data_capture import DataCapture
+from py_max.finance_data.upload_to_sql.yahoo_session import YahooSession
+from py_max.py_utils import SQLYahooData
+
+from benchmarks.yahoo_stub import StubServer
+
+# The capture the serial and concurrent modes are compared over, a week and a half of days
+CAPTURE_START: dt.datetime = dt.datetime(2024, 6, 2)
+CAPTURE_END: dt.datetime = dt.datetime(2024, 6, 12)
+CAPTURE_TICKERS: list = [Apple.ticker, Google.ticker, Tesla.ticker]
+
+
+def chart_url(server: StubServer, ticker: str = Apple.ticker) -> str:
+    period1: int = round(CAPTURE_START.timestamp())
+    return f"{server.url}/v8/finance/chart/{ticker}?symbol={ticker}&period1={period1}&period2={period1 + 86400}"
+
+
+def test_retries_a_503(stub_server: StubServer) -> None:
+    with YahooSession(retries=3, backoff=0.01) as session:
+        stub_server.fail_next(1)
+        response: requests.Response = session.get(chart_url(stub_server))
+        assert response.status_code == 200
+        assert len(stub_server.hits) == 2
+
+        # Given back once the retries run out
+        stub_server.reset()
+        stub_server.fail_next(10)
+        response = session.get(chart_url(stub_server))
+        assert response.status_code == 503
+        assert len(stub_server.hits) == 4
+
+
+def test_rate_limit_across_threads(stub_server: StubServer) -> None:
+    requests_per_second: float = 20.0
+    with YahooSession(8, requests_per_second=requests_per_second) as session:
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            list(executor.map(lambda _: session.get(chart_url(stub_server)), range(10)))
+
+    # The span of the requests rather than each gap, as when the server reads each one varies
+    span: float = stub_server.hits[-1] - stub_server.hits[0]
+    assert len(stub_server.hits) == 10
+    assert span >= 0.9 * (len(stub_server.hits) - 1) / requests_per_second
+
+
+@pytest.mark.parametrize("range_days", [1, 5])
+def test_concurrent_capture_matches_serial(
+    stub_server: StubServer, range_days: int
+) -> None:
+    serial_capture: DataCapture = DataCapture(
+        start_date=CAPTURE_START, end_date=CAPTURE_END, range_days=range_days
+    )
+    serial_data: dict = {
+        ticker: serial_capture.stock_call(ticker) for ticker in CAPTURE_TICKERS
+    }
+
+    # Even with requests failing along the way
+    stub_server.fail_next(3)
+    with YahooSession(4, requests_per_second=200, backoff=0.01) as session:
+        concurrent_capture: DataCapture = DataCapture(
+            start_date=CAPTURE_START,
+            end_date=CAPTURE_END,
+            range_days=range_days,
+            max_workers=4,
+            session=session,
+        )
+        concurrent_data: dict = concurrent_capture.concurrent_stock_calls(
+            CAPTURE_TICKERS
+        )
+
+    for ticker in CAPTURE_TICKERS:
+        assert not serial_data[ticker].dropna(subset=[SQLYahooData.security]).empty
+        pd.testing.assert_frame_equal(serial_data[ticker], concurrent_data[ticker])